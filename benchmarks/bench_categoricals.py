@@ -0,0 +1,95 @@
+"""
+Benchmark – categorical string columns on cargo
+===============================================
+Runs the cargo pipeline on synthetic inputs (benchmarks/generators.py) with
+CATEGORY_COLS converted to `category` (the default) and with the conversion
+switched off. For each setting it reports:
+  - deep memory of freq + sev after step 4 (clean + abs + categorise)
+  - the time of one mode over cargo_type (codes bincount vs Series.mode)
+  - best-of-N end-to-end run_pipeline wall time
+
+Both settings must write the same merged CSV.
+
+Run from the repository root:
+    python -m benchmarks.bench_categoricals
+    python -m benchmarks.bench_categoricals --scales 1 10 --repeat 3
+"""
+
+import argparse
+import contextlib
+import filecmp
+import os
+import tempfile
+import time
+
+from benchmarks.generators import write_line
+from data_clean import clean_cargo_data as cargo
+from data_clean.categoricals import mode_value
+
+
+@contextlib.contextmanager
+def _category_cols(cols: list[str]):
+    saved, cargo.CATEGORY_COLS = cargo.CATEGORY_COLS, cols
+    try:
+        yield
+    finally:
+        cargo.CATEGORY_COLS = saved
+
+
+def _cleaned_frames(freq_path: str, sev_path: str):
+    freq, sev = cargo.load_data(freq_path, sev_path)
+    freq, sev = cargo._clean_string_columns(freq), cargo._clean_string_columns(sev)
+    freq, sev = cargo.drop_columns(freq, sev)
+    freq, sev = cargo._abs_numeric(freq), cargo._abs_numeric(sev)
+    return cargo.categorise(freq, sev)
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def measure(freq_path: str, sev_path: str, output_path: str, repeat: int) -> dict:
+    freq, sev = _cleaned_frames(freq_path, sev_path)
+    mem_mb = (freq.memory_usage(deep=True).sum() + sev.memory_usage(deep=True).sum()) / 1024 ** 2
+    mode_s = _best_of(lambda: mode_value(sev["cargo_type"]), max(repeat, 5))
+
+    def run():
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            cargo.run_pipeline(freq_path, sev_path, output_path)
+
+    return {"mem_mb": mem_mb, "mode_ms": mode_s * 1e3, "pipeline_s": _best_of(run, repeat)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'scale':>6}  {'rows':>10}  {'setting':<11} {'memory':>10}  {'mode':>9}  {'pipeline':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            freq_path, sev_path, n_freq, n_sev = write_line("cargo", scale, tmp, args.seed)
+            outputs, rows = {}, {}
+            for setting, cols in (("object/str", []), ("category", cargo.CATEGORY_COLS)):
+                outputs[setting] = os.path.join(tmp, f"merged_{setting.replace('/', '_')}.csv")
+                with _category_cols(cols):
+                    rows[setting] = measure(freq_path, sev_path, outputs[setting], args.repeat)
+                r = rows[setting]
+                print(f"{scale:>5g}x  {n_freq + n_sev:>10,}  {setting:<11} {r['mem_mb']:>7,.1f} MB  "
+                      f"{r['mode_ms']:>6,.2f} ms  {r['pipeline_s']:>8,.2f}s")
+            assert filecmp.cmp(*outputs.values(), shallow=False), "outputs differ"
+            base, cat = rows["object/str"], rows["category"]
+            print(f"{'':>19}  reduction   {1 - cat['mem_mb'] / base['mem_mb']:>9.0%}  "
+                  f"{base['mode_ms'] / cat['mode_ms']:>8.1f}×  "
+                  f"{1 - cat['pipeline_s'] / base['pipeline_s']:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark – concurrent freq / sev loading
+=========================================
+load_data per line on synthetic inputs (benchmarks/generators.py), with the
+inputs evicted from the OS page cache before every read (posix_fadvise
+DONTNEED; POSIX only), so each read is a cold read:
+
+  serial     freq, then sev (the previous load_data)
+  concurrent load_data: both files on their own thread (sa_csv.read_sa_csvs)
+  prefetched load_data after the files were prefetched (sa_csv.prefetch), as
+             orchestrate --jobs 1 does for the next line while the current
+             one computes; only the load itself is timed
+
+Every load must equal the serial one. Savings grow with storage latency: on
+local disk the cold penalty is small, on network mounts it dominates.
+
+Run from the repository root:
+    python -m benchmarks.bench_concurrent_load
+    python -m benchmarks.bench_concurrent_load --lines cargo --scale 20
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generators import write_line
+from data_clean import clean_business_data as bi
+from data_clean import clean_cargo_data as cargo
+from data_clean import clean_equipment_data as equip
+from data_clean import clean_workers_comp as wc
+from data_clean.sa_csv import prefetch, read_sa_csv
+
+MODULES = {"business": bi, "cargo": cargo, "equipment": equip, "workers": wc}
+
+
+def _evict(*paths: str) -> None:
+    """Drop the files' pages from the OS page cache."""
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def _serial_load(module, freq_path: str, sev_path: str):
+    """The previous load_data: one file after the other, kept for comparison only."""
+    return (read_sa_csv(freq_path, module.FREQ_SCHEMA, cache=False),
+            read_sa_csv(sev_path,  module.SEV_SCHEMA,  cache=False))
+
+
+def _cold(fn, paths: tuple[str, str], repeat: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        _evict(*paths)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", nargs="+", default=list(MODULES), choices=list(MODULES))
+    parser.add_argument("--scale", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if not hasattr(os, "posix_fadvise"):
+        raise SystemExit("needs os.posix_fadvise to evict files from the page cache")
+
+    print(f"{'line':<10} {'MB':>6}  {'serial (s)':>10}  {'concurrent (s)':>14}  "
+          f"{'prefetched (s)':>14}  {'saved':>6}  {'prefetch saved':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for line in args.lines:
+            module = MODULES[line]
+            paths  = write_line(line, args.scale, tmp, args.seed)[:2]
+            mb     = sum(os.path.getsize(p) for p in paths) / 1024 ** 2
+
+            serial_t, expected = _cold(lambda: _serial_load(module, *paths), paths, args.repeat)
+            conc_t,   frames   = _cold(lambda: module.load_data(*paths, input_cache=False),
+                                       paths, args.repeat)
+
+            pre_t, prefetched_frames = float("inf"), None
+            for _ in range(args.repeat):
+                _evict(*paths)
+                prefetch(list(paths), cache=False).join()   # done while the previous line computed
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    prefetched_frames = module.load_data(*paths, input_cache=False)
+                pre_t = min(pre_t, time.perf_counter() - t0)
+
+            for got in (frames, prefetched_frames):
+                for a, b in zip(got, expected):
+                    pd.testing.assert_frame_equal(a, b)
+            print(f"{line:<10} {mb:>6.1f}  {serial_t:>10.3f}  {conc_t:>14.3f}  {pre_t:>14.3f}  "
+                  f"{1 - conc_t / serial_t:>6.0%}  {1 - pre_t / serial_t:>14.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark – cargo / equipment _cross_impute (steps 5-8)
+=======================================================
+Runs the four ID cross-imputation steps of the cargo and equipment pipelines
+on synthetic inputs (benchmarks/generators.py) twice: with the join-based
+_cross_impute and with the original groupby().first() lookup plus
+`apply(tuple, axis=1)` key per NaN row. Asserts both give identical frames.
+
+Run from the repository root:
+    python -m benchmarks.bench_cross_impute
+    python -m benchmarks.bench_cross_impute --lines cargo --scales 1 10 --repeat 3
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generators import write_line
+from data_clean import clean_cargo_data as cargo
+from data_clean import clean_equipment_data as equip
+
+MODULES = {"cargo": (cargo, "shipment_id", "cargo_type"),
+           "equipment": (equip, "equipment_id", "equipment_type")}
+
+
+# ── Reference implementation (tuple keys) ────────────────────────────────────
+
+def _legacy_cross_impute(target: pd.DataFrame, source: pd.DataFrame,
+                         key: str, match_on: list[str], **_) -> pd.DataFrame:
+    """The original lookup + per-row tuple map, kept for comparison only."""
+    valid  = source.dropna(subset=[key] + match_on)
+    lookup = valid.groupby(match_on, observed=True)[key].first()
+    mask = target[key].isna()
+    if mask.any():
+        idx_vals = target.loc[mask, match_on].apply(tuple, axis=1)
+        imputed  = idx_vals.map(lookup)
+        target   = target.copy()
+        target.loc[mask, key] = target.loc[mask, key].fillna(imputed)
+    return target
+
+
+# ── Steps 5-8 as run_pipeline calls them ─────────────────────────────────────
+
+def _steps_5_to_8(impute, freq: pd.DataFrame, sev: pd.DataFrame, id_col: str, type_col: str):
+    sev  = impute(sev, freq, key="policy_id", match_on=[id_col, type_col])
+    freq = impute(freq, sev, key="policy_id", match_on=[id_col, type_col])
+    sev  = impute(sev, freq, key=id_col, match_on=["policy_id", type_col])
+    freq = impute(freq, sev, key=id_col, match_on=["policy_id", type_col])
+    return freq, sev
+
+
+def _cleaned_frames(module, freq_path: str, sev_path: str):
+    with contextlib.redirect_stdout(io.StringIO()):
+        freq, sev = module.load_data(freq_path, sev_path)
+    freq, sev = module._clean_string_columns(freq), module._clean_string_columns(sev)
+    freq, sev = module.drop_columns(freq, sev)
+    freq, sev = module._abs_numeric(freq), module._abs_numeric(sev)
+    return module.categorise(freq, sev)
+
+
+def _best_of(fn, repeat: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", nargs="+", default=list(MODULES), choices=list(MODULES))
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'line':<10} {'scale':>6}  {'rows':>10}  {'NaN ids':>8}  {'join (s)':>9}  "
+          f"{'tuple (s)':>10}  {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for line in args.lines:
+            module, id_col, type_col = MODULES[line]
+            for scale in args.scales:
+                freq_path, sev_path, n_freq, n_sev = write_line(line, scale, tmp, args.seed)
+                freq, sev = _cleaned_frames(module, freq_path, sev_path)
+                n_nan = int(sum(df[c].isna().sum() for df in (freq, sev) for c in ("policy_id", id_col)))
+
+                new_t, (new_f, new_s) = _best_of(
+                    lambda: _steps_5_to_8(module._cross_impute, freq, sev, id_col, type_col), args.repeat)
+                old_t, (old_f, old_s) = _best_of(
+                    lambda: _steps_5_to_8(_legacy_cross_impute, freq, sev, id_col, type_col), args.repeat)
+                pd.testing.assert_frame_equal(new_f, old_f)
+                pd.testing.assert_frame_equal(new_s, old_s)
+                print(f"{line:<10} {scale:>5g}x  {n_freq + n_sev:>10,}  {n_nan:>8,}  {new_t:>9.3f}  "
+                      f"{old_t:>10.3f}  {old_t / new_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark – diagnostics levels
+==============================
+run_pipeline wall time per line on synthetic inputs (benchmarks/generators.py)
+with diagnostics off (the default), at summary and at detail level. Off
+computes no metrics at all; "detail cost" is what detail adds on top. All
+levels must produce the same merged frame.
+
+Run from the repository root:
+    python -m benchmarks.bench_diagnostics
+    python -m benchmarks.bench_diagnostics --lines workers --scale 20
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generators import write_line
+from data_clean import clean_business_data as bi
+from data_clean import clean_cargo_data as cargo
+from data_clean import clean_equipment_data as equip
+from data_clean import clean_workers_comp as wc
+from data_clean.diagnostics import DETAIL, OFF, SUMMARY
+
+MODULES = {"business": bi, "cargo": cargo, "equipment": equip, "workers": wc}
+LEVELS  = {"off": OFF, "summary": SUMMARY, "detail": DETAIL}
+
+
+def _timed_run(module, freq_path: str, sev_path: str, out_path: str, level: int,
+               repeat: int) -> tuple[float, pd.DataFrame]:
+    best, merged = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            merged = module.run_pipeline(freq_path, sev_path, out_path, profile=False,
+                                         cache=False, input_cache=False, diagnostics=level)
+        best = min(best, time.perf_counter() - t0)
+    return best, merged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", nargs="+", default=list(MODULES), choices=list(MODULES))
+    parser.add_argument("--scale", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'line':<10} {'rows':>10}  " + "  ".join(f"{name + ' (s)':>12}" for name in LEVELS)
+          + f"  {'detail cost':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for line in args.lines:
+            module = MODULES[line]
+            freq_path, sev_path, n_freq, n_sev = write_line(line, args.scale, tmp, args.seed)
+            out_path = os.path.join(tmp, f"{line}_claims_merged.csv")
+
+            times, frames = {}, {}
+            for name, level in LEVELS.items():
+                times[name], frames[name] = _timed_run(module, freq_path, sev_path, out_path,
+                                                       level, args.repeat)
+            for name in LEVELS:
+                pd.testing.assert_frame_equal(frames[name], frames["off"])
+
+            print(f"{line:<10} {n_freq + n_sev:>10,}  "
+                  + "  ".join(f"{times[name]:>12.3f}" for name in LEVELS)
+                  + f"  {times['detail'] / times['off'] - 1:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
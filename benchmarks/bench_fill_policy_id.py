@@ -0,0 +1,94 @@
+"""
+Benchmark – workers comp fill_freq_policy_id
+============================================
+Compares the vectorised fill_freq_policy_id in clean_workers_comp against the
+original per-gap loop (`pid[:i].dropna()` per NaN row, i.e. quadratic) on
+synthetic policy_id columns with runs of consecutive gaps, and asserts that
+both fill identical IDs. The per-row time of the vectorised version should
+stay flat as the row count grows.
+
+Run from the repository root:
+    python -m benchmarks.bench_fill_policy_id
+    python -m benchmarks.bench_fill_policy_id --sizes 10000 100000 1000000 --gap-rate 0.2
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_clean import clean_workers_comp as wc
+
+
+# ── Reference implementation (pre-vectorisation loop) ────────────────────────
+
+def _legacy_fill_freq_policy_id(freq: pd.DataFrame) -> pd.DataFrame:
+    """The original loop, kept for comparison only."""
+    pid = freq['policy_id'].copy()
+    for i in pid[pid.isna()].index:
+        prev = pid[:i].dropna()
+        if prev.empty:
+            raise ValueError("No prior policy_id found before first NaN row.")
+        pid.at[i] = wc._increment_policy_id(prev.iloc[-1])
+    freq['policy_id'] = pid
+    return freq
+
+
+# ── Synthetic freq ───────────────────────────────────────────────────────────
+
+def make_freq(n_rows: int, gap_rate: float, seed: int = 0) -> pd.DataFrame:
+    """
+    WC-style IDs (two prefixes, 5-digit suffixes, some crossing 99999 so the
+    padding width changes) with ~gap_rate of rows blanked in runs of 1-5.
+    The first row is always known.
+    """
+    rng = np.random.default_rng(seed)
+    prefix = np.where(np.arange(n_rows) < n_rows // 2, 'WC-EPS-', 'WC-ZET-')
+    number = np.arange(n_rows) % 120_000 + 1
+    pid = pd.Series([f"{p}{n:05d}" for p, n in zip(prefix, number)], dtype=object)
+
+    starts = np.flatnonzero(rng.random(n_rows) < gap_rate / 3)
+    for s, k in zip(starts, rng.integers(1, 6, starts.size)):
+        pid.iloc[max(s, 1):s + k] = np.nan
+    return pd.DataFrame({'policy_id': pid})
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+
+def _timed(fn, freq: pd.DataFrame) -> tuple[float, pd.DataFrame]:
+    freq = freq.copy()
+    t0 = time.perf_counter()
+    out = fn(freq)
+    return time.perf_counter() - t0, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--gap-rate", type=float, default=0.1,
+                        help="approximate share of rows with a missing policy_id")
+    parser.add_argument("--legacy-max", type=int, default=20_000,
+                        help="largest row count the legacy loop is run on (it is quadratic)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'gaps':>8}  {'vectorised (s)':>15}  {'µs/row':>7}  "
+          f"{'legacy (s)':>11}  {'speedup':>8}")
+    for n in args.sizes:
+        freq = make_freq(n, args.gap_rate)
+        n_gaps = int(freq['policy_id'].isna().sum())
+        new_t, new = _timed(wc.fill_freq_policy_id, freq)
+        per_row = new_t / n * 1e6
+
+        if n <= args.legacy_max:
+            old_t, old = _timed(_legacy_fill_freq_policy_id, freq)
+            pd.testing.assert_series_equal(new['policy_id'], old['policy_id'], check_dtype=False)
+            print(f"{n:>10,}  {n_gaps:>8,}  {new_t:>15.4f}  {per_row:>7.2f}  "
+                  f"{old_t:>11.3f}  {old_t / new_t:>7.0f}x")
+        else:
+            print(f"{n:>10,}  {n_gaps:>8,}  {new_t:>15.4f}  {per_row:>7.2f}  "
+                  f"{'skipped':>11}  {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark – Arrow IPC input cache
+=================================
+load_data time per line on synthetic inputs (benchmarks/generators.py):
+parsing the CSVs, the first cached run (parse + write .<name>.arrow), a warm
+run memory-mapping the Arrow copies, and a run after `touch` (mtime changed,
+so the sources are hashed once). Every cached load must equal the parse.
+
+Run from the repository root:
+    python -m benchmarks.bench_input_cache
+    python -m benchmarks.bench_input_cache --lines cargo --scale 10
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generators import write_line
+from data_clean import clean_business_data as bi
+from data_clean import clean_cargo_data as cargo
+from data_clean import clean_equipment_data as equip
+from data_clean import clean_workers_comp as wc
+
+MODULES = {"business": bi, "cargo": cargo, "equipment": equip, "workers": wc}
+
+
+def _timed_load(module, freq_path: str, sev_path: str, input_cache: bool):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames = module.load_data(freq_path, sev_path, input_cache=input_cache)
+    return time.perf_counter() - t0, frames
+
+
+def _assert_same(got, expected) -> None:
+    for a, b in zip(got, expected):
+        pd.testing.assert_frame_equal(a, b)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", nargs="+", default=list(MODULES), choices=list(MODULES))
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'line':<10} {'rows':>10}  {'parse (s)':>9}  {'cold (s)':>8}  {'warm (s)':>8}  "
+          f"{'touched (s)':>11}  {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for line in args.lines:
+            module = MODULES[line]
+            freq_path, sev_path, n_freq, n_sev = write_line(line, args.scale, tmp, args.seed)
+
+            parse_t, parsed = _timed_load(module, freq_path, sev_path, False)
+            cold_t,  cold   = _timed_load(module, freq_path, sev_path, True)
+            warm_t,  warm   = _timed_load(module, freq_path, sev_path, True)
+            for path in (freq_path, sev_path):
+                os.utime(path)
+            touch_t, touched = _timed_load(module, freq_path, sev_path, True)
+            for frames in (cold, warm, touched):
+                _assert_same(frames, parsed)
+
+            print(f"{line:<10} {n_freq + n_sev:>10,}  {parse_t:>9.3f}  {cold_t:>8.3f}  {warm_t:>8.3f}  "
+                  f"{touch_t:>11.3f}  {parse_t / warm_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark – integer-encoded ID keys
+===================================
+run_pipeline per line on synthetic inputs (benchmarks/generators.py), once
+with the ID columns encoded to integer codes (key_codes.py, the default) and
+once kept as strings (encode_ids swapped for a pass-through). Reported per
+mode: the aggregate + merge steps, every step from the encode point through
+the merge (the ones keyed on IDs, encode itself included), and the whole run.
+Both modes must produce the same merged frame.
+
+Run from the repository root:
+    python -m benchmarks.bench_key_encoding
+    python -m benchmarks.bench_key_encoding --lines cargo --scale 10
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generators import write_line
+from data_clean import clean_business_data as bi
+from data_clean import clean_cargo_data as cargo
+from data_clean import clean_equipment_data as equip
+from data_clean import clean_workers_comp as wc
+from data_clean.profiling import StepProfiler
+
+MODULES = {"business": bi, "cargo": cargo, "equipment": equip, "workers": wc}
+
+
+def _string_keys(freq: pd.DataFrame, sev: pd.DataFrame):
+    """encode_ids stand-in: leave the IDs as strings, no codebook."""
+    return freq, sev, None
+
+
+@contextlib.contextmanager
+def _without_encoding(module):
+    encode_ids = module.encode_ids
+    module.encode_ids = _string_keys
+    try:
+        yield
+    finally:
+        module.encode_ids = encode_ids
+
+
+def _timed_run(module, freq_path: str, sev_path: str, out_path: str, repeat: int
+               ) -> tuple[dict[str, float], pd.DataFrame]:
+    """Best-of-`repeat` seconds for (merge, keyed, total) and the merged frame."""
+    best, merged = {"merge": float("inf"), "keyed": float("inf"), "total": float("inf")}, None
+    for _ in range(repeat):
+        prof = StepProfiler(trace_memory=False)
+        t0   = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            merged = module.run_pipeline(freq_path, sev_path, out_path, profile=prof,
+                                         cache=False, input_cache=False, diagnostics=0)
+        total = time.perf_counter() - t0
+
+        steps  = [(r["step"], r["wall_s"]) for r in prof.records]
+        start  = next(i for i, (name, _) in enumerate(steps) if "encode" in name)
+        end    = max(i for i, (name, _) in enumerate(steps) if "merge" in name)
+        times  = {"merge": sum(s for name, s in steps if "aggregate" in name or "merge" in name),
+                  "keyed": sum(s for _, s in steps[start:end + 1]),
+                  "total": total}
+        best = {k: min(best[k], v) for k, v in times.items()}
+    return best, merged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", nargs="+", default=list(MODULES), choices=list(MODULES))
+    parser.add_argument("--scale", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'line':<10} {'rows':>10}  {'':>8}  {'agg+merge (s)':>13}  {'keyed steps (s)':>15}  "
+          f"{'total (s)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for line in args.lines:
+            module = MODULES[line]
+            freq_path, sev_path, n_freq, n_sev = write_line(line, args.scale, tmp, args.seed)
+            out_path = os.path.join(tmp, f"{line}_claims_merged.csv")
+
+            with _without_encoding(module):
+                strings, expected = _timed_run(module, freq_path, sev_path, out_path, args.repeat)
+            codes, merged = _timed_run(module, freq_path, sev_path, out_path, args.repeat)
+            pd.testing.assert_frame_equal(merged, expected)
+
+            for label, times in (("strings", strings), ("codes", codes)):
+                print(f"{line:<10} {n_freq + n_sev:>10,}  {label:>8}  {times['merge']:>13.3f}  "
+                      f"{times['keyed']:>15.3f}  {times['total']:>9.3f}")
+            print(f"{'':<10} {'':>10}  {'speedup':>8}  "
+                  + "  ".join(f"{strings[k] / codes[k]:>{w - 1}.2f}x"
+                              for k, w in (("merge", 13), ("keyed", 15), ("total", 9))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark – out-of-core (partitioned) runs
+==========================================
+Each line on synthetic inputs (benchmarks/generators.py), end to end:
+
+  batch        run_pipeline, both frames whole in memory
+  partitioned  run_pipeline_partitioned with N hash partitions (see
+               partitioned.py), inputs read --chunksize rows at a time
+
+Time and tracemalloc peak (Python-side allocations, numpy buffers included)
+for each; peak memory of a partitioned run should fall roughly as 1/N while
+the time grows by the spilling. Every partitioned output file must be
+byte-identical to the batch one (see also check_partitioned.py).
+
+Run from the repository root:
+    python -m benchmarks.bench_partitioned
+    python -m benchmarks.bench_partitioned --lines cargo --scale 50 --partitions 1 4 16
+"""
+
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generators import write_line
+from data_clean import clean_business_data as bi
+from data_clean import clean_cargo_data as cargo
+from data_clean import clean_equipment_data as equip
+from data_clean import clean_workers_comp as wc
+
+MODULES = {"business": bi, "cargo": cargo, "equipment": equip, "workers": wc}
+
+
+def _measure(fn) -> tuple[float, float, object]:
+    """(seconds, tracemalloc peak in MB, result) of fn()."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = fn()
+    seconds = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    tracemalloc.stop()
+    return seconds, peak, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", nargs="+", default=list(MODULES), choices=list(MODULES))
+    parser.add_argument("--scale", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--partitions", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"{'line':<10} {'rows':>9}  {'mode':<16} {'time (s)':>9}  {'peak (MB)':>9}  {'vs batch':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for line in args.lines:
+            module = MODULES[line]
+            freq_path, sev_path, n_freq, n_sev = write_line(line, args.scale, tmp, args.seed)
+            batch_path = os.path.join(tmp, f"{line}_batch.csv")
+            batch_t, batch_mb, _ = _measure(lambda: module.run_pipeline(
+                freq_path, sev_path, batch_path, profile=False, cache=False, input_cache=False))
+            print(f"{line:<10} {n_freq + n_sev:>9,}  {'batch':<16} {batch_t:>9.2f}  "
+                  f"{batch_mb:>9.1f}  {'':>8}")
+
+            for n in args.partitions:
+                part_path = os.path.join(tmp, f"{line}_partitioned.csv")
+                part_t, part_mb, saved = _measure(lambda: module.run_pipeline_partitioned(
+                    freq_path, sev_path, part_path, partitions=n, chunksize=args.chunksize,
+                    profile=False, work_dir=tmp))
+                assert filecmp.cmp(saved.path, batch_path, shallow=False), \
+                    f"{line}: {n} partitions differ from run_pipeline"
+                print(f"{line:<10} {'':>9}  {f'{n} partitions':<16} {part_t:>9.2f}  "
+                      f"{part_mb:>9.1f}  {part_mb / batch_mb:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
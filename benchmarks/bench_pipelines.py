@@ -0,0 +1,144 @@
+"""
+Benchmark – end-to-end pipeline scaling
+=======================================
+Generates synthetic messy inputs for each line (benchmarks/generators.py) at
+1×, 10×, 100× and 1000× the current row counts, runs each line's
+run_pipeline in a fresh process and records wall time, peak RSS and rows/s.
+
+Every invocation appends one run record (timestamp, git commit, versions,
+settings, per line/scale results) to a JSON results file, so changes can be
+compared over time.
+
+Run from the repository root:
+    python -m benchmarks.bench_pipelines
+    python -m benchmarks.bench_pipelines --lines cargo,equipment --scales 1 10 --chunksize 100000
+"""
+
+import argparse
+import contextlib
+import datetime
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generators import BASE_ROWS, write_line
+from data_clean.orchestrate import LINE_MODULES
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not recorded
+    resource = None
+
+DEFAULT_RESULTS = os.path.join("benchmarks", "results", "pipelines.json")
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB elsewhere
+
+
+def _measure(line: str, freq_path: str, sev_path: str, output_path: str,
+             chunksize: int | None) -> dict:
+    """Child-process body: one pipeline run, prints discarded."""
+    module = importlib.import_module(LINE_MODULES[line])
+    t0 = time.perf_counter()
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        merged = module.run_pipeline(freq_path, sev_path, output_path, chunksize=chunksize)
+    return {
+        "seconds":     time.perf_counter() - t0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "output_rows": len(merged),
+    }
+
+
+def run_one(line: str, scale: float, data_dir: str, chunksize: int | None = None,
+            seed: int = 0) -> dict:
+    """Generate inputs for (line, scale) and time run_pipeline in a fresh process."""
+    freq_path, sev_path, n_freq, n_sev = write_line(line, scale, data_dir, seed)
+    output_path = os.path.join(data_dir, f"{line}_claims_merged.csv")
+
+    # A fresh (spawned) process per run so peak RSS is that run's alone
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        stats = pool.submit(_measure, line, freq_path, sev_path, output_path, chunksize).result()
+
+    return {
+        "line":      line,
+        "scale":     scale,
+        "freq_rows": n_freq,
+        "sev_rows":  n_sev,
+        **stats,
+        "rows_per_s": (n_freq + n_sev) / stats["seconds"],
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def append_results(path: str, record: dict) -> None:
+    """Append one run record to the JSON results file (a list of runs)."""
+    runs = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            runs = json.load(fh)
+    runs.append(record)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(runs, fh, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", default=",".join(BASE_ROWS))
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="run the streaming mode with this sev chunk size")
+    parser.add_argument("--data-dir", default=None,
+                        help="where to write synthetic inputs (default: a temp dir per run)")
+    parser.add_argument("--results", default=DEFAULT_RESULTS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        for line in args.lines.split(","):
+            with tempfile.TemporaryDirectory() as tmp:
+                data_dir = args.data_dir or tmp
+                r = run_one(line, scale, data_dir, args.chunksize, args.seed)
+            results.append(r)
+            rss = f"{r['peak_rss_mb']:,.0f} MB" if r["peak_rss_mb"] is not None else "n/a"
+            print(f"{line:<10} {scale:>6g}x  {r['freq_rows'] + r['sev_rows']:>12,} rows  "
+                  f"{r['seconds']:>9.2f}s  {rss:>10}  {r['rows_per_s']:>12,.0f} rows/s")
+
+    append_results(args.results, {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit":    _git_commit(),
+        "python":    platform.python_version(),
+        "pandas":    pd.__version__,
+        "numpy":     np.__version__,
+        "chunksize": args.chunksize,
+        "results":   results,
+    })
+    print(f"\nAppended to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Benchmark – shared PolicyIndex for the by-ID lookups
+====================================================
+The cross-imputation and criteria steps (cargo / equipment 12-13, workers
+comp 10-11) on synthetic inputs (benchmarks/generators.py), taken at the
+point run_pipeline reaches them: once through a PolicyIndex built for both
+steps (build time included) and once with the original per-column
+groupby().first() / drop_duplicates().set_index() lookups. Asserts both give
+identical frames.
+
+Run from the repository root:
+    python -m benchmarks.bench_policy_index
+    python -m benchmarks.bench_policy_index --lines cargo --scale 10
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generators import write_line
+from data_clean import clean_cargo_data as cargo
+from data_clean import clean_equipment_data as equip
+from data_clean import clean_workers_comp as wc
+from data_clean.policy_index import PolicyIndex
+from data_clean.profiling import StepProfiler
+from data_clean.rules import RuleSet
+
+MODULES = {"cargo": cargo, "equipment": equip, "workers": wc}
+FIRST_STEP = {"cargo": "12 cross-impute by policy", "equipment": "12 cross-impute by policy",
+              "workers": "cross_impute_by_worker_id"}
+
+
+# ── Reference implementations (one lookup per column and direction) ──────────
+
+def _legacy_impute_by_policy(target: pd.DataFrame, source: pd.DataFrame,
+                             cols: list[str]) -> pd.DataFrame:
+    target = target.copy()
+    src_lookup = source.dropna(subset=["policy_id"]).groupby("policy_id")[cols].first()
+    for col in cols:
+        if col not in target.columns or col not in src_lookup.columns:
+            continue
+        mask = target[col].isna() & target["policy_id"].notna()
+        if mask.any():
+            target.loc[mask, col] = (target.loc[mask, "policy_id"].map(src_lookup[col])
+                                     .combine_first(target.loc[mask, col]))
+    return target
+
+
+def _legacy_overwrite_col_by_policy(target: pd.DataFrame, source: pd.DataFrame, col: str,
+                                    source_ok_mask: pd.Series,
+                                    target_bad_mask: pd.Series) -> pd.DataFrame:
+    rows_to_fix = target_bad_mask & target["policy_id"].notna()
+    if not rows_to_fix.any():
+        return target
+    good_source = source.loc[source_ok_mask & source["policy_id"].notna()].copy()
+    src_lookup  = good_source.groupby("policy_id")[col].first()
+    target = target.copy()
+    target.loc[rows_to_fix, col] = (target.loc[rows_to_fix, "policy_id"].map(src_lookup)
+                                    .combine_first(target.loc[rows_to_fix, col]))
+    return target
+
+
+def _legacy_policy_steps(module, freq: pd.DataFrame, sev: pd.DataFrame):
+    """Cargo / equipment steps 12-13 as before PolicyIndex, kept for comparison only."""
+    shared_cols = [c for c in freq.columns if c in sev.columns and c != "policy_id"]
+    freq = _legacy_impute_by_policy(freq, sev,  shared_cols)
+    sev  = _legacy_impute_by_policy(sev,  freq, shared_cols)
+    rules   = RuleSet(module.CRITERIA)
+    freq_ok = rules.validity(freq)
+    sev_ok  = rules.validity(sev)
+    for col in module.CRITERIA:
+        if col not in freq.columns or col not in sev.columns:
+            continue
+        freq = _legacy_overwrite_col_by_policy(freq, sev,  col, sev_ok[col],  ~freq_ok[col])
+        sev  = _legacy_overwrite_col_by_policy(sev,  freq, col, freq_ok[col], ~sev_ok[col])
+    return freq, sev
+
+
+def _legacy_worker_steps(freq: pd.DataFrame, sev: pd.DataFrame):
+    """Workers comp steps 10-11 as before PolicyIndex, kept for comparison only."""
+    def first_by_worker(df: pd.DataFrame, col: str) -> pd.Series:
+        return (df.dropna(subset=["worker_id", col]).drop_duplicates("worker_id")
+                  .set_index("worker_id")[col])
+
+    for col in [c for c in wc._SHARED_COLS if c in sev.columns and c in freq.columns]:
+        sev_map, freq_map = first_by_worker(sev, col), first_by_worker(freq, col)
+        mask_s = sev["worker_id"].notna() & sev[col].isna()
+        sev.loc[mask_s, col] = sev.loc[mask_s, "worker_id"].map(freq_map)
+        mask_f = freq["worker_id"].notna() & freq[col].isna()
+        freq.loc[mask_f, col] = freq.loc[mask_f, "worker_id"].map(sev_map)
+
+    shared  = [c for c in wc._CRITERIA if c in sev.columns and c in freq.columns]
+    rules   = RuleSet({col: wc._CRITERIA[col] for col in shared})
+    sev_ok, freq_ok = rules.validity(sev), rules.validity(freq)
+    for col in shared:
+        sev_valid  = first_by_worker(sev.loc[sev_ok[col]], col)
+        freq_valid = first_by_worker(freq.loc[freq_ok[col]], col)
+        sev_bad = ~sev_ok[col] & sev["worker_id"].notna()
+        sev.loc[sev_bad, col] = sev.loc[sev_bad, "worker_id"].map(freq_valid)
+        freq_bad = ~freq_ok[col] & freq["worker_id"].notna()
+        freq.loc[freq_bad, col] = freq.loc[freq_bad, "worker_id"].map(sev_valid)
+    return freq, sev
+
+
+# ── The same steps through one PolicyIndex ───────────────────────────────────
+
+def _indexed_steps(line: str, freq: pd.DataFrame, sev: pd.DataFrame):
+    module = MODULES[line]
+    if line == "workers":
+        index = PolicyIndex(freq, sev, key="worker_id")
+        sev, freq = module.cross_impute_by_worker_id(sev, freq, index)
+        sev, freq = module.cross_validate_by_worker_id(sev, freq, index)
+        return freq, sev
+    index = PolicyIndex(freq, sev)
+    freq, sev = module.cross_impute_by_policy(freq, sev, index)
+    return module.run_criteria_checker(freq, sev, index)
+
+
+class _Capture(StepProfiler):
+    """Keeps copies of the two frames a pipeline hands to `step`."""
+
+    def __init__(self, step: str):
+        super().__init__(enabled=False)
+        self.step, self.frames = step, None
+
+    def run(self, name, fn, *args, **kwargs):
+        if name == self.step:
+            self.frames = tuple(df.copy() for df in args[:2])
+        return super().run(name, fn, *args, **kwargs)
+
+
+def _frames_at_step(line: str, freq_path: str, sev_path: str, out_path: str):
+    capture = _Capture(FIRST_STEP[line])
+    with contextlib.redirect_stdout(io.StringIO()):
+        MODULES[line].run_pipeline(freq_path, sev_path, out_path, profile=capture,
+                                   cache=False, input_cache=False, diagnostics=0)
+    first, second = capture.frames
+    return (second, first) if line == "workers" else (first, second)   # workers passes (sev, freq)
+
+
+def _best_of(fn, frames, repeat: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        freq, sev = (df.copy() for df in frames)
+        t0 = time.perf_counter()
+        out = fn(freq, sev)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", nargs="+", default=list(MODULES), choices=list(MODULES))
+    parser.add_argument("--scale", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'line':<10} {'rows':>10}  {'index (s)':>9}  {'groupby (s)':>11}  {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for line in args.lines:
+            freq_path, sev_path, n_freq, n_sev = write_line(line, args.scale, tmp, args.seed)
+            frames = _frames_at_step(line, freq_path, sev_path,
+                                     os.path.join(tmp, f"{line}_claims_merged.csv"))
+            legacy = (_legacy_worker_steps if line == "workers" else
+                      lambda f, s: _legacy_policy_steps(MODULES[line], f, s))
+
+            new_t, (new_f, new_s) = _best_of(lambda f, s: _indexed_steps(line, f, s), frames,
+                                             args.repeat)
+            old_t, (old_f, old_s) = _best_of(legacy, frames, args.repeat)
+            pd.testing.assert_frame_equal(new_f, old_f)
+            pd.testing.assert_frame_equal(new_s, old_s)
+            print(f"{line:<10} {n_freq + n_sev:>10,}  {new_t:>9.3f}  {old_t:>11.3f}  "
+                  f"{old_t / new_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
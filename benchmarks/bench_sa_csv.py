@@ -0,0 +1,89 @@
+"""
+Benchmark – typed South-African CSV reader
+==========================================
+Throughput (rows/s) of data_clean.sa_csv.read_sa_csv against the original
+per-cell lambda reader, on messy_data/cargo_claims_sev.csv replicated to
+the requested scale factors. Both readers must return the same values.
+
+Run from the repository root:
+    python -m benchmarks.bench_sa_csv
+    python -m benchmarks.bench_sa_csv --scales 1 10 50
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from data_clean import clean_cargo_data as cargo
+from data_clean.sa_csv import pa_csv, read_sa_csv
+
+SEV_PATH = os.path.join("messy_data", "cargo_claims_sev.csv")
+
+
+def _legacy_read_sa_csv(path: str, **kwargs) -> pd.DataFrame:
+    """The original reader: C engine, then a Python lambda on every object cell."""
+    return (
+        pd.read_csv(path, sep=";", decimal=",", **kwargs)
+        .pipe(lambda df: df.apply(
+            lambda col: col.map(lambda x: str(x).replace(",", ".") if isinstance(x, str) else x)
+            if col.dtype == object else col
+        ))
+    )
+
+
+def _replicate(src: str, scale: int, dst: str) -> int:
+    """Write `scale` copies of src's body under one header; return the row count."""
+    with open(src, encoding="utf-8") as fh:
+        header, *body = fh.read().splitlines(keepends=True)
+    if body and not body[-1].endswith("\n"):
+        body[-1] += "\n"
+    with open(dst, "w", encoding="utf-8") as fh:
+        fh.write(header)
+        for _ in range(scale):
+            fh.writelines(body)
+    return len(body) * scale
+
+
+def _rows_per_s(fn, path: str, n_rows: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - t0)
+    return n_rows / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    readers = {
+        "legacy":    lambda p: _legacy_read_sa_csv(p, names=cargo.SEV_COLS, header=0),
+        "typed (c)": lambda p: read_sa_csv(p, cargo.SEV_SCHEMA, engine="c"),
+    }
+    if pa_csv is not None:
+        readers["typed (pyarrow)"] = lambda p: read_sa_csv(p, cargo.SEV_SCHEMA, engine="pyarrow")
+
+    # Same values from every reader on the real file (the typed readers skip claim_id / claim_seq)
+    reference = readers["legacy"](SEV_PATH)
+    for name, fn in readers.items():
+        typed = fn(SEV_PATH)
+        pd.testing.assert_frame_equal(typed, reference[typed.columns], check_dtype=False)
+
+    print(f"{'scale':>6}  {'rows':>11}  " + "  ".join(f"{name + ' rows/s':>22}" for name in readers))
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path   = os.path.join(tmp, f"cargo_sev_x{scale}.csv")
+            n_rows = _replicate(SEV_PATH, scale, path)
+            rates  = [_rows_per_s(fn, path, n_rows, args.repeat) for fn in readers.values()]
+            print(f"{scale:>5}x  {n_rows:>11,}  " + "  ".join(f"{r:>22,.0f}" for r in rates))
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
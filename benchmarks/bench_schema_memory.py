@@ -0,0 +1,82 @@
+"""
+Benchmark – schema-driven parsing memory
+========================================
+Memory of each line's loaded freq + sev frames with the schemas as they are
+(claim_id / claim_seq skipped at parse time, "score" columns downcast) against
+the previous layout (every column read, scores left as int64 / float64).
+Both must hold the same values in the columns they share. Inputs are
+synthetic (benchmarks/generators.py) unless --data-dir is given.
+
+Run from the repository root:
+    python -m benchmarks.bench_schema_memory
+    python -m benchmarks.bench_schema_memory --scale 10
+    python -m benchmarks.bench_schema_memory --data-dir /tmp/synthetic
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+from benchmarks.generators import write_line
+from data_clean import clean_business_data as bi
+from data_clean import clean_cargo_data as cargo
+from data_clean import clean_equipment_data as equip
+from data_clean import clean_workers_comp as wc
+from data_clean.sa_csv import SKIP, read_sa_csv
+
+MODULES = {"business": bi, "cargo": cargo, "equipment": equip, "workers": wc}
+
+# claim_seq used to be read as a score everywhere but workers comp
+_LEGACY_SKIPPED = {"claim_id": "str", "claim_seq": "score"}
+
+
+def _legacy_schema(line: str, schema: dict[str, str]) -> dict[str, str]:
+    """The schema before skip / downcast: skipped columns read, scores kept wide ("float")."""
+    skipped = dict(_LEGACY_SKIPPED, claim_seq="str") if line == "workers" else _LEGACY_SKIPPED
+    return {col: skipped[col] if kind == SKIP else "float" if kind == "score" else kind
+            for col, kind in schema.items()}
+
+
+def _mb(*frames: pd.DataFrame) -> float:
+    return sum(df.memory_usage(deep=True).sum() for df in frames) / 1e6
+
+
+def _report(line: str, freq_path: str, sev_path: str) -> None:
+    module = MODULES[line]
+    with contextlib.redirect_stdout(io.StringIO()):
+        freq, sev = module.load_data(freq_path, sev_path)
+    old_freq = read_sa_csv(freq_path, _legacy_schema(line, module.FREQ_SCHEMA))
+    old_sev  = read_sa_csv(sev_path,  _legacy_schema(line, module.SEV_SCHEMA))
+    pd.testing.assert_frame_equal(freq, old_freq, check_dtype=False)
+    pd.testing.assert_frame_equal(sev, old_sev[sev.columns], check_dtype=False)
+
+    before, after = _mb(old_freq, old_sev), _mb(freq, sev)
+    print(f"{line:<10} {len(freq) + len(sev):>10,}  {before:>11.2f}  {after:>10.2f}  "
+          f"{before - after:>10.2f}  {(before - after) / before:>6.0%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", nargs="+", default=list(MODULES), choices=list(MODULES))
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="directory with <line>_claims_freq.csv / _sev.csv")
+    args = parser.parse_args()
+
+    print(f"{'line':<10} {'rows':>10}  {'before (MB)':>11}  {'after (MB)':>10}  {'saved (MB)':>10}  {'saved':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for line in args.lines:
+            if args.data_dir:
+                paths = (os.path.join(args.data_dir, f"{line}_claims_freq.csv"),
+                         os.path.join(args.data_dir, f"{line}_claims_sev.csv"))
+            else:
+                paths = write_line(line, args.scale, tmp, args.seed)[:2]
+            _report(line, *paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark – mergeable median sketches
+=====================================
+The median of a numeric column split into pieces (as the partitions of an
+out-of-core run), three ways:
+
+  whole       Series.median over the concatenated column (needs it all in memory)
+  exact       MedianSketch per piece, merged: value counts (sketches.py)
+  sketch      the same with exact_limit=0, so a KLL sketch with rank error --error
+
+Each median must equal the whole column's (exact) or lie within the error
+bound in rank (sketch); the sizes are what each keeps between pieces.
+
+Run from the repository root:
+    python -m benchmarks.bench_sketches
+    python -m benchmarks.bench_sketches --rows 20000000 --pieces 64 --error 0.0001
+"""
+
+import argparse
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_clean.sketches import MedianSketch
+
+
+def _merged(pieces: list[pd.Series], **options) -> tuple[float, MedianSketch]:
+    t0 = time.perf_counter()
+    sketch = MedianSketch(**options)
+    for piece in pieces:
+        sketch.merge(MedianSketch(**options).update(piece))
+    return time.perf_counter() - t0, sketch
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--pieces", type=int, default=16)
+    parser.add_argument("--error", type=float, default=0.001)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    columns = {
+        "float64 (continuous)": pd.Series(rng.lognormal(10, 1, args.rows)),
+        "int64 (1,000 values)": pd.Series(rng.integers(0, 1_000, args.rows)),
+    }
+    bounds = np.linspace(0, args.rows, args.pieces + 1).astype(int)
+
+    print(f"{'column':<22} {'mode':<8} {'time (s)':>9}  {'kept (KB)':>10}  {'rank error':>10}")
+    for name, column in columns.items():
+        pieces = [column.iloc[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        t0 = time.perf_counter()
+        expected = column.median()
+        print(f"{name:<22} {'whole':<8} {time.perf_counter() - t0:>9.3f}  "
+              f"{column.memory_usage(index=False) / 1024:>10,.0f}  {'':>10}")
+
+        for mode, options in [("exact", {"error": 0}), ("sketch", {"error": args.error,
+                                                                   "exact_limit": 0})]:
+            seconds, sketch = _merged(pieces, **options)
+            median = sketch.median()
+            rank = abs((column < median).mean() - (column < expected).mean())
+            if mode == "exact":
+                assert median == expected, (median, expected)
+            else:
+                assert rank <= args.error, (rank, args.error)
+            print(f"{'':<22} {mode:<8} {seconds:>9.3f}  {len(pickle.dumps(sketch)) / 1024:>10,.0f}  "
+                  f"{rank:>10.5f}")
+
+
+if __name__ == "__main__":
+    main()
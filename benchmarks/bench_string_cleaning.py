@@ -0,0 +1,75 @@
+"""
+Benchmark – dedupe-then-map string cleaning
+===========================================
+Throughput (rows/s) of cargo _clean_string_columns (strip + _???#### suffix
+removal once per distinct value, via categoricals.map_unique; str pattern so
+ID columns run in Arrow's regex kernel) against the original per-cell .str
+chain with a compiled pattern, on messy_data/cargo_claims_sev.csv replicated
+to the requested scale factors. Both must return identical frames.
+
+Run from the repository root:
+    python -m benchmarks.bench_string_cleaning
+    python -m benchmarks.bench_string_cleaning --scales 1 10 100 --repeat 3
+"""
+
+import argparse
+import os
+import re
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_sa_csv import SEV_PATH, _replicate
+from data_clean import clean_cargo_data as cargo
+from data_clean.sa_csv import read_sa_csv
+
+
+# ── Reference implementation (every cell through the regex) ──────────────────
+
+_LEGACY_SUFFIX = re.compile(cargo.SUFFIX_PATTERN)   # originally a compiled pattern
+
+
+def _legacy_clean_string_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """The original per-cell cleaning, kept for comparison only."""
+    obj_cols = df.select_dtypes(include=["object", "str"]).columns
+    df = df.copy()
+    df[obj_cols] = df[obj_cols].apply(lambda col: col.str.strip())
+    df[obj_cols] = df[obj_cols].apply(
+        lambda col: col.str.replace(_LEGACY_SUFFIX, "", regex=True)
+    )
+    return df
+
+
+def _best_of(fn, df: pd.DataFrame, repeat: int) -> tuple[float, pd.DataFrame]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'scale':>6}  {'rows':>11}  {'legacy rows/s':>14}  {'map_unique rows/s':>18}  {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path   = os.path.join(tmp, f"cargo_sev_x{scale}.csv")
+            n_rows = _replicate(SEV_PATH, scale, path)
+            sev    = read_sa_csv(path, cargo.SEV_SCHEMA)
+            os.remove(path)
+
+            old_t, old = _best_of(_legacy_clean_string_columns, sev, args.repeat)
+            new_t, new = _best_of(cargo._clean_string_columns, sev, args.repeat)
+            pd.testing.assert_frame_equal(new, old)
+            print(f"{scale:>5}x  {n_rows:>11,}  {n_rows / old_t:>14,.0f}  {n_rows / new_t:>18,.0f}  "
+                  f"{old_t / new_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark – business validity_checker
+=====================================
+Compares the grouped/join-based validity_checker in clean_business_data
+against the original per-policy loop on synthetic, already-cleaned freq/sev
+frames, and asserts that both produce identical output.
+
+Run from the repository root:
+    python -m benchmarks.bench_validity_checker
+    python -m benchmarks.bench_validity_checker --sizes 10000 100000 1000000 --legacy-max 100000
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_clean import clean_business_data as bi
+
+
+# ── Reference implementation (pre-vectorisation loop) ────────────────────────
+
+def _legacy_is_valid(series: pd.Series, col: str) -> pd.Series:
+    """The original per-column criteria chain (now business RULES)."""
+    if col in ("station_id", "solar_system"):
+        return series.notna()
+    if col in ("production_load", "exposure"):
+        return pd.to_numeric(series, errors="coerce").between(0, 1)
+    if col in ("energy_backup_score", "safety_compliance"):
+        return pd.to_numeric(series, errors="coerce").isin([1, 2, 3, 4, 5])
+    return pd.Series(True, index=series.index)
+
+
+def _legacy_validity_checker(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """The original O(policies × rows × columns) loop, kept for comparison only."""
+    freq = freq.copy()
+    sev  = sev.copy()
+
+    checker_cols = ["station_id", "solar_system", "production_load",
+                    "energy_backup_score", "safety_compliance", "exposure"]
+
+    conflicts = []
+
+    for col in checker_cols:
+        if col not in freq.columns or col not in sev.columns:
+            continue
+
+        freq_valid_map = freq.set_index("policy_id")[col]
+
+        all_pids = sev["policy_id"].dropna().unique()
+        for pid in all_pids:
+            if pid not in freq_valid_map.index:
+                continue
+
+            f_val = freq.loc[freq["policy_id"] == pid, col]
+            s_val = sev.loc[sev["policy_id"]  == pid, col]
+            f_ok  = _legacy_is_valid(f_val, col).all()
+            s_ok  = _legacy_is_valid(s_val, col).all()
+
+            if f_ok and s_ok:
+                pass
+            elif s_ok and not f_ok:
+                representative = s_val.mode()
+                if not representative.empty:
+                    freq.loc[freq["policy_id"] == pid, col] = representative.iloc[0]
+            elif f_ok and not s_ok:
+                representative = f_val.mode()
+                if not representative.empty:
+                    sev.loc[sev["policy_id"] == pid, col] = representative.iloc[0]
+            else:
+                conflicts.append({"policy_id": pid, "column": col,
+                                  "freq_value": f_val.values.tolist(),
+                                  "sev_value":  s_val.values.tolist()})
+
+    if conflicts:
+        print("=== Validity conflicts – resolve by hand ===")
+        print(pd.DataFrame(conflicts).to_string(index=False))
+    else:
+        print("No validity conflicts detected.")
+
+    return freq, sev
+
+
+# ── Synthetic cleaned inputs ─────────────────────────────────────────────────
+
+def make_frames(n_claims: int, seed: int = 0) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Build freq/sev frames shaped like the output of step 7 (cross_impute):
+    ~2 claims per policy, ~2% invalid or missing values per shared column.
+    """
+    rng = np.random.default_rng(seed)
+    n_pol = max(n_claims // 2, 1)
+
+    def _columns(n: int) -> dict:
+        cols = {
+            "station_id":          rng.choice(["A1", "A2", "B2", "B6", "G2", "G3"], n).astype(object),
+            "solar_system":        rng.choice(["Zeta", "Epsilon", "Helionis Cluster"], n).astype(object),
+            "production_load":     rng.integers(0, 1000, n) / 1000,
+            "energy_backup_score": rng.integers(1, 6, n).astype(float),
+            "safety_compliance":   rng.integers(1, 6, n).astype(float),
+            "exposure":            rng.integers(0, 1000, n) / 1000,
+        }
+        for col, bad in [("station_id", np.nan), ("solar_system", np.nan),
+                         ("production_load", 1.5), ("energy_backup_score", 7.0),
+                         ("safety_compliance", np.nan), ("exposure", 2.0)]:
+            cols[col][rng.random(n) < 0.02] = bad
+        return cols
+
+    freq = pd.DataFrame({"policy_id": [f"BI-{i:06d}" for i in range(1, n_pol + 1)],
+                         **_columns(n_pol)})
+    sev_pids = np.sort(rng.integers(1, n_pol + 1, n_claims))
+    sev = pd.DataFrame({"policy_id": [f"BI-{i:06d}" for i in sev_pids],
+                        **_columns(n_claims)})
+    sev["claim_amount"] = rng.integers(1_000, 5_000_000, n_claims).astype(float)
+    return freq, sev
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+
+def _timed(fn, freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[float, tuple]:
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        t0 = time.perf_counter()
+        out = fn(freq, sev)
+        elapsed = time.perf_counter() - t0
+    return elapsed, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000,
+                        help="largest claim count the legacy loop is run on (it is quadratic)")
+    args = parser.parse_args()
+
+    print(f"{'claims':>10}  {'grouped (s)':>12}  {'legacy (s)':>11}  {'speedup':>8}")
+    for n in args.sizes:
+        freq, sev = make_frames(n)
+        new_t, (new_f, new_s) = _timed(bi.validity_checker, freq, sev)
+
+        if n <= args.legacy_max:
+            old_t, (old_f, old_s) = _timed(_legacy_validity_checker, freq, sev)
+            pd.testing.assert_frame_equal(new_f, old_f)
+            pd.testing.assert_frame_equal(new_s, old_s)
+            print(f"{n:>10,}  {new_t:>12.3f}  {old_t:>11.3f}  {old_t / new_t:>7.0f}x")
+        else:
+            print(f"{n:>10,}  {new_t:>12.3f}  {'skipped':>11}  {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
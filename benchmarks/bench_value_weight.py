@@ -0,0 +1,86 @@
+"""
+Benchmark – cargo value / weight fill
+=====================================
+Compares step 14 of clean_cargo_data (_fill_cargo_value_weight: one rate per
+row from CARGO_VALUE_MAP, one fill pass per direction, freq and sev keyed
+together) against the per-type loop it replaced (two masked passes per
+cargo type and frame) on synthetic freq / sev frames, plain and categorical,
+and asserts that both fill identical values.
+
+Run from the repository root:
+    python -m benchmarks.bench_value_weight
+    python -m benchmarks.bench_value_weight --sizes 100000 1000000 --gap-rate 0.2
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_clean import clean_cargo_data as cargo
+from data_clean.categoricals import per_category, to_categorical
+
+
+# ── Reference implementation (per-type loop) ─────────────────────────────────
+
+def _legacy_fill_cargo_value_weight(df: pd.DataFrame) -> pd.DataFrame:
+    """The per-type loop, kept for comparison only."""
+    df = df.copy()
+    cargo_key = per_category(df["cargo_type"], lambda s: s.str.lower().str.strip())
+    for cargo_type, rate in cargo.CARGO_VALUE_MAP.items():
+        mask_type = cargo_key == cargo_type
+        mask = mask_type & df["cargo_value"].isna() & df["weight"].notna()
+        df.loc[mask, "cargo_value"] = df.loc[mask, "weight"] * rate
+        mask = mask_type & df["weight"].isna() & df["cargo_value"].notna()
+        df.loc[mask, "weight"] = df.loc[mask, "cargo_value"] / rate
+    return df
+
+
+# ── Synthetic frames ─────────────────────────────────────────────────────────
+
+def make_frame(n_rows: int, gap_rate: float, seed: int = 0) -> pd.DataFrame:
+    """Cargo types (a few unlisted or badly spaced), weights and values with ~gap_rate blanked."""
+    rng = np.random.default_rng(seed)
+    types = np.array([*cargo.CARGO_VALUE_MAP, " Gold", "Supplies ", "unknown"], dtype=object)
+    cargo_type = pd.Series(types[rng.integers(0, len(types), n_rows)], dtype="str")
+    weight = pd.Series(rng.uniform(1, 1e6, n_rows).round(2))
+    rate = cargo_type.str.lower().str.strip().map(cargo.CARGO_VALUE_MAP).fillna(1.0)
+    value = weight * rate
+    weight[rng.random(n_rows) < gap_rate / 2] = np.nan
+    value[rng.random(n_rows) < gap_rate / 2] = np.nan
+    return pd.DataFrame({"cargo_type": cargo_type, "cargo_value": value, "weight": weight})
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+
+def _timed(fn, *args) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--gap-rate", type=float, default=0.1,
+                        help="approximate share of rows missing cargo_value or weight")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'cargo_type':<11} {'vectorised (s)':>15}  {'loop (s)':>9}  {'speedup':>8}")
+    for n in args.sizes:
+        freq, sev = make_frame(n, args.gap_rate, seed=1), make_frame(n, args.gap_rate, seed=2)
+        for kind in ("str", "category"):
+            if kind == "category":
+                freq, sev = to_categorical([freq, sev], ["cargo_type"])
+            new_t, (new_freq, new_sev) = _timed(cargo._fill_cargo_value_weight, freq, sev)
+            old_t, old_freq = _timed(_legacy_fill_cargo_value_weight, freq)
+            t, old_sev = _timed(_legacy_fill_cargo_value_weight, sev)
+            old_t += t
+            pd.testing.assert_frame_equal(new_freq, old_freq)
+            pd.testing.assert_frame_equal(new_sev, old_sev)
+            print(f"{n:>10,}  {kind:<11} {new_t:>15.4f}  {old_t:>9.4f}  {old_t / new_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
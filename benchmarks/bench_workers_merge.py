@@ -0,0 +1,67 @@
+"""
+Benchmark – workers comp merge modes
+====================================
+run_pipeline for workers comp on synthetic inputs (benchmarks/generators.py)
+in each merge mode (clean_workers_comp.MERGE_MODES): the per-worker modes
+aggregate sev before the join, explode joins every claim row. Reports the
+merged rows and in-memory size (deep), the merge step and the whole run.
+
+Run from the repository root:
+    python -m benchmarks.bench_workers_merge
+    python -m benchmarks.bench_workers_merge --scale 50
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.generators import write_line
+from data_clean import clean_workers_comp as wc
+from data_clean.profiling import StepProfiler
+
+
+def _timed_run(freq_path: str, sev_path: str, out_path: str, merge_mode: str, repeat: int):
+    best, merge_t, merged = float("inf"), float("inf"), None
+    for _ in range(repeat):
+        prof = StepProfiler(trace_memory=False)
+        t0   = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            merged = wc.run_pipeline(freq_path, sev_path, out_path, profile=prof, cache=False,
+                                     input_cache=False, diagnostics=0, merge_mode=merge_mode)
+        best    = min(best, time.perf_counter() - t0)
+        merge_t = min(merge_t, next(r["wall_s"] for r in prof.records
+                                    if r["step"] == "merge_datasets"))
+    return best, merge_t, merged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        freq_path, sev_path, n_freq, n_sev = write_line("workers", args.scale, tmp, args.seed)
+        out_path = os.path.join(tmp, "workers_claims_merged.csv")
+        print(f"freq {n_freq:,} rows, sev {n_sev:,} claim rows\n")
+        print(f"{'mode':<10} {'rows':>9}  {'memory (MB)':>11}  {'merge (s)':>9}  {'total (s)':>9}")
+
+        sizes = {}
+        for mode in wc.MERGE_MODES:
+            total_t, merge_t, merged = _timed_run(freq_path, sev_path, out_path, mode, args.repeat)
+            sizes[mode] = (len(merged), merged.memory_usage(deep=True).sum() / 1024 ** 2)
+            print(f"{mode:<10} {sizes[mode][0]:>9,}  {sizes[mode][1]:>11.1f}  {merge_t:>9.3f}  "
+                  f"{total_t:>9.3f}")
+
+        rows, mb = sizes["explode"]
+        for mode in ("dominant", "listed"):
+            print(f"{mode} vs explode: rows {sizes[mode][0] / rows - 1:+.0%}, "
+                  f"memory {sizes[mode][1] / mb - 1:+.0%}")
+
+
+if __name__ == "__main__":
+    main()
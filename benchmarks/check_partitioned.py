@@ -0,0 +1,66 @@
+"""
+Check – partitioned runs against run_pipeline
+=============================================
+Each line on synthetic inputs (benchmarks/generators.py): run_pipeline once,
+then run_pipeline_partitioned with every partition count from 1 to
+--max-partitions, and assert that every partitioned output file is
+byte-identical to the batch one. The fallback fills are the whole book's
+(rules.FillStats), mean fills included (exact sums, sketches.RunningMean),
+so no partition count may change a single digit.
+
+Run from the repository root:
+    python -m benchmarks.check_partitioned
+    python -m benchmarks.check_partitioned --lines equipment --scale 5 --max-partitions 32
+"""
+
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.generators import write_line
+from data_clean import clean_business_data as bi
+from data_clean import clean_cargo_data as cargo
+from data_clean import clean_equipment_data as equip
+from data_clean import clean_workers_comp as wc
+
+MODULES = {"business": bi, "cargo": cargo, "equipment": equip, "workers": wc}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", nargs="+", default=list(MODULES), choices=list(MODULES))
+    parser.add_argument("--scale", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-partitions", type=int, default=16)
+    parser.add_argument("--chunksize", type=int, default=5_000)
+    args = parser.parse_args()
+
+    print(f"{'line':<10} {'rows':>9}  {'partitions':>10}  {'time (s)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for line in args.lines:
+            module = MODULES[line]
+            freq_path, sev_path, n_freq, n_sev = write_line(line, args.scale, tmp, args.seed)
+            batch_path = os.path.join(tmp, f"{line}_batch.csv")
+            part_path  = os.path.join(tmp, f"{line}_partitioned.csv")
+            with contextlib.redirect_stdout(io.StringIO()):
+                module.run_pipeline(freq_path, sev_path, batch_path, profile=False, cache=False,
+                                    input_cache=False)
+
+            t0 = time.perf_counter()
+            for n in range(1, args.max_partitions + 1):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    module.run_pipeline_partitioned(freq_path, sev_path, part_path, partitions=n,
+                                                    chunksize=args.chunksize, profile=False,
+                                                    work_dir=tmp)
+                assert filecmp.cmp(part_path, batch_path, shallow=False), \
+                    f"{line}: {n} partitions differ from run_pipeline"
+            print(f"{line:<10} {n_freq + n_sev:>9,}  {f'1-{args.max_partitions}':>10}  "
+                  f"{time.perf_counter() - t0:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
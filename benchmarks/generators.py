@@ -0,0 +1,281 @@
+"""
+Synthetic messy-data generators
+===============================
+One generator per line that writes freq and sev CSVs in the same layout and
+South-African format as the real extracts (semicolon-delimited, comma
+decimals, header row), laid out per each module's FREQ_COLS / SEV_COLS, and
+with the same kinds of mess:
+  - trailing _???#### suffixes on string cells
+  - negative numbers
+  - blank cells, IDs included
+  - out-of-range scores
+
+Sev claims always reference freq rows and copy their shared attributes (before
+the mess is applied), so every pipeline's ID imputation and cross-checks
+have real work to do. Files are written in blocks, so generator memory stays
+bounded at large scale factors.
+
+    python -m benchmarks.generators --lines cargo --scale 10 --out-dir /tmp/synthetic
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_clean import clean_business_data as bi
+from data_clean import clean_cargo_data as cargo
+from data_clean import clean_equipment_data as equip
+from data_clean import clean_workers_comp as wc
+
+# Scale 1 row counts: sev matches the checked-in messy_data/*_claims_sev.csv;
+# freq (not checked in) is sized for a comparable number of policies.
+BASE_ROWS = {
+    "business":  (10_000, 10_055),
+    "cargo":     (25_000, 30_650),
+    "equipment": (8_000,  8_272),
+    "workers":   (2_500,  1_917),
+}
+
+SOLAR_SYSTEMS   = ["Epsilon", "Helionis Cluster", "Zeta"]
+STATIONS        = [f"{c}{i}" for c in "ABG" for i in range(1, 10)]
+CONTAINER_TYPES = ["DeepSpace Haulbox", "DockArc Freight Case", "HardSeal Transit Crate",
+                   "LongHaul Vault Canister", "QuantumCrate Module"]
+EQUIPMENT_TYPES = ["Flux Rider", "Fusion Transport", "Ion Pulverizer", "Mag-Lift Aggregator",
+                   "Quantum Bore", "ReglAggregators"]
+OCCUPATIONS     = ["Drill Operator", "Engineer", "Maintenance Staff", "Manager",
+                   "Planetary Scientist", "Safety Officer", "Spacecraft Operator"]
+EMPLOYMENT      = ["Full-time", "Contract"]
+INJURY_TYPES    = ["Burns", "Cut laceration", "Fracture", "Sprain, strain", "Stress"]
+INJURY_CAUSES   = ["Caught in machine", "Exposure", "Fall", "Stress/strain", "Vehicle accident"]
+WC_PREFIXES     = {"Epsilon": "EPS", "Helionis Cluster": "HEL", "Zeta": "ZET"}
+
+# Share of cells affected by each kind of mess
+SUFFIX_RATE   = 0.01
+NEGATIVE_RATE = 0.005
+BLANK_RATE    = 0.005
+OUTLIER_RATE  = 0.005
+
+
+# ── Mess ──────────────────────────────────────────────────────────────────────
+
+def _messify(df: pd.DataFrame, rng: np.random.Generator, scores: dict[str, int],
+             no_suffix: tuple[str, ...] = ()) -> pd.DataFrame:
+    """
+    Apply the real files' mess in place. `scores` maps score columns to an
+    out-of-range value to inject; columns in `no_suffix` only get blanks.
+    """
+    n = len(df)
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_string_dtype(s) or s.dtype == object:
+            hit = (rng.random(n) < SUFFIX_RATE) & (col not in no_suffix)
+            if hit.any():
+                tags = pd.Series(rng.integers(0, 10_000, hit.sum())).map("_???{:04d}".format)
+                df.loc[hit, col] = s[hit].astype(str) + tags.values
+        else:
+            if col in scores:
+                df.loc[rng.random(n) < OUTLIER_RATE, col] = scores[col]
+            neg = rng.random(n) < NEGATIVE_RATE
+            df.loc[neg, col] = -df.loc[neg, col]
+        df.loc[rng.random(n) < BLANK_RATE, col] = None
+    return df
+
+
+def _ints(rng: np.random.Generator, lo: int, hi: int, n: int) -> pd.Series:
+    """Inclusive integer draw, nullable so blanks stay blank (not 3,0)."""
+    return pd.Series(rng.integers(lo, hi + 1, n), dtype="Int64")
+
+
+def _claims_for(rng: np.random.Generator, n_freq: int, n_sev: int) -> np.ndarray:
+    """Freq row positions referenced by each claim (sorted, repeats = multi-claim policies)."""
+    return np.sort(rng.integers(0, n_freq, n_sev))
+
+
+def _claim_seq(rows: np.ndarray) -> pd.Series:
+    return pd.Series(rows).groupby(rows).cumcount().add(1).astype("Int64")
+
+
+# ── Per-line blocks ───────────────────────────────────────────────────────────
+# Each returns (freq, sev) for one block; `offset` / `sev_offset` are the
+# global row positions of the block's first freq / sev row (for unique IDs).
+
+def business_block(rng: np.random.Generator, n_freq: int, n_sev: int,
+                   offset: int, sev_offset: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    ids = np.arange(offset + 1, offset + n_freq + 1)
+    freq = pd.DataFrame({
+        "policy_id":           [f"BI-{i:06d}" for i in ids],
+        "station_id":          rng.choice(STATIONS, n_freq),
+        "solar_system":        rng.choice(SOLAR_SYSTEMS, n_freq),
+        "production_load":     rng.uniform(0, 1, n_freq).round(3),
+        "energy_backup_score": _ints(rng, 1, 5, n_freq),
+        "supply_chain_index":  _ints(rng, 1, 5, n_freq),
+        "avg_crew_exp":        rng.uniform(1, 30, n_freq).round(1),
+        "maintenance_freq":    _ints(rng, 0, 6, n_freq),
+        "safety_compliance":   _ints(rng, 1, 5, n_freq),
+        "exposure":            rng.uniform(0, 1, n_freq).round(3),
+        "claim_count":         _ints(rng, 0, 3, n_freq),
+    })
+    rows = _claims_for(rng, n_freq, n_sev)
+    sev = freq.iloc[rows][[c for c in bi.SEV_COLS if c in freq.columns]].reset_index(drop=True)
+    sev.insert(0, "claim_id",  [f"BI-C-{sev_offset + j + 1:07d}" for j in range(n_sev)])
+    sev.insert(1, "claim_seq", _claim_seq(rows))
+    sev["claim_amount"] = _ints(rng, 10_000, 5_000_000, n_sev)
+    scores = {"energy_backup_score": 7, "supply_chain_index": 9, "maintenance_freq": 12,
+              "safety_compliance": 8}
+    return (_messify(freq[bi.FREQ_COLS], rng, scores),
+            _messify(sev[bi.SEV_COLS],   rng, scores))
+
+
+def cargo_block(rng: np.random.Generator, n_freq: int, n_sev: int,
+                offset: int, sev_offset: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    ids    = np.arange(offset + 1, offset + n_freq + 1)
+    ctype  = rng.choice(list(cargo.CARGO_VALUE_MAP), n_freq)
+    weight = pd.Series(rng.integers(1, 200, n_freq) * 1_000, dtype="Int64")
+    freq = pd.DataFrame({
+        "policy_id":        [f"CL-{i:06d}" for i in ids],
+        "shipment_id":      [f"S-{i:06d}" for i in ids],
+        "cargo_type":       ctype,
+        "cargo_value":      weight * pd.Series(ctype).map(cargo.CARGO_VALUE_MAP),
+        "weight":           weight,
+        "route_risk":       _ints(rng, 1, 5, n_freq),
+        "distance":         rng.uniform(1, 100, n_freq).round(2),
+        "transit_duration": rng.uniform(1, 60, n_freq).round(3),
+        "pilot_experience": rng.uniform(1, 30, n_freq).round(3),
+        "vessel_age":       rng.uniform(1, 50, n_freq).round(3),
+        "container_type":   rng.choice(CONTAINER_TYPES, n_freq),
+        "solar_radiation":  rng.uniform(0, 1, n_freq).round(3),
+        "debris_density":   rng.uniform(0, 1, n_freq).round(3),
+        "exposure":         rng.uniform(0, 1, n_freq).round(3),
+        "claim_count":      _ints(rng, 0, 3, n_freq),
+    })
+    rows = _claims_for(rng, n_freq, n_sev)
+    sev = freq.iloc[rows][[c for c in cargo.SEV_COLS if c in freq.columns]].reset_index(drop=True)
+    sev.insert(0, "claim_id",  [f"CAR-C-{sev_offset + j + 1:07d}" for j in range(n_sev)])
+    sev.insert(1, "claim_seq", _claim_seq(rows))
+    sev["claim_amount"] = _ints(rng, 10_000, 50_000_000, n_sev)
+    scores = {"route_risk": 9}
+    return (_messify(freq[cargo.FREQ_COLS], rng, scores),
+            _messify(sev[cargo.SEV_COLS],   rng, scores))
+
+
+def equipment_block(rng: np.random.Generator, n_freq: int, n_sev: int,
+                    offset: int, sev_offset: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    ids = np.arange(offset + 1, offset + n_freq + 1)
+    freq = pd.DataFrame({
+        "policy_id":       [f"EF-{i:06d}" for i in ids],
+        "equipment_id":    [f"EQ-{i:06d}" for i in ids],
+        "equipment_type":  rng.choice(EQUIPMENT_TYPES, n_freq),
+        "equipment_age":   rng.uniform(0, 30, n_freq).round(3),
+        "solar_system":    rng.choice(SOLAR_SYSTEMS, n_freq),
+        "maintenance_int": rng.uniform(100, 5000, n_freq).round(2),
+        "usage_int":       rng.uniform(0, 24, n_freq).round(2),
+        "exposure":        rng.uniform(0, 1, n_freq).round(3),
+        "claim_counts":    _ints(rng, 0, 3, n_freq),
+    })
+    rows = _claims_for(rng, n_freq, n_sev)
+    sev = freq.iloc[rows][[c for c in equip.SEV_COLS if c in freq.columns]].reset_index(drop=True)
+    sev.insert(0, "claim_id",  [f"EF-C-{sev_offset + j + 1:07d}" for j in range(n_sev)])
+    sev.insert(1, "claim_seq", _claim_seq(rows))
+    sev["claim_amount"] = _ints(rng, 1_000, 500_000, n_sev)
+    return (_messify(freq[equip.FREQ_COLS], rng, {}),
+            _messify(sev[equip.SEV_COLS],   rng, {}))
+
+
+def workers_block(rng: np.random.Generator, n_freq: int, n_sev: int,
+                  offset: int, sev_offset: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # freq policy_ids run sequentially per solar system (WC-EPS-00001, ...), which
+    # is what fill_freq_policy_id's propagate-and-increment rule relies on.
+    system = np.sort(rng.choice(SOLAR_SYSTEMS, n_freq))
+    seq    = pd.Series(system).groupby(system).cumcount().to_numpy() + 1 + offset
+    rows_1 = np.arange(offset + 1, offset + n_freq + 1)
+    freq = pd.DataFrame({
+        "policy_id":               [f"WC-{WC_PREFIXES[s]}-{k:05d}" for s, k in zip(system, seq)],
+        "worker_id":               [f"W-{i:05d}" for i in rows_1],
+        "solar_system":            system,
+        "station_id":              rng.choice(STATIONS, n_freq),
+        "occupation":              rng.choice(OCCUPATIONS, n_freq),
+        "employment_type":         rng.choice(EMPLOYMENT, n_freq),
+        "experience_yrs":          rng.uniform(0, 40, n_freq).round(2),
+        "accident_history_flag":   _ints(rng, 0, 1, n_freq),
+        "psych_stress_index":      _ints(rng, 1, 5, n_freq),
+        "hours_per_week":          pd.Series(rng.choice([20, 25, 30, 40], n_freq), dtype="Int64"),
+        "supervision_level":       rng.integers(0, 11, n_freq) / 10,
+        "gravity_level":           rng.uniform(0.75, 1.5, n_freq).round(3),
+        "safety_training_index":   _ints(rng, 1, 5, n_freq),
+        "protective_gear_quality": _ints(rng, 1, 5, n_freq),
+        "base_salary":             _ints(rng, 20_000, 100_000, n_freq),
+        "exposure":                rng.uniform(0, 1, n_freq).round(3),
+        "claim_count":             _ints(rng, 0, 3, n_freq),
+    })
+    rows = _claims_for(rng, n_freq, n_sev)
+    sev = freq.iloc[rows][[c for c in wc.SEV_COLS if c in freq.columns]].reset_index(drop=True)
+    sev.insert(0, "claim_id",  [f"C-{sev_offset + j + 1:07d}" for j in range(n_sev)])
+    sev.insert(1, "claim_seq", _claim_seq(rows))
+    sev["injury_type"]  = rng.choice(INJURY_TYPES, n_sev)
+    sev["injury_cause"] = rng.choice(INJURY_CAUSES, n_sev)
+    sev["claim_length"] = _ints(rng, 3, 120, n_sev)
+    sev["claim_amount"] = rng.uniform(500, 200_000, n_sev).round(2)
+    scores = {"psych_stress_index": 9, "safety_training_index": 9, "hours_per_week": 99}
+    # freq policy_ids only get blanks (fill_freq_policy_id cannot parse a
+    # suffixed ID), and the very first one must survive as the seed row.
+    first_pid = freq.at[0, "policy_id"]
+    freq = _messify(freq[wc.FREQ_COLS], rng, scores, no_suffix=("policy_id",))
+    if offset == 0:
+        freq.at[0, "policy_id"] = first_pid
+    return freq, _messify(sev[wc.SEV_COLS], rng, scores)
+
+
+GENERATORS = {
+    "business":  business_block,
+    "cargo":     cargo_block,
+    "equipment": equipment_block,
+    "workers":   workers_block,
+}
+
+
+# ── Writer ────────────────────────────────────────────────────────────────────
+
+def write_line(line: str, scale: float, out_dir: str, seed: int = 0,
+               block_rows: int = 500_000) -> tuple[str, str, int, int]:
+    """
+    Write <line>_claims_freq.csv and <line>_claims_sev.csv at `scale` × BASE_ROWS.
+    Returns (freq_path, sev_path, freq_rows, sev_rows).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    base_freq, base_sev = BASE_ROWS[line]
+    n_freq = max(int(base_freq * scale), 1)
+    n_sev  = max(int(base_sev  * scale), 1)
+    freq_path = os.path.join(out_dir, f"{line}_claims_freq.csv")
+    sev_path  = os.path.join(out_dir, f"{line}_claims_sev.csv")
+
+    n_blocks = max(-(-n_freq // block_rows), 1)
+    freq_edges = np.linspace(0, n_freq, n_blocks + 1).astype(int)
+    sev_edges  = np.linspace(0, n_sev,  n_blocks + 1).astype(int)
+    rng = np.random.default_rng(seed)
+
+    for b in range(n_blocks):
+        freq, sev = GENERATORS[line](
+            rng, freq_edges[b + 1] - freq_edges[b], sev_edges[b + 1] - sev_edges[b],
+            offset=int(freq_edges[b]), sev_offset=int(sev_edges[b]),
+        )
+        mode, header = ("w", True) if b == 0 else ("a", False)
+        freq.to_csv(freq_path, sep=";", decimal=",", index=False, mode=mode, header=header)
+        sev.to_csv(sev_path,   sep=";", decimal=",", index=False, mode=mode, header=header)
+
+    return freq_path, sev_path, n_freq, n_sev
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic messy freq/sev CSVs.")
+    parser.add_argument("--lines", default=",".join(GENERATORS))
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument("--out-dir", default="synthetic_data")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for line in args.lines.split(","):
+        freq_path, sev_path, n_freq, n_sev = write_line(line, args.scale, args.out_dir, args.seed)
+        print(f"{line:<10} {n_freq:>12,} freq rows → {freq_path}\n"
+              f"{'':<10} {n_sev:>12,} sev  rows → {sev_path}")
@@ -0,0 +1,11 @@
+"""
+Claims data cleaning pipelines
+==============================
+One module per line of business (business interruption, cargo, equipment,
+workers comp), each exposing run_pipeline(), plus shared helpers.
+
+Run the pipelines from the repository root (see __main__.py), e.g.
+    python -m data_clean run --lines cargo,equipment --jobs 4
+or a single line with its default paths:
+    python -m data_clean.clean_cargo_data
+"""
@@ -0,0 +1,167 @@
+"""
+Command line
+============
+The single entry point for running the claim pipelines:
+
+    python -m data_clean run [--lines LINES] [--jobs N] [--format csv|parquet] ...
+
+`run` cleans and merges the selected lines through orchestrate.run_lines:
+each line's run_pipeline gets explicit input and output paths, its prints go
+to <output-dir>/<line>_claims_merged.log, and a per-line timing table is
+printed at the end. Inputs are looked up under --data-dir; --freq / --sev
+take file names or glob patterns with {line} for the line name, and a
+pattern matching several files reads them as shards of one input:
+
+    python -m data_clean run --lines cargo,equipment --jobs 4 --format parquet --profile
+    python -m data_clean run --lines workers --data-dir incoming --sev "{line}_sev_*.csv"
+    python -m data_clean run --stream --chunksize 50000 --diagnostics summary
+    python -m data_clean run --partitions 16 --partition-jobs 4 --work-dir /scratch
+
+--partitions runs each line out of core (see partitioned.py): inputs read
+--chunksize rows at a time, the per-policy steps on N hash partitions spilled
+to --work-dir (0 picks N from the input size). Its fallback fills come from
+mergeable sketches (see sketches.py): median fills are exact unless a column
+has over a million distinct values, then within --sketch-error in rank. It
+does not combine with --stream, --cache, --input-cache or --diagnostics.
+
+The mode flags map onto run_pipeline's options; left out, each keeps
+following its environment variable (DATA_CLEAN_PROFILE, DATA_CLEAN_CACHE_DIR,
+DATA_CLEAN_INPUT_CACHE, DATA_CLEAN_DIAGNOSTICS, DATA_CLEAN_WORKERS_MERGE,
+DATA_CLEAN_CARGO_RATE_FIX, DATA_CLEAN_SKETCH_ERROR).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from data_clean.clean_cargo_data import RATE_FIX_ENV, RATE_FIXES
+from data_clean.clean_workers_comp import MERGE_MODE_ENV, MERGE_MODES
+from data_clean.orchestrate import (DEFAULT_DATA_DIR, DEFAULT_FREQ, DEFAULT_SEV, LINE_MODULES,
+                                    run_lines, summarise)
+from data_clean.outputs import OUTPUT_FORMATS
+from data_clean.partitioned import DEFAULT_PARTITION_MB
+from data_clean.sketches import DEFAULT_ERROR, SKETCH_ERROR_ENV
+from data_clean.streaming import DEFAULT_CHUNKSIZE
+
+
+def _line_list(value: str) -> list[str]:
+    lines = [line.strip() for line in value.split(",") if line.strip()]
+    unknown = sorted(set(lines) - set(LINE_MODULES))
+    if not lines or unknown:
+        raise argparse.ArgumentTypeError(
+            f"expected a comma-separated subset of {', '.join(LINE_MODULES)}, got {value!r}")
+    return lines
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m data_clean",
+                                     description="Claims data cleaning pipelines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="clean and merge the selected lines",
+                              description="Clean and merge the selected lines' freq / sev files.")
+    run.add_argument("--lines", type=_line_list, default=list(LINE_MODULES),
+                     help="comma-separated subset of: " + ", ".join(LINE_MODULES) + " (default: all)")
+    run.add_argument("--jobs", type=int, default=None,
+                     help="worker processes (default: one per line, capped at the CPU count)")
+    run.add_argument("--format", choices=list(OUTPUT_FORMATS), default="csv",
+                     help="output file format (default: csv)")
+
+    paths = run.add_argument_group("paths")
+    paths.add_argument("--data-dir", default=DEFAULT_DATA_DIR,
+                       help=f"directory holding the inputs (default: {DEFAULT_DATA_DIR})")
+    paths.add_argument("--output-dir", default=".",
+                       help="directory for the merged outputs, logs and diagnostics")
+    paths.add_argument("--freq", default=DEFAULT_FREQ, metavar="PATTERN",
+                       help=f"freq file name or glob under --data-dir (default: {DEFAULT_FREQ})")
+    paths.add_argument("--sev", default=DEFAULT_SEV, metavar="PATTERN",
+                       help=f"sev file name or glob under --data-dir (default: {DEFAULT_SEV})")
+
+    modes = run.add_argument_group("modes")
+    modes.add_argument("--stream", action="store_true",
+                       help=f"stream the sev files in chunks (of {DEFAULT_CHUNKSIZE:,} rows "
+                            "unless --chunksize says otherwise)")
+    modes.add_argument("--chunksize", type=int, default=None, metavar="ROWS",
+                       help="stream the sev files in chunks of this many rows")
+    modes.add_argument("--profile", action="store_true",
+                       help="per-step timing/memory table in each line's log")
+    modes.add_argument("--cache", default=None, metavar="DIR",
+                       help="reuse unchanged pipeline stages from this cache directory")
+    modes.add_argument("--input-cache", action="store_true",
+                       help="keep parsed Arrow copies of the input CSVs next to them")
+    modes.add_argument("--diagnostics", default=None, metavar="LEVEL",
+                       help="record sanity metrics: 0-2 or off / summary / detail")
+    modes.add_argument("--workers-merge", choices=MERGE_MODES, default=None,
+                       help="workers comp output rows: per worker (dominant, listed) "
+                            "or per claim (explode)")
+    modes.add_argument("--cargo-rate-fix", choices=RATE_FIXES, default=None,
+                       help="cargo rows whose value and weight disagree with the rate table: "
+                            "left as they are (off) or with cargo_value or weight rewritten "
+                            "from the other")
+    modes.add_argument("--no-prefetch", action="store_true",
+                       help="with --jobs 1, do not read the next line's inputs ahead")
+
+    partitioned = run.add_argument_group("out of core")
+    partitioned.add_argument("--partitions", type=int, default=None, metavar="N",
+                             help="hash-partition each line into N partitions on disk "
+                                  f"(0: one per {DEFAULT_PARTITION_MB} MB of input)")
+    partitioned.add_argument("--partition-jobs", type=int, default=1, metavar="N",
+                             help="processes per line for its partitions (default: 1)")
+    partitioned.add_argument("--work-dir", default=None, metavar="DIR",
+                             help="directory for the partitions (default: --output-dir)")
+    partitioned.add_argument("--sketch-error", type=float, default=None, metavar="E",
+                             help="rank error of approximate median fills, 0 for exact "
+                                  f"(default: {DEFAULT_ERROR})")
+    return parser
+
+
+def _run(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    if args.workers_merge:
+        os.environ[MERGE_MODE_ENV] = args.workers_merge   # inherited by the worker processes
+    if args.cargo_rate_fix:
+        os.environ[RATE_FIX_ENV] = args.cargo_rate_fix
+    if args.sketch_error is not None:
+        if args.sketch_error < 0:
+            parser.error("--sketch-error must be 0 or more")
+        os.environ[SKETCH_ERROR_ENV] = str(args.sketch_error)
+    if args.partitions is not None:
+        clashes = [flag for flag, used in [("--stream", args.stream), ("--cache", args.cache),
+                                           ("--input-cache", args.input_cache),
+                                           ("--diagnostics", args.diagnostics)] if used]
+        if clashes:
+            parser.error(f"--partitions does not combine with {', '.join(clashes)}")
+        if args.partitions < 0:
+            parser.error("--partitions must be 0 or more")
+    chunksize = args.chunksize or (DEFAULT_CHUNKSIZE if args.stream else None)
+    if chunksize and "workers" in args.lines and os.environ.get(MERGE_MODE_ENV) == "explode":
+        parser.error("--workers-merge explode does not combine with --stream / --chunksize "
+                     "(streaming writes one row per worker)")
+
+    t0 = time.perf_counter()
+    try:
+        results = run_lines(
+            lines=args.lines, data_dir=args.data_dir, output_dir=args.output_dir,
+            max_workers=args.jobs, chunksize=chunksize, return_frames=False,
+            profile=args.profile, cache=args.cache, input_cache=args.input_cache,
+            diagnostics=args.diagnostics, prefetch=not args.no_prefetch,
+            output_format=args.format, freq=args.freq, sev=args.sev,
+            partitions=args.partitions, partition_jobs=args.partition_jobs,
+            work_dir=args.work_dir,
+        )
+    except FileNotFoundError as exc:
+        parser.error(str(exc))
+    summarise(results, time.perf_counter() - t0)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return _run(args, parser)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Categorical columns
+===================
+Low-cardinality string columns (solar_system, cargo_type, occupation, …)
+are converted to `category` right after cleaning. Every copy, merge and
+groupby then moves small integer codes instead of Python strings.
+
+freq and sev get ONE shared CategoricalDtype per column (sorted union of
+both frames' values), so values copied between them by the cross-imputation
+and criteria steps are always existing categories.
+
+map_unique applies the same idea to plain string columns before they are
+converted: string cleaning runs once per distinct value, not per cell.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def union_dtype(uniques: list) -> pd.CategoricalDtype:
+    """The shared sorted CategoricalDtype of several arrays of distinct values."""
+    return pd.CategoricalDtype(np.sort(pd.unique(np.concatenate(
+        [np.asarray(u, dtype=object) for u in uniques]))))
+
+
+def to_categorical(frames: list[pd.DataFrame], cols: list[str],
+                   dtypes: dict[str, pd.CategoricalDtype] | None = None) -> list[pd.DataFrame]:
+    """
+    Convert `cols` to a shared sorted CategoricalDtype across all `frames`.
+    Columns missing from a frame are skipped for that frame. `dtypes` fixes
+    the dtype of a column up front (a partitioned run sees the values of the
+    whole input in a streaming pass, then converts one partition at a time).
+
+    Each column is factorized once per frame; only its few uniques are
+    looked up in the shared categories, then the codes are remapped.
+    """
+    frames = [df.copy() for df in frames]
+    dtypes = dtypes or {}
+    for col in cols:
+        present = [df for df in frames if col in df.columns]
+        if not present:
+            continue
+        factorized = [pd.factorize(df[col]) for df in present]
+        dtype      = dtypes[col] if col in dtypes else union_dtype([u for _, u in factorized])
+        for df, (codes, u) in zip(present, factorized):
+            positions = dtype.categories.get_indexer(u)
+            df[col] = pd.Categorical.from_codes(
+                np.where(codes >= 0, positions[codes], -1), dtype=dtype
+            )
+    return frames
+
+
+def per_category(series: pd.Series, fn) -> pd.Series:
+    """
+    fn(series) for plain columns. For categoricals, fn runs on the categories
+    only and the result is broadcast back through the codes (as a new
+    categorical, since fn may map several categories to one value).
+    `fn` must accept both a Series and an Index, e.g. lambda s: s.str.lower().
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return fn(series)
+    category_codes, categories = pd.factorize(np.asarray(fn(series.cat.categories), dtype=object))
+    codes = series.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, category_codes[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=categories),
+                     index=series.index, name=series.name)
+
+
+UNIQUE_PROBE_ROWS = 4096
+MAX_UNIQUE_RATIO  = 0.2
+
+
+def map_unique(series: pd.Series, fn) -> pd.Series:
+    """
+    fn(series) computed on the distinct values only: factorize, apply fn to
+    the uniques, broadcast back through the codes; missing cells are left as
+    they are. `fn` must map each value independently (strip, regex replace).
+
+    Columns whose first UNIQUE_PROBE_ROWS rows are more than MAX_UNIQUE_RATIO
+    distinct (IDs) skip the factorize and get plain fn(series).
+    """
+    probe = series.iloc[:UNIQUE_PROBE_ROWS]
+    if probe.nunique() > MAX_UNIQUE_RATIO * len(probe):
+        return fn(series)
+    codes, uniques = pd.factorize(series)
+    cleaned = fn(pd.Series(uniques, dtype=series.dtype))
+    out = pd.Series(cleaned.array.take(codes, allow_fill=True), dtype=cleaned.dtype,
+                    index=series.index, name=series.name)
+    missing = codes < 0
+    if series.dtype == object and missing.any():   # keep None vs NaN as they were
+        out[missing] = series.to_numpy()[missing]
+    return out
+
+
+def mode_value(series: pd.Series) -> object:
+    """
+    Most frequent non-null value, NaN if there is none. Ties resolve to the
+    smallest value, as Series.mode().iloc[0] does. Categorical columns are
+    counted on their integer codes (np.bincount) instead of hashing strings.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        codes = codes[codes >= 0]
+        if codes.size == 0:
+            return np.nan
+        return series.cat.categories[np.bincount(codes).argmax()]
+    modes = series.mode()
+    return modes.iloc[0] if not modes.empty else np.nan
@@ -5,26 +5,62 @@ Production-quality, vectorised pandas code.
 Follows all instructions from business_claims_criteria.docx exactly.
 """
 
-import re
 import os
+import tempfile
+from typing import Iterator
+
 import pandas as pd
 import numpy as np
 
+from data_clean.categoricals import map_unique, to_categorical, union_dtype
+from data_clean.diagnostics import Diagnostics, nan_counts
+from data_clean.incremental import file_digest, group_sum_state, load_state, save_state
+from data_clean.key_codes import decode_keys, encode_keys
+from data_clean.outputs import SavedOutput, write_output
+from data_clean.partitioned import (ROW, ChunkStore, FirstMatch, collect_categories, common_dtypes,
+                                    hash_partition, map_partitions, partition_count, row_buckets,
+                                    write_ordered)
+from data_clean.sa_csv import iter_sa_csv, numeric_cols, read_sa_csv, read_sa_csvs
+from data_clean.profiling import StepProfiler
+from data_clean.rules import FillStats, Rule, RuleSet, parse_numeric
+from data_clean.stage_cache import StageCache
+from data_clean.streaming import DEFAULT_CHUNKSIZE, stream_aggregate
+
 # ─────────────────────────────────────────────
 # 0. CONSTANTS
 # ─────────────────────────────────────────────
 
-FREQ_COLS = [
-    "policy_id", "station_id", "solar_system", "production_load",
-    "energy_backup_score", "supply_chain_index", "avg_crew_exp",
-    "maintenance_freq", "safety_compliance", "exposure", "claim_count",
-]
-
-SEV_COLS = [
-    "claim_id", "claim_seq", "policy_id", "station_id", "solar_system",
-    "production_load", "energy_backup_score", "safety_compliance",
-    "exposure", "claim_amount",
-]
+# Column layouts with their kinds for the typed reader (see sa_csv.py)
+FREQ_SCHEMA = {
+    "policy_id":           "str",
+    "station_id":          "str",
+    "solar_system":        "str",
+    "production_load":     "float",
+    "energy_backup_score": "score",
+    "supply_chain_index":  "score",
+    "avg_crew_exp":        "float",
+    "maintenance_freq":    "score",
+    "safety_compliance":   "score",
+    "exposure":            "float",
+    "claim_count":         "score",
+}
+
+SEV_SCHEMA = {
+    "claim_id":            "skip",
+    "claim_seq":           "skip",
+    "policy_id":           "str",
+    "station_id":          "str",
+    "solar_system":        "str",
+    "production_load":     "float",
+    "energy_backup_score": "score",
+    "safety_compliance":   "score",
+    "exposure":            "float",
+    "claim_amount":        "float",
+}
+
+FREQ_COLS = list(FREQ_SCHEMA)
+SEV_COLS  = list(SEV_SCHEMA)
+COLUMN_KINDS = {**FREQ_SCHEMA, **SEV_SCHEMA}
 
 # Columns shared between freq and sev (used for cross-imputation and checker)
 SHARED_COLS = [
@@ -32,28 +68,58 @@ SHARED_COLS = [
     "energy_backup_score", "safety_compliance", "exposure",
 ]
 
-# Suffix pattern to strip: _???#### (3 any-chars + 4 digits)
-SUFFIX_PATTERN = re.compile(r"_\w{3}\d{4}$")
+# Column criteria (Table 0, checked by the validity checker on SHARED_COLS)
+# and freq fallbacks (Table 1) – compiled by rules.RuleSet
+RULES = {
+    "station_id":          Rule("not_null",                     fill="mode"),
+    "solar_system":        Rule("not_null",                     fill="mode"),
+    "production_load":     Rule("range", (0, 1),                fill="median"),
+    "energy_backup_score": Rule("isin",  {1, 2, 3, 4, 5},       fill="median"),
+    "supply_chain_index":  Rule("isin",  {1, 2, 3, 4, 5},       fill="median"),
+    "avg_crew_exp":        Rule("range", (1, 30),               fill="median"),
+    "maintenance_freq":    Rule("isin",  {0, 1, 2, 3, 4, 5, 6}, fill="median"),
+    "safety_compliance":   Rule("isin",  {1, 2, 3, 4, 5},       fill="median"),
+    "exposure":            Rule("range", (0, 1),                fill="median"),
+}
+
+# Low-cardinality string columns carried as `category` after step 5
+CATEGORY_COLS = ["station_id", "solar_system"]
+
+# ID columns carried as integer codes from step 6b to the merge (see key_codes.py)
+KEY_COLS = ["policy_id"]
+
+# Suffix pattern to strip: _???#### (3 any-chars + 4 digits). Kept as a str:
+# a compiled pattern pushes pyarrow-backed .str.replace onto a per-cell path
+SUFFIX_PATTERN = r"_\w{3}\d{4}$"
 
 # ─────────────────────────────────────────────
 # 1. LOAD DATA
 # ─────────────────────────────────────────────
 
-def load_data(freq_path: str, sev_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Load freq and sev datasets from South African (semicolon-delimited) CSV files."""
-    freq = pd.read_csv(freq_path, sep=";", names=FREQ_COLS, header=0, dtype=str)
-    sev  = pd.read_csv(sev_path,  sep=";", names=SEV_COLS,  header=0, dtype=str)
+def load_data(freq_path: str | list[str], sev_path: str | list[str],
+              input_cache: bool | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Load freq and sev datasets from South African (semicolon-delimited) CSV files,
+    both at once (see read_sa_csvs). input_cache=True reuses / writes the parsed
+    Arrow copies (see sa_csv.py).
+    """
+    freq, sev = read_sa_csvs([(freq_path, FREQ_SCHEMA), (sev_path, SEV_SCHEMA)], cache=input_cache)
     return freq, sev
 
 
+def iter_sev_chunks(sev_path: str | list[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield the sev file in chunks of `chunksize` rows, parsed as in load_data."""
+    yield from iter_sa_csv(sev_path, SEV_SCHEMA, chunksize)
+
+
 # ─────────────────────────────────────────────
 # 2. ASSIGN policy_id IN freq
 # ─────────────────────────────────────────────
 
-def assign_policy_ids(freq: pd.DataFrame) -> pd.DataFrame:
-    """Replace policy_id column with BI-000001 … BI-NNNNNN."""
+def assign_policy_ids(freq: pd.DataFrame, start: int = 1) -> pd.DataFrame:
+    """Replace policy_id column with BI-000001 … BI-NNNNNN (numbering from `start`)."""
     freq = freq.copy()
-    freq["policy_id"] = [f"BI-{i:06d}" for i in range(1, len(freq) + 1)]
+    freq["policy_id"] = [f"BI-{i:06d}" for i in range(start, start + len(freq))]
     return freq
 
 
@@ -74,16 +140,16 @@ def drop_columns(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, p
 
 def strip_spaces(df: pd.DataFrame) -> pd.DataFrame:
     """Strip leading/trailing whitespace from all string cells."""
-    str_cols = df.select_dtypes(include="object").columns
-    df[str_cols] = df[str_cols].apply(lambda s: s.str.strip())
+    str_cols = df.select_dtypes(include=["object", "str"]).columns
+    df[str_cols] = df[str_cols].apply(map_unique, fn=lambda s: s.str.strip())
     return df
 
 
 def strip_suffix(df: pd.DataFrame) -> pd.DataFrame:
     """Remove trailing _???#### suffix (3 chars + 4 digits) from all string cells."""
-    str_cols = df.select_dtypes(include="object").columns
+    str_cols = df.select_dtypes(include=["object", "str"]).columns
     df[str_cols] = df[str_cols].apply(
-        lambda col: col.str.replace(SUFFIX_PATTERN, "", regex=True)
+        map_unique, fn=lambda col: col.str.replace(SUFFIX_PATTERN, "", regex=True)
     )
     return df
 
@@ -102,59 +168,106 @@ def clean_cells(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd
 
 def coerce_numerics(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Coerce numeric-looking columns to float and take absolute values.
-    Handles South African decimal format (comma as decimal separator, e.g. 0,26).
-    """
-    for col in df.columns:
-        s = df[col]
-        # Replace SA comma-decimals with dots before converting (digit,digit pattern only)
-        if hasattr(s, "str"):
-            s = s.str.replace(r"(?<=\d),(?=\d)", ".", regex=True)
-        converted = pd.to_numeric(s, errors="coerce")
-        if converted.notna().sum() > 0:          # at least some numeric values
-            df[col] = converted.abs()
+    Take absolute values of the columns COLUMN_KINDS declares numeric; ID and
+    label columns are never converted. The typed reader has already parsed
+    them (SA comma decimals included), so parse_numeric is a no-op unless df
+    came from somewhere else.
+    """
+    for col in numeric_cols(df, COLUMN_KINDS):
+        df[col] = parse_numeric(df[col]).abs()
     return df
 
 
+def categorise(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Convert CATEGORY_COLS to one category dtype shared by freq and sev."""
+    freq, sev = to_categorical([freq, sev], CATEGORY_COLS)
+    return freq, sev
+
+
 # ─────────────────────────────────────────────
 # 6. IMPUTE MISSING policy_id IN sev
 # ─────────────────────────────────────────────
 
-def impute_sev_policy_id(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+POLICY_MATCH_COLS = ["exposure", "production_load"]
+POLICY_KEY_DECIMALS = 3   # precision of exposure / production_load in the extracts
+
+
+def _policy_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """POLICY_MATCH_COLS quantised to the files' 3 decimals, so float noise cannot break a match."""
+    return df[POLICY_MATCH_COLS].round(POLICY_KEY_DECIMALS)
+
+
+def build_policy_lookup(freq: pd.DataFrame) -> pd.DataFrame:
+    """Quantised (exposure, production_load) → policy_id from freq (first row per pair), to join on."""
+    keys = _policy_keys(freq).assign(policy_id=freq["policy_id"])
+    return keys.dropna(subset=POLICY_MATCH_COLS).drop_duplicates(subset=POLICY_MATCH_COLS)
+
+
+def _ambiguous_keys(freq: pd.DataFrame, wanted: pd.DataFrame) -> pd.DataFrame:
+    """Keys used for imputation that several freq policies share (used + candidates)."""
+    keys = _policy_keys(freq).assign(policy_id=freq["policy_id"]).dropna()
+    keys = keys.drop_duplicates()
+    shared = keys[keys.duplicated(subset=POLICY_MATCH_COLS, keep=False)]
+    shared = shared.merge(wanted.drop_duplicates(), on=POLICY_MATCH_COLS)
+    return (shared.groupby(POLICY_MATCH_COLS, sort=True)["policy_id"]
+            .agg(used="first", candidates=list).reset_index())
+
+
+def _report_ambiguous_keys(freq: pd.DataFrame, wanted: pd.DataFrame) -> None:
+    """Print the keys used for imputation that several freq policies share."""
+    table = _ambiguous_keys(freq, wanted)
+    if table.empty:
+        print("No ambiguous exposure / production_load matches.")
+        return
+    print("=== Ambiguous policy_id matches – first freq policy used ===")
+    print(table.to_string(index=False))
+
+
+def impute_sev_policy_id(freq: pd.DataFrame, sev: pd.DataFrame,
+                         freq_lookup: pd.DataFrame | None = None,
+                         report_ambiguous: bool = False,
+                         diag: Diagnostics | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     For NaN policy_id rows in sev, look for a freq row with the same
-    exposure + production_load and copy its policy_id across.
-    Remaining NaNs are printed for manual resolution.
+    exposure + production_load (to 3 decimals) and copy its policy_id
+    across, via one left join of the NaN rows against the freq lookup.
+    Remaining NaNs are reported through diag for manual resolution.
+    A prebuilt freq_lookup (build_policy_lookup) may be passed in.
+    report_ambiguous also prints matched keys that several freq policies
+    share (the first of them is used).
     """
+    diag = diag or Diagnostics()
     sev = sev.copy()
-    match_cols = ["exposure", "production_load"]
 
     # Build a lookup: (exposure, production_load) → policy_id from freq
-    freq_lookup = (
-        freq.dropna(subset=match_cols)
-        .drop_duplicates(subset=match_cols)
-        .set_index(match_cols)["policy_id"]
-    )
+    if freq_lookup is None:
+        freq_lookup = build_policy_lookup(freq)
 
     nan_mask = sev["policy_id"].isna()
     if nan_mask.any():
-        sev_keys = sev.loc[nan_mask, match_cols]
-        imputed  = sev_keys.apply(
-            lambda row: freq_lookup.get(tuple(row.values), np.nan), axis=1
-        )
-        sev.loc[nan_mask, "policy_id"] = imputed.values
+        wanted  = _policy_keys(sev.loc[nan_mask])
+        imputed = wanted.merge(freq_lookup, on=POLICY_MATCH_COLS, how="left")["policy_id"]
+        sev.loc[nan_mask, "policy_id"] = imputed.to_numpy()
+        if report_ambiguous:
+            _report_ambiguous_keys(freq, wanted)
+        diag.detail("impute_sev_policy_id", "ambiguous matches (first freq policy used)",
+                    lambda: _ambiguous_keys(freq, wanted))
 
     # Report any still-missing policy_ids
-    still_nan = sev.loc[sev["policy_id"].isna()].index.tolist()
-    if still_nan:
-        print("=== sev rows with unresolved NaN policy_id (fix by hand) ===")
-        print(sev.loc[still_nan])
-    else:
-        print("All sev policy_id values successfully imputed.")
+    section = "impute_sev_policy_id"
+    diag.metric(section, "unresolved policy_id rows", lambda: int(sev["policy_id"].isna().sum()))
+    diag.detail(section, "unresolved rows (fix by hand)", lambda: sev.loc[sev["policy_id"].isna()])
 
     return freq, sev
 
 
+def encode_ids(freq: pd.DataFrame, sev: pd.DataFrame
+               ) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """KEY_COLS → integer codes shared by freq and sev; returns (freq, sev, codebook)."""
+    (freq, sev), codebook = encode_keys([freq, sev], KEY_COLS)
+    return freq, sev, codebook
+
+
 # ─────────────────────────────────────────────
 # 7. CROSS-IMPUTATION (freq ↔ sev via policy_id)
 # ─────────────────────────────────────────────
@@ -217,89 +330,100 @@ def cross_impute(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, p
 # 8. VALIDITY CHECKER (cross-dataset, Table 0)
 # ─────────────────────────────────────────────
 
-def _is_valid(series: pd.Series, col: str) -> pd.Series:
-    """Return boolean Series: True where the value meets the column's criteria."""
-    if col == "station_id":
-        return series.notna()
-    elif col == "solar_system":
-        return series.notna()
-    elif col == "production_load":
-        num = pd.to_numeric(series, errors="coerce")
-        return num.between(0, 1)
-    elif col in ("energy_backup_score", "safety_compliance"):
-        num = pd.to_numeric(series, errors="coerce")
-        return num.isin([1, 2, 3, 4, 5])
-    elif col == "exposure":
-        num = pd.to_numeric(series, errors="coerce")
-        return num.between(0, 1)
-    return pd.Series(True, index=series.index)
+def _checker_rules(cols: list[str] = SHARED_COLS) -> RuleSet:
+    """RULES restricted to the validity checker's columns."""
+    return RuleSet({col: RULES[col] for col in cols})
 
 
-def validity_checker(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+def _policy_validity(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    """
+    One grouped pass: per policy_id, True for each column where every row of
+    that policy meets the column's criteria. Rows keep first-appearance order.
+    """
+    valid = _checker_rules(cols).validity(df)
+    return valid.groupby(df["policy_id"], sort=False).all()
+
+
+def _policy_mode(df: pd.DataFrame, col: str, pids: pd.Index) -> pd.Series:
+    """
+    Most frequent value of `col` per policy_id (restricted to `pids`).
+    Ties resolve to the smallest value, matching Series.mode().iloc[0].
+    """
+    sub    = df.loc[df["policy_id"].isin(pids), ["policy_id", col]]
+    counts = sub.groupby(["policy_id", col], observed=True).size().reset_index(name="_n")
+    best   = counts.loc[counts.groupby("policy_id")["_n"].idxmax()]
+    return best.set_index("policy_id")[col]
+
+
+def _overwrite_from_mode(target: pd.DataFrame, source: pd.DataFrame,
+                         col: str, pids: pd.Index) -> None:
+    """Overwrite target[col] for `pids` with the per-policy mode of source[col] (in place)."""
+    if pids.empty:
+        return
+    representative = _policy_mode(source, col, pids)
+    rows = target["policy_id"].isin(representative.index)
+    target.loc[rows, col] = target.loc[rows, "policy_id"].map(representative)
+
+
+def _values_by_policy(df: pd.DataFrame, col: str, pids: pd.Index) -> pd.Series:
+    """All values of `col` per policy_id as lists (row order preserved)."""
+    sub = df.loc[df["policy_id"].isin(pids), ["policy_id", col]]
+    # agg(list) cannot rebuild a categorical from lists – report plain values
+    return sub[col].astype(object).groupby(sub["policy_id"], sort=False).agg(list)
+
+
+def validity_checker(freq: pd.DataFrame, sev: pd.DataFrame,
+                     diag: Diagnostics | None = None,
+                     codebook: pd.DataFrame | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     For each shared column + policy_id pair:
       - valid in both           → leave as is
       - valid in sev, not freq  → overwrite freq from sev
       - valid in freq, not sev  → overwrite sev from freq
-      - invalid in both         → print for manual resolution
+      - invalid in both         → reported through diag for manual resolution
+    Per-policy validity is computed in one grouped pass per frame and the
+    two sides are aligned with a join on policy_id (sev first-appearance order).
+    The codebook of encoded policy_ids is only needed to report conflicts.
     """
+    diag = diag or Diagnostics()
     freq = freq.copy()
     sev  = sev.copy()
 
-    checker_cols = ["station_id", "solar_system", "production_load",
-                    "energy_backup_score", "safety_compliance", "exposure"]
+    checker_cols = [c for c in SHARED_COLS if c in freq.columns and c in sev.columns]
 
-    conflicts = []
+    # Validity only depends on each column's own values, so it can be
+    # computed for every column up front, before any overwrite happens.
+    freq_ok = _policy_validity(freq, checker_cols)
+    sev_ok  = _policy_validity(sev,  checker_cols)
+    both    = sev_ok.join(freq_ok, how="inner", lsuffix="_sev", rsuffix="_freq")
 
     for col in checker_cols:
-        if col not in freq.columns or col not in sev.columns:
-            continue
-
-        # Build per-policy_id validity lookup for freq
-        freq_valid_map = freq.set_index("policy_id")[col].pipe(
-            lambda s: s.where(_is_valid(s, col))
-        )
-        sev_valid_map = sev.set_index("policy_id")[col].pipe(
-            lambda s: s.where(_is_valid(s, col))
-        )
-
-        # Align on policy_id
-        all_pids = sev["policy_id"].dropna().unique()
-        for pid in all_pids:
-            if pid not in freq_valid_map.index:
-                continue
-
-            f_val  = freq.loc[freq["policy_id"] == pid, col]
-            s_val  = sev.loc[sev["policy_id"]  == pid, col]
-            f_ok   = _is_valid(f_val, col).all()
-            s_ok   = _is_valid(s_val, col).all()
-
-            if f_ok and s_ok:
-                pass  # leave as is
-
-            elif s_ok and not f_ok:
-                # sev is valid → overwrite freq
-                representative = s_val.mode()
-                if not representative.empty:
-                    freq.loc[freq["policy_id"] == pid, col] = representative.iloc[0]
-
-            elif f_ok and not s_ok:
-                # freq is valid → overwrite sev
-                representative = f_val.mode()
-                if not representative.empty:
-                    sev.loc[sev["policy_id"] == pid, col] = representative.iloc[0]
-
-            else:
-                # neither is valid
-                conflicts.append({"policy_id": pid, "column": col,
-                                  "freq_value": f_val.values.tolist(),
-                                  "sev_value":  s_val.values.tolist()})
-
-    if conflicts:
-        print("=== Validity conflicts – resolve by hand ===")
-        print(pd.DataFrame(conflicts).to_string(index=False))
-    else:
-        print("No validity conflicts detected.")
+        f_ok = both[f"{col}_freq"]
+        s_ok = both[f"{col}_sev"]
+
+        # sev is valid → overwrite freq; freq is valid → overwrite sev
+        _overwrite_from_mode(freq, sev,  col, both.index[s_ok & ~f_ok])
+        _overwrite_from_mode(sev,  freq, col, both.index[f_ok & ~s_ok])
+
+    # Neither side valid. The overwrites above never touch these policies,
+    # so their values can be read after the loop.
+    def unresolved() -> dict[str, pd.Index]:
+        bad = {col: both.index[~both[f"{col}_freq"] & ~both[f"{col}_sev"]] for col in checker_cols}
+        return {col: pids for col, pids in bad.items() if not pids.empty}
+
+    def conflicts() -> pd.DataFrame:
+        frames = [pd.DataFrame({
+            "policy_id":  pids,
+            "column":     col,
+            "freq_value": _values_by_policy(freq, col, pids).reindex(pids).values,
+            "sev_value":  _values_by_policy(sev,  col, pids).reindex(pids).values,
+        }) for col, pids in unresolved().items()]
+        return decode_keys(pd.concat(frames, ignore_index=True), codebook) if frames else pd.DataFrame()
+
+    section = "validity_checker"
+    diag.metric(section, "conflicts per column",
+                lambda: {col: len(pids) for col, pids in unresolved().items()})
+    diag.detail(section, "conflicts (resolve by hand)", conflicts)
 
     return freq, sev
 
@@ -308,68 +432,14 @@ def validity_checker(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFram
 # 9. FREQ COLUMN IMPUTATION (Table 1)
 # ─────────────────────────────────────────────
 
-def _impute_col(series: pd.Series, col: str) -> pd.Series:
-    """Apply Table-1 imputation rules to a single freq column."""
-    s = series.copy()
-
-    if col == "station_id":
-        mode_val = s.mode().iloc[0] if not s.mode().empty else np.nan
-        s = s.fillna(mode_val)
-
-    elif col == "solar_system":
-        mode_val = s.mode().iloc[0] if not s.mode().empty else np.nan
-        s = s.fillna(mode_val)
-
-    elif col == "production_load":
-        num = pd.to_numeric(s, errors="coerce")
-        bad = ~num.between(0, 1) | num.isna()
-        s.loc[bad] = num.loc[~bad].median()
-
-    elif col == "energy_backup_score":
-        num = pd.to_numeric(s, errors="coerce")
-        bad = ~num.isin([1, 2, 3, 4, 5]) | num.isna()
-        s.loc[bad] = num.loc[~bad].median()
-
-    elif col == "supply_chain_index":
-        num = pd.to_numeric(s, errors="coerce")
-        bad = ~num.isin([1, 2, 3, 4, 5]) | num.isna()
-        s.loc[bad] = num.loc[~bad].median()
-
-    elif col == "avg_crew_exp":
-        num = pd.to_numeric(s, errors="coerce")
-        bad = ~num.between(1, 30) | num.isna()
-        s.loc[bad] = num.loc[~bad].median()
-
-    elif col == "maintenance_freq":
-        num = pd.to_numeric(s, errors="coerce")
-        bad = ~num.isin([0, 1, 2, 3, 4, 5, 6]) | num.isna()
-        s.loc[bad] = num.loc[~bad].median()
-
-    elif col == "safety_compliance":
-        num = pd.to_numeric(s, errors="coerce")
-        bad = ~num.isin([1, 2, 3, 4, 5]) | num.isna()
-        s.loc[bad] = num.loc[~bad].median()
-
-    elif col == "exposure":
-        num = pd.to_numeric(s, errors="coerce")
-        bad = ~num.between(0, 1) | num.isna()
-        s.loc[bad] = num.loc[~bad].median()
-
-    return s
-
-
-def impute_freq_columns(freq: pd.DataFrame) -> pd.DataFrame:
-    """Apply Table-1 imputation rules to all relevant freq columns."""
-    freq = freq.copy()
-    impute_cols = [
-        "station_id", "solar_system", "production_load", "energy_backup_score",
-        "supply_chain_index", "avg_crew_exp", "maintenance_freq",
-        "safety_compliance", "exposure",
-    ]
-    for col in impute_cols:
-        if col in freq.columns:
-            freq[col] = _impute_col(freq[col], col)
-    return freq
+def impute_freq_columns(freq: pd.DataFrame, fills: dict | None = None) -> pd.DataFrame:
+    """
+    Apply Table-1 imputation rules to all relevant freq columns: invalid or
+    missing cells get the mode (string columns) or the median of the
+    column's valid values, per RULES. A partitioned run passes the `fills`
+    of the whole freq (rules.FillStats).
+    """
+    return RuleSet(RULES).apply_fills(freq.copy(), fills=fills)
 
 
 # ─────────────────────────────────────────────
@@ -401,94 +471,454 @@ def aggregate_sev(sev: pd.DataFrame) -> pd.DataFrame:
 # 11. BUILD business_claims_merged
 # ─────────────────────────────────────────────
 
-def build_merged(freq: pd.DataFrame, sev: pd.DataFrame) -> pd.DataFrame:
+def build_merged(freq: pd.DataFrame, sev: pd.DataFrame,
+                 codebook: pd.DataFrame | None = None) -> pd.DataFrame:
     """
     Merge aggregated sev onto freq.
     Policies absent from sev get claim_count = 0 and claim_amount = 0.
     """
-    sev_agg = aggregate_sev(sev)
+    return merge_aggregates(freq, aggregate_sev(sev), codebook)
+
+
+def merge_aggregates(freq: pd.DataFrame, sev_agg: pd.DataFrame,
+                     codebook: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Left-join per-policy claim_count / claim_amount onto freq (0 where absent).
+    With the codebook of encoded policy_ids, the result carries the IDs again.
+    """
+    sev_agg = sev_agg[["policy_id", "claim_count", "claim_amount"]]
     merged  = freq.merge(sev_agg, on="policy_id", how="left")
     merged["claim_count"]  = merged["claim_count"].fillna(0).astype(int)
     merged["claim_amount"] = merged["claim_amount"].fillna(0.0)
-    return merged
+    return decode_keys(merged, codebook)
 
 
 # ─────────────────────────────────────────────
 # 12. NaN CHECK
 # ─────────────────────────────────────────────
 
-def check_nans(df: pd.DataFrame, name: str = "business_claims_merged") -> None:
-    """Print per-column NaN counts for the final dataset."""
-    nan_counts = df.isna().sum()
-    nan_counts = nan_counts[nan_counts > 0]
-    if nan_counts.empty:
-        print(f"{name}: No NaN values found.")
-    else:
-        print(f"\n=== NaN summary for {name} ===")
-        print(nan_counts.to_string())
+def check_nans(df: pd.DataFrame, name: str = "business_claims_merged",
+               diag: Diagnostics | None = None) -> None:
+    """Record per-column NaN counts for the final dataset (empty when none)."""
+    diag = diag or Diagnostics()
+    diag.metric("check_nans", f"{name} NaN counts", lambda: nan_counts(df))
 
 
 # ─────────────────────────────────────────────
 # 13. MAIN PIPELINE
 # ─────────────────────────────────────────────
 
-def run_pipeline(freq_path: str, sev_path: str, output_path: str = "business_claims_merged.csv") -> pd.DataFrame:
+def save_output(df: pd.DataFrame, output_path: str) -> None:
+    """Save the merged dataset (create output directory if it doesn't exist)."""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    write_output(df, output_path, sep=";")
+    print(f"\nSaved → {output_path}  ({len(df):,} rows × {df.shape[1]} cols)")
+
+
+def run_pipeline(freq_path: str | list[str], sev_path: str | list[str],
+                 output_path: str = "business_claims_merged.csv",
+                 chunksize: int | None = None,
+                 profile: bool | StepProfiler | None = None,
+                 cache: bool | str | StageCache | None = None,
+                 input_cache: bool | None = None,
+                 diagnostics: int | str | Diagnostics | None = None) -> pd.DataFrame:
     """
     Execute the full end-to-end data pipeline.
 
     Parameters
     ----------
-    freq_path   : path to the frequency CSV (semicolon-delimited, SA format)
-    sev_path    : path to the severity  CSV (semicolon-delimited, SA format)
-    output_path : destination path for the output CSV
+    freq_path   : path to the frequency CSV (semicolon-delimited, SA format),
+                  or a list of shards read as one file (see sa_csv.py)
+    sev_path    : path to the severity  CSV (semicolon-delimited, SA format),
+                  or a list of shards
+    output_path : destination path for the output CSV (.parquet: Parquet,
+                  see outputs.py)
+    chunksize   : if given, stream the sev file in chunks of this many rows
+                  (see run_pipeline_streaming)
+    profile     : True / a StepProfiler to time every step (see profiling.py);
+                  None follows the DATA_CLEAN_PROFILE environment variable
+    cache       : True / a directory / a StageCache to reuse unchanged stages
+                  (see stage_cache.py); None follows DATA_CLEAN_CACHE_DIR
+    input_cache : True to load the inputs from their parsed Arrow copies when
+                  current (see sa_csv.py); None follows DATA_CLEAN_INPUT_CACHE
+    diagnostics : level 0-2 / a Diagnostics to record sanity metrics and
+                  unresolved rows (see diagnostics.py); None follows
+                  DATA_CLEAN_DIAGNOSTICS
 
     Returns
     -------
     business_claims_merged : pd.DataFrame
     """
+    if chunksize:
+        return run_pipeline_streaming(freq_path, sev_path, output_path, chunksize, profile,
+                                      input_cache, diagnostics)
+
+    prof = StepProfiler.resolve(profile, "business")
+    steps = StageCache.resolve(cache, prof)
+    diag = Diagnostics.resolve(diagnostics, "business")
+
     # 1. Load
-    freq, sev = load_data(freq_path, sev_path)
+    freq, sev = steps.run("load", load_data, freq_path, sev_path, input_cache=input_cache)
 
     # 2. Assign deterministic policy_ids
-    freq = assign_policy_ids(freq)
+    freq = steps.run("assign_policy_ids", assign_policy_ids, freq)
 
     # 3. Drop unwanted columns
-    freq, sev = drop_columns(freq, sev)
+    freq, sev = steps.run("drop_columns", drop_columns, freq, sev)
 
     # 4. Cell cleaning (strip spaces + strip _???#### suffix)
-    freq, sev = clean_cells(freq, sev)
+    freq, sev = steps.run("clean_cells", clean_cells, freq, sev)
 
-    # 5. Numeric coercion + absolute values
-    freq = coerce_numerics(freq)
-    sev  = coerce_numerics(sev)
+    # 5. Numeric coercion + absolute values, low-cardinality strings → category
+    freq = steps.run("coerce_numerics (freq)", coerce_numerics, freq)
+    sev  = steps.run("coerce_numerics (sev)", coerce_numerics, sev)
+    freq, sev = steps.run("categorise", categorise, freq, sev)
 
-    # 6. Impute missing policy_id in sev; print unresolved for hand-fix
-    freq, sev = impute_sev_policy_id(freq, sev)
+    # 6. Impute missing policy_id in sev; report unresolved for hand-fix
+    freq, sev = steps.run("impute_sev_policy_id", impute_sev_policy_id, freq, sev, diag=diag)
     # ── hand-fix assumed to have occurred here ──
 
+    # 6b. policy_id → integer codes for every join up to the merge
+    freq, sev, codebook = steps.run("encode_ids", encode_ids, freq, sev)
+
     # 7. Cross-impute shared columns between freq and sev
-    freq, sev = cross_impute(freq, sev)
+    freq, sev = steps.run("cross_impute", cross_impute, freq, sev)
 
     # 8. Validity checker (Table 0 criteria, cross-dataset)
-    freq, sev = validity_checker(freq, sev)
+    freq, sev = steps.run("validity_checker", validity_checker, freq, sev, diag=diag,
+                          codebook=codebook)
 
     # 9. Freq column imputation (Table 1 criteria)
-    freq = impute_freq_columns(freq)
+    freq = steps.run("impute_freq_columns", impute_freq_columns, freq)
 
     # 10. Build final merged dataset
-    business_claims_merged = build_merged(freq, sev)
+    business_claims_merged = steps.run("build_merged", build_merged, freq, sev, codebook)
 
     # 11. NaN check
-    check_nans(business_claims_merged)
+    steps.run("check_nans", check_nans, business_claims_merged, diag=diag)
 
     # 12. Save (create output directory if it doesn't exist)
-    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    business_claims_merged.to_csv(output_path, index=False, sep=";")
-    print(f"\nSaved → {output_path}  ({len(business_claims_merged):,} rows × {business_claims_merged.shape[1]} cols)")
+    steps.run("save", save_output, business_claims_merged, output_path)
+
+    prof.finish()
+    steps.finish()
+    diag.finish(output_path)
+    return steps.value(business_claims_merged)
+
+
+# ─────────────────────────────────────────────
+# 14. STREAMING PIPELINE (sev read in chunks)
+# ─────────────────────────────────────────────
+
+def _clean_sev_chunk(chunk: pd.DataFrame, freq: pd.DataFrame,
+                     freq_lookup: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Steps 3–6 for one sev chunk, against the fully loaded and cleaned freq."""
+    chunk = chunk.drop(columns=["claim_id", "claim_seq"], errors="ignore")
+    chunk = strip_suffix(strip_spaces(chunk))
+    chunk = coerce_numerics(chunk)
+    chunk["claim_amount"] = pd.to_numeric(chunk["claim_amount"], errors="coerce")
+    _, chunk = impute_sev_policy_id(freq, chunk, freq_lookup)
+    return chunk
+
+
+def _load_clean_freq(freq_path: str | list[str], input_cache: bool | None = None) -> pd.DataFrame:
+    """Steps 1–5 for the freq file alone."""
+    freq = read_sa_csv(freq_path, FREQ_SCHEMA, cache=input_cache)
+    freq = assign_policy_ids(freq)
+    freq = freq.drop(columns=["claim_count"], errors="ignore")
+    return coerce_numerics(strip_suffix(strip_spaces(freq)))
+
+
+def _stream_sev(sev_path: str | list[str], freq: pd.DataFrame, chunksize: int) -> pd.DataFrame:
+    """Steps 3–6 per chunk, folded into per-policy partials."""
+    chunks = (_clean_sev_chunk(chunk, freq) for chunk in iter_sev_chunks(sev_path, chunksize))
+    sev = stream_aggregate(chunks, keys=["policy_id"], first_cols=SHARED_COLS)
+    return coerce_numerics(sev)
+
+
+def run_pipeline_streaming(freq_path: str | list[str], sev_path: str | list[str],
+                           output_path: str = "business_claims_merged.csv",
+                           chunksize: int = DEFAULT_CHUNKSIZE,
+                           profile: bool | StepProfiler | None = None,
+                           input_cache: bool | None = None,
+                           diagnostics: int | str | Diagnostics | None = None) -> pd.DataFrame:
+    """
+    Same steps as run_pipeline, but the sev file is read `chunksize` rows at a
+    time. Each chunk is cleaned and reduced to per-policy partials (claim_count,
+    claim_amount sum, first-seen shared columns); the remaining steps then run
+    against that one-row-per-policy sev, so memory is bounded by the chunk
+    size plus the freq side.
+
+    Because sev is collapsed before steps 7–8, the validity checker sees each
+    policy's first-seen sev values rather than every claim row. Diagnostics
+    cover the whole-frame steps; per-chunk policy_id imputation is not reported.
+    """
+    prof = StepProfiler.resolve(profile, "business (streaming)")
+    diag = Diagnostics.resolve(diagnostics, "business (streaming)")
+
+    # 1–5. Load + clean freq
+    freq = prof.run("load + clean freq", _load_clean_freq, freq_path, input_cache)
+
+    # 3–6 per chunk, then fold into per-policy partials
+    sev = prof.run("stream + aggregate sev", _stream_sev, sev_path, freq, chunksize)
+    freq, sev = prof.run("categorise", categorise, freq, sev)
+    freq, sev, codebook = prof.run("encode_ids", encode_ids, freq, sev)
+
+    # 7–9. Cross-impute, validity check, freq imputation
+    freq, sev = prof.run("cross_impute", cross_impute, freq, sev)
+    freq, sev = prof.run("validity_checker", validity_checker, freq, sev, diag=diag,
+                         codebook=codebook)
+    freq = prof.run("impute_freq_columns", impute_freq_columns, freq)
+
+    # 10–12. Merge pre-aggregated sev, NaN check, save
+    business_claims_merged = prof.run("merge_aggregates", merge_aggregates, freq, sev, codebook)
+    prof.run("check_nans", check_nans, business_claims_merged, diag=diag)
+    prof.run("save", save_output, business_claims_merged, output_path)
+
+    prof.finish()
+    diag.finish(output_path)
+    return business_claims_merged
+
+
+# ─────────────────────────────────────────────
+# 15. INCREMENTAL PIPELINE (new sev rows only)
+# ─────────────────────────────────────────────
+#
+# Sev rows only reach freq's attributes for "watched" policies: those whose
+# cleaned freq row fails a checker criterion (NaN included). For any other
+# policy, cross_impute has no NaN to fill and validity_checker never
+# overwrites freq, so new claims only change claim_count / claim_amount.
+#
+# The state directory therefore keeps the cleaned freq (steps 1–5), the
+# policy lookup, the running per-policy aggregates, the cleaned sev rows of
+# watched policies and the last freq result (steps 7–9). A delta is
+# cleaned against the stored freq and folded into the aggregates. Steps 7–9
+# are rerun (over freq + the watched sev rows) only when the delta touches
+# a watched policy. The merged output equals a full rerun over all sev rows.
+
+def _watched_policies(freq: pd.DataFrame) -> pd.DataFrame:
+    """policy_ids whose cleaned freq row fails any checker criterion."""
+    valid = _checker_rules().validity(freq)
+    return freq.loc[~valid.all(axis=1), ["policy_id"]].reset_index(drop=True)
+
+
+def _freq_side(freq: pd.DataFrame, sev_watch: pd.DataFrame) -> pd.DataFrame:
+    """Steps 5b and 7–9 against the watched policies' sev rows."""
+    freq, sev_watch = categorise(freq, sev_watch)
+    freq, sev_watch = cross_impute(freq, sev_watch)
+    freq, _ = validity_checker(freq, sev_watch)
+    return impute_freq_columns(freq)
+
+
+def _fold_sev_rows(frames: dict, sev_rows: pd.DataFrame) -> dict:
+    """Add cleaned sev rows to the aggregates; rerun steps 7–9 if a watched policy moved."""
+    frames = dict(frames)
+    frames["sev_agg"] = group_sum_state(sev_rows["policy_id"], sev_rows["claim_amount"],
+                                        frames.get("sev_agg"))
+
+    watched  = sev_rows.loc[sev_rows["policy_id"].isin(frames["watch"]["policy_id"])]
+    affected = sev_rows["policy_id"].dropna().nunique()
+    if "freq_final" in frames and watched.empty:
+        print(f"Delta: {len(sev_rows):,} sev rows, {affected:,} policies – counts/amounts only")
+        return frames
+
+    if "sev_watch" in frames:
+        watched = pd.concat([frames["sev_watch"], watched], ignore_index=True)
+    frames["sev_watch"]  = watched.reset_index(drop=True)
+    frames["freq_final"] = _freq_side(frames["freq_clean"], frames["sev_watch"])
+    print(f"Delta: {len(sev_rows):,} sev rows, {affected:,} policies – "
+          f"steps 7–9 rerun for {frames['sev_watch']['policy_id'].nunique():,} watched policies")
+    return frames
+
+
+def _merged_from_state(frames: dict) -> pd.DataFrame:
+    sev_agg = frames["sev_agg"].rename_axis("policy_id").reset_index()
+    return merge_aggregates(frames["freq_final"], sev_agg)
+
+
+def build_incremental_state(freq_path: str, sev_path: str, state_dir: str,
+                            output_path: str = "business_claims_merged.csv") -> pd.DataFrame:
+    """
+    Full run that also writes the state directory used by
+    run_pipeline_incremental. Returns (and saves) the merged dataset.
+    """
+    freq, sev = load_data(freq_path, sev_path)
+    freq = assign_policy_ids(freq)
+    freq, sev = drop_columns(freq, sev)
+    freq, sev = clean_cells(freq, sev)
+    freq = coerce_numerics(freq)
+    sev  = coerce_numerics(sev)
+    freq_lookup = build_policy_lookup(freq)
+    freq, sev = impute_sev_policy_id(freq, sev, freq_lookup)
 
+    frames = {"freq_clean": freq, "freq_lookup": freq_lookup, "watch": _watched_policies(freq)}
+    frames = _fold_sev_rows(frames, sev)
+
+    business_claims_merged = _merged_from_state(frames)
+    check_nans(business_claims_merged)
+    save_output(business_claims_merged, output_path)
+    save_state(state_dir, frames, {
+        "line":    "business",
+        "freq":    {"path": freq_path, "sha256": file_digest(freq_path)},
+        "sev":     [{"path": sev_path, "sha256": file_digest(sev_path), "rows": len(sev)}],
+    })
     return business_claims_merged
 
 
+def run_pipeline_incremental(new_sev_path: str, state_dir: str,
+                             output_path: str = "business_claims_merged.csv") -> pd.DataFrame:
+    """
+    Apply a file of newly arrived sev rows (same layout as the sev extract)
+    to the state written by build_incremental_state, then save the merged
+    dataset. A delta file whose contents were already applied is skipped.
+    """
+    frames, manifest = load_state(state_dir)
+    digest = file_digest(new_sev_path)
+
+    if any(entry["sha256"] == digest for entry in manifest["sev"]):
+        print(f"{new_sev_path} was already applied to {state_dir} – skipping")
+    else:
+        delta = read_sa_csv(new_sev_path, SEV_SCHEMA)
+        delta = _clean_sev_chunk(delta, frames["freq_clean"], frames["freq_lookup"])
+        frames = _fold_sev_rows(frames, delta)
+        manifest["sev"].append({"path": new_sev_path, "sha256": digest, "rows": len(delta)})
+        save_state(state_dir, frames, manifest)
+
+    business_claims_merged = _merged_from_state(frames)
+    check_nans(business_claims_merged)
+    save_output(business_claims_merged, output_path)
+    return business_claims_merged
+
+
+# ─────────────────────────────────────────────
+# 16. PARTITIONED PIPELINE (out of core, see partitioned.py)
+# ─────────────────────────────────────────────
+
+def _clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Steps 3–5 for one freq or sev chunk (categories come later, per partition)."""
+    chunk = chunk.drop(columns=["claim_count", "claim_id", "claim_seq"], errors="ignore")
+    return coerce_numerics(strip_suffix(strip_spaces(chunk)))
+
+
+def _partition_inputs(freq_path: str | list[str], sev_path: str | list[str],
+                      store: ChunkStore, partitions: int, chunksize: int
+                      ) -> tuple[int, dict[str, pd.CategoricalDtype]]:
+    """
+    Steps 1–6 as passes over the chunks, with freq and sev hash-partitioned
+    on policy_id (sev rows left without one take no further part in the
+    run). Step 6's lookup is a FirstMatch over freq for the keys sev misses.
+    Returns the freq row count and the shared category dtypes (step 5).
+    """
+    seen: dict[str, list] = {}
+
+    # 3–5 for sev, spilled until freq has been seen; the keys step 6 looks for
+    wanted = []
+    for chunk in iter_sev_chunks(sev_path, chunksize):
+        chunk = _clean_chunk(chunk)
+        store.append("sev_clean", chunk)
+        collect_categories(seen, chunk, CATEGORY_COLS)
+        wanted.append(_policy_keys(chunk.loc[chunk["policy_id"].isna()]).dropna().drop_duplicates())
+    lookup = FirstMatch("policy_id", POLICY_MATCH_COLS, wanted)
+
+    # 1–5 for freq, numbered in file order, straight into the partitions
+    n_rows = 0
+    for chunk in iter_sa_csv(freq_path, FREQ_SCHEMA, chunksize):
+        chunk = _clean_chunk(assign_policy_ids(chunk, start=n_rows + 1))
+        collect_categories(seen, chunk, CATEGORY_COLS)
+        lookup.update(_policy_keys(chunk).assign(policy_id=chunk["policy_id"]))
+        chunk[ROW] = np.arange(n_rows, n_rows + len(chunk))
+        store.append("freq", chunk, hash_partition(chunk["policy_id"], partitions))
+        n_rows += len(chunk)
+
+    # 6 for sev
+    for chunk in store.pieces("sev_clean"):
+        _, chunk = impute_sev_policy_id(None, chunk, lookup.lookup)
+        chunk = chunk.loc[chunk["policy_id"].notna()]
+        store.append("sev", chunk, hash_partition(chunk["policy_id"], partitions))
+
+    return n_rows, {col: union_dtype(values) for col, values in seen.items()}
+
+
+def _partition_policy_steps(part: int, store: ChunkStore,
+                            dtypes: dict[str, pd.CategoricalDtype]) -> FillStats:
+    """Steps 5b–8 for one partition, kept for _partition_merge."""
+    freq, sev = to_categorical([store.read("freq", part), store.read("sev", part)],
+                               CATEGORY_COLS, dtypes)
+    freq, sev, codebook = encode_ids(freq, sev)
+    freq, sev = cross_impute(freq, sev)
+    freq, sev = validity_checker(freq, sev)
+    store.save("policy_steps", part, (freq, sev, codebook))
+    return FillStats(RuleSet(RULES)).update(freq)   # for the whole book's step 9
+
+
+def _partition_merge(part: int, store: ChunkStore, fills: dict, n_rows: int,
+                     n_buckets: int) -> dict:
+    """Steps 9–10 for one partition, with the book's fills."""
+    freq, sev, codebook = store.load("policy_steps", part)
+    freq   = impute_freq_columns(freq, fills)
+    merged = build_merged(freq, sev, codebook)
+    store.append("merged", merged, row_buckets(merged[ROW], n_rows, n_buckets), tag=f"-{part:05d}")
+    return merged.dtypes.to_dict()
+
+
+def run_pipeline_partitioned(freq_path: str | list[str], sev_path: str | list[str],
+                             output_path: str = "business_claims_merged.csv",
+                             partitions: int | None = None,
+                             jobs: int = 1,
+                             chunksize: int = DEFAULT_CHUNKSIZE,
+                             profile: bool | StepProfiler | None = None,
+                             work_dir: str | None = None) -> SavedOutput:
+    """
+    Same steps and output as run_pipeline, without holding either file in
+    memory: the inputs are read `chunksize` rows at a time and the per-policy
+    steps (7–10) run on `partitions` hash partitions of policy_id (one per
+    DEFAULT_PARTITION_MB of input when None), `jobs` partitions at a time.
+
+    Parameters
+    ----------
+    work_dir : where the partitions are spilled (a temporary directory,
+               removed at the end); default: the output's directory
+
+    The step 9 fills are computed over the whole freq (rules.FillStats).
+    Diagnostics are not recorded in this mode.
+
+    Returns
+    -------
+    SavedOutput : the output path and row count (load() reads it back)
+    """
+    prof = StepProfiler.resolve(profile, "business (partitioned)")
+    partitions = partitions or partition_count([freq_path, sev_path])
+    work_dir = work_dir or os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(work_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix="business-partitions-", dir=work_dir) as root:
+        store = ChunkStore(root)
+
+        # 1–6. Stream, clean, impute sev policy_id, partition on policy_id
+        n_rows, dtypes = prof.run("stream + partition", _partition_inputs, freq_path, sev_path,
+                                  store, partitions, chunksize)
+
+        # 5b–8 per partition, then the fills of the whole freq
+        parts = prof.run("cross_impute + validity_checker", map_partitions,
+                         _partition_policy_steps, partitions, jobs, store, dtypes)
+        stats = FillStats(RuleSet(RULES))
+        for part_stats in parts:
+            stats.merge(part_stats)
+
+        # 9–10 per partition
+        merged = prof.run("impute_freq_columns + build_merged", map_partitions, _partition_merge,
+                          partitions, jobs, store, stats.fills(), n_rows, partitions)
+
+        # 12. Save, in input order
+        out_dtypes = common_dtypes(merged)
+        rows = prof.run("save", write_ordered, store, "merged", partitions, out_dtypes,
+                        output_path, sep=";")
+
+    print(f"\nSaved → {output_path}  ({rows:,} rows × {len(out_dtypes) - 1} cols)")
+    prof.finish()
+    return SavedOutput(output_path, rows, sep=";")
+
+
 # ─────────────────────────────────────────────
 # ENTRY POINT
 # ─────────────────────────────────────────────
@@ -5,13 +5,73 @@ Production-quality, vectorised pandas pipeline with modular functions,
 minimal printing, and deterministic cleaning steps.
 """
 
+import os
 import re
+import tempfile
+from typing import Iterator
+
 import numpy as np
 import pandas as pd
 
+from data_clean.categoricals import map_unique, to_categorical, union_dtype
+from data_clean.sa_csv import iter_sa_csv, read_sa_csv, read_sa_csvs
+from data_clean.diagnostics import Diagnostics, nan_counts
+from data_clean.key_codes import decode_keys, dictionary, encode_keys
+from data_clean.outputs import SavedOutput, write_output
+from data_clean.partitioned import (ROW, ChunkStore, FirstMatch, collect_categories, common_dtypes,
+                                    hash_partition, map_partitions, missing_keys, partition_count,
+                                    row_buckets, write_ordered)
+from data_clean.policy_index import PolicyIndex
+from data_clean.profiling import StepProfiler
+from data_clean.rules import FillStats, Rule, RuleSet
+from data_clean.stage_cache import StageCache
+from data_clean.streaming import DEFAULT_CHUNKSIZE, regroup, stream_aggregate
+
 
 # ── Constants ────────────────────────────────────────────────────────────────
 
+# Column layouts with their kinds for the typed reader (see sa_csv.py)
+FREQ_SCHEMA = {
+    "policy_id":        "str",
+    "shipment_id":      "str",
+    "cargo_type":       "str",
+    "cargo_value":      "float",
+    "weight":           "float",
+    "route_risk":       "score",
+    "distance":         "float",
+    "transit_duration": "float",
+    "pilot_experience": "float",
+    "vessel_age":       "float",
+    "container_type":   "str",
+    "solar_radiation":  "float",
+    "debris_density":   "float",
+    "exposure":         "float",
+    "claim_count":      "score",
+}
+
+SEV_SCHEMA = {
+    "claim_id":         "skip",
+    "claim_seq":        "skip",
+    "policy_id":        "str",
+    "shipment_id":      "str",
+    "cargo_type":       "str",
+    "cargo_value":      "float",
+    "weight":           "float",
+    "route_risk":       "score",
+    "distance":         "float",
+    "transit_duration": "float",
+    "pilot_experience": "float",
+    "vessel_age":       "float",
+    "container_type":   "str",
+    "solar_radiation":  "float",
+    "debris_density":   "float",
+    "exposure":         "float",
+    "claim_amount":     "float",
+}
+
+FREQ_COLS = list(FREQ_SCHEMA)
+SEV_COLS  = list(SEV_SCHEMA)
+
 CARGO_VALUE_MAP = {
     "gold":        135_600,
     "platinum":     54_500,
@@ -22,78 +82,62 @@ CARGO_VALUE_MAP = {
     "supplies":         10,
 }
 
+# Criteria (step 13) and freq fallback fill (step 15; mode / median of the
+# valid values) per column – compiled by rules.RuleSet
 CRITERIA = {
-    "cargo_type":        ("notnull", None),
-    "cargo_value":       ("range",   (0,    np.inf)),
-    "route_risk":        ("isin",    {1, 2, 3, 4, 5}),
-    "weight":            ("range",   (0,    np.inf)),
-    "distance":          ("range",   (1,    100)),
-    "transit_duration":  ("range",   (1,    60)),
-    "pilot_experience":  ("range",   (1,    30)),
-    "vessel_age":        ("range",   (1,    50)),
-    "container_type":    ("notnull", None),
-    "solar_radiation":   ("range",   (0,    1)),
-    "debris_density":    ("range",   (0,    1)),
-    "exposure":          ("range",   (0,    1)),
+    "cargo_type":        Rule("not_null",                  fill="mode"),
+    "cargo_value":       Rule("range",   (0,    np.inf)),
+    "route_risk":        Rule("isin",    {1, 2, 3, 4, 5},  fill="median"),
+    "weight":            Rule("range",   (0,    np.inf)),
+    "distance":          Rule("range",   (1,    100),      fill="median"),
+    "transit_duration":  Rule("range",   (1,    60),       fill="median"),
+    "pilot_experience":  Rule("range",   (1,    30),       fill="mode"),
+    "vessel_age":        Rule("range",   (1,    50),       fill="median"),
+    "container_type":    Rule("not_null",                  fill="mode"),
+    "solar_radiation":   Rule("range",   (0,    1),        fill="median"),
+    "debris_density":    Rule("range",   (0,    1),        fill="median"),
+    "exposure":          Rule("range",   (0,    1),        fill="median"),
 }
 
-FREQ_FILL_RULES = {
-    "cargo_type":       "mode",
-    "route_risk":       "median",
-    "distance":         "median",
-    "transit_duration": "median",
-    "pilot_experience": "mode",
-    "vessel_age":       "median",
-    "container_type":   "mode",
-    "solar_radiation":  "median",
-    "debris_density":   "median",
-    "exposure":         "median",
-}
+SUFFIX_PATTERN = r"_\?{3}\d{4}$"   # str, not re.compile: runs in Arrow's regex kernel
+
+# Low-cardinality string columns carried as `category` after step 4
+CATEGORY_COLS = ["cargo_type", "container_type"]
+
+# ID columns carried as integer codes from step 11b to the merge (see key_codes.py)
+KEY_COLS = ["shipment_id", "policy_id"]
 
-SUFFIX_PATTERN = re.compile(r"_\?{3}\d{4}$")
+# Placeholder IDs (steps 11 and 18) and the number they carry
+MI_PATTERN = re.compile(r"MI-(\d{4})")
 
 
 # ── Step 1 – Load data ───────────────────────────────────────────────────────
 
-def _read_sa_csv(path: str, **kwargs) -> pd.DataFrame:
-    """Read a South-African-format CSV (semicolon-delimited, comma decimals)."""
-    return (
-        pd.read_csv(path, sep=";", decimal=",", **kwargs)
-        .pipe(lambda df: df.apply(
-            lambda col: col.map(lambda x: str(x).replace(",", ".") if isinstance(x, str) else x)
-            if col.dtype == object else col
-        ))
-    )
-
-
-def load_data(freq_path: str, sev_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
-    freq_cols = [
-        "policy_id", "shipment_id", "cargo_type", "cargo_value", "weight",
-        "route_risk", "distance", "transit_duration", "pilot_experience",
-        "vessel_age", "container_type", "solar_radiation", "debris_density",
-        "exposure", "claim_count",
-    ]
-    sev_cols = [
-        "claim_id", "claim_seq", "policy_id", "shipment_id", "cargo_type",
-        "cargo_value", "weight", "route_risk", "distance", "transit_duration",
-        "pilot_experience", "vessel_age", "container_type", "solar_radiation",
-        "debris_density", "exposure", "claim_amount",
-    ]
-    freq = _read_sa_csv(freq_path, names=freq_cols, header=0)
-    sev  = _read_sa_csv(sev_path,  names=sev_cols,  header=0)
+def load_data(freq_path: str | list[str], sev_path: str | list[str],
+              input_cache: bool | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    freq, sev = read_sa_csvs([(freq_path, FREQ_SCHEMA), (sev_path, SEV_SCHEMA)], cache=input_cache)
     return freq, sev
 
 
+def iter_sev_chunks(sev_path: str | list[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield the sev file in chunks of `chunksize` rows, parsed as in load_data."""
+    yield from iter_sa_csv(sev_path, SEV_SCHEMA, chunksize)
+
+
 # ── Step 2 – Clean string columns ────────────────────────────────────────────
 
+def _clean_str_series(col: pd.Series) -> pd.Series:
+    return col.str.strip().str.replace(SUFFIX_PATTERN, "", regex=True)
+
+
 def _clean_string_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Strip whitespace and remove trailing _???#### suffixes from object cols."""
-    obj_cols = df.select_dtypes(include="object").columns
+    """
+    Strip whitespace and remove trailing _???#### suffixes from string cols.
+    Low-cardinality columns are cleaned once per distinct value (map_unique).
+    """
+    obj_cols = df.select_dtypes(include=["object", "str"]).columns
     df = df.copy()
-    df[obj_cols] = df[obj_cols].apply(lambda col: col.str.strip())
-    df[obj_cols] = df[obj_cols].apply(
-        lambda col: col.str.replace(SUFFIX_PATTERN, "", regex=True)
-    )
+    df[obj_cols] = df[obj_cols].apply(map_unique, fn=_clean_str_series)
     return df
 
 
@@ -114,162 +158,288 @@ def _abs_numeric(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+# ── Step 4b – Categorical dtypes ──────────────────────────────────────────────
+
+def categorise(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """CATEGORY_COLS → one shared category dtype in freq and sev."""
+    freq, sev = to_categorical([freq, sev], CATEGORY_COLS)
+    return freq, sev
+
+
 # ── Steps 5-8 – Cross-impute policy_id and shipment_id ───────────────────────
 
-def _build_lookup(src: pd.DataFrame, key: str, match_on: list[str]) -> pd.Series:
-    """Return a Series indexed by tuple(match_on) → key value (first non-null)."""
+def _build_lookup(src: pd.DataFrame, key: str, match_on: list[str]) -> pd.DataFrame:
+    """One row per match_on combination with its key value (first non-null), to join on."""
     valid = src.dropna(subset=[key] + match_on)
-    return valid.groupby(match_on)[key].first()
+    return valid.drop_duplicates(subset=match_on)[match_on + [key]]
 
 
 def _cross_impute(target: pd.DataFrame, source: pd.DataFrame,
                   key: str, match_on: list[str],
-                  print_remaining: bool = False,
-                  print_label: str = "") -> pd.DataFrame:
-    lookup = _build_lookup(source, key, match_on)
+                  diag: Diagnostics | None = None,
+                  section: str = "",
+                  lookup: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Fill NaN target[key] from the source row with the same match_on values,
+    via a left join of the NaN rows against _build_lookup(source, …). Pass a
+    prebuilt `lookup` to reuse it across calls with an unchanged source.
+    With a diag and a `section`, the rows left unresolved are reported.
+    """
     mask = target[key].isna()
     if mask.any():
-        idx_vals = target.loc[mask, match_on].apply(tuple, axis=1)
-        imputed  = idx_vals.map(lookup)
-        target   = target.copy()
-        target.loc[mask, key] = target.loc[mask, key].fillna(imputed)
-
-    if print_remaining and print_label:
-        still_nan = target.loc[target[key].isna(), match_on + [key]]
-        if not still_nan.empty:
-            print(f"\n{print_label}:\n{still_nan.to_string(index=True)}")
+        wanted = target.loc[mask, match_on]
+        # Only rows sharing a first match_on value can match: narrowing to
+        # them keeps the lookup build and join proportional to the gaps.
+        candidates = source if lookup is None else lookup
+        candidates = candidates.loc[candidates[match_on[0]].isin(wanted[match_on[0]].dropna().unique())]
+        if lookup is None:
+            candidates = _build_lookup(candidates, key, match_on)
+        imputed = wanted.merge(candidates, on=match_on, how="left")[key]
+        target  = target.copy()
+        target.loc[mask, key] = imputed.to_numpy()
+
+    if diag is not None and section:
+        diag.metric(section, f"{key} still NaN", lambda: int(target[key].isna().sum()))
+        diag.detail(section, "rows to fix by hand",
+                    lambda: target.loc[target[key].isna(), match_on + [key]])
     return target
 
 
 # ── Step 9 – Policy IDs in sev not in freq ───────────────────────────────────
 
-def report_sev_only_policies(sev: pd.DataFrame, freq: pd.DataFrame) -> None:
-    sev_ids  = set(sev["policy_id"].dropna())
-    freq_ids = set(freq["policy_id"].dropna())
-    only_sev = sorted(sev_ids - freq_ids)
-    print(f"\nPolicy IDs in sev but NOT in freq ({len(only_sev)}):\n{only_sev}")
+def _sev_only_policies(sev: pd.DataFrame, freq: pd.DataFrame) -> list[str]:
+    return sorted(set(sev["policy_id"].dropna()) - set(freq["policy_id"].dropna()))
+
+
+def report_sev_only_policies(sev: pd.DataFrame, freq: pd.DataFrame,
+                             diag: Diagnostics | None = None) -> None:
+    diag = diag or Diagnostics()
+    section = "sev-only policies"
+    diag.metric(section, "policy_ids in sev but not in freq",
+                lambda: len(_sev_only_policies(sev, freq)))
+    diag.detail(section, "policy_ids", lambda: _sev_only_policies(sev, freq))
 
 
 # ── Step 11 – Generate missing-ID placeholders in freq ───────────────────────
 
-def generate_missing_policy_ids(freq: pd.DataFrame) -> pd.DataFrame:
+def generate_missing_policy_ids(freq: pd.DataFrame, start: int = 1) -> pd.DataFrame:
     mask  = freq["policy_id"].isna()
     count = mask.sum()
     if count:
-        start = 1
         new_ids = [f"MI-{start + i:04d}" for i in range(count)]
         freq = freq.copy()
         freq.loc[mask, "policy_id"] = new_ids
     return freq
 
 
+def encode_ids(freq: pd.DataFrame, sev: pd.DataFrame
+               ) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Step 11b: KEY_COLS → integer codes shared by freq and sev; returns (freq, sev, codebook)."""
+    (freq, sev), codebook = encode_keys([freq, sev], KEY_COLS)
+    return freq, sev, codebook
+
+
 # ── Step 12 – General NaN imputation by policy_id ────────────────────────────
 
-def _impute_by_policy(target: pd.DataFrame, source: pd.DataFrame,
+def _impute_by_policy(index: PolicyIndex, target: str, source: str,
                       cols: list[str]) -> pd.DataFrame:
-    """For each col, fill NaN in target by looking up the same policy_id in source."""
-    target = target.copy()
-    src_lookup = source.dropna(subset=["policy_id"]).groupby("policy_id")[cols].first()
-
+    """For each col, fill NaN in the target frame from the same policy_id's first value in source."""
+    df = index.replace(target, index.frames[target].copy())
     for col in cols:
-        if col not in target.columns or col not in src_lookup.columns:
+        if col not in df.columns or col not in index.frames[source].columns:
             continue
-        mask = target[col].isna() & target["policy_id"].notna()
-        if mask.any():
-            target.loc[mask, col] = (
-                target.loc[mask, "policy_id"]
-                .map(src_lookup[col])
-                .combine_first(target.loc[mask, col])
-            )
-    return target
+        rows = np.flatnonzero(df[col].isna().to_numpy() & (index.rows[target] >= 0))
+        if len(rows):
+            index.fill(target, col, rows, source, index.first_valid(source, col))
+    return df
 
 
-def cross_impute_by_policy(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+def cross_impute_by_policy(freq: pd.DataFrame, sev: pd.DataFrame,
+                           index: PolicyIndex | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    index = PolicyIndex.ensure(index, freq, sev)
     shared_cols = [c for c in freq.columns if c in sev.columns and c != "policy_id"]
-    freq = _impute_by_policy(freq, sev,  shared_cols)
-    sev  = _impute_by_policy(sev,  freq, shared_cols)
+    freq = _impute_by_policy(index, "freq", "sev",  shared_cols)
+    sev  = _impute_by_policy(index, "sev",  "freq", shared_cols)
     return freq, sev
 
 
 # ── Step 13 – Criteria checker and cross-overwrite ───────────────────────────
 
-def _meets_criteria(series: pd.Series, rule: tuple) -> pd.Series:
-    kind, param = rule
-    if kind == "notnull":
-        return series.notna()
-    if kind == "range":
-        lo, hi = param
-        return series.between(lo, hi, inclusive="both")
-    if kind == "isin":
-        return series.isin(param)
-    return pd.Series(True, index=series.index)
-
-
-def _overwrite_col_by_policy(target: pd.DataFrame, source: pd.DataFrame,
-                              col: str, source_ok_mask: pd.Series,
-                              target_bad_mask: pd.Series) -> pd.DataFrame:
+def _overwrite_col_by_policy(index: PolicyIndex, target: str, source: str,
+                             col: str, source_ok_mask: pd.Series,
+                             target_bad_mask: pd.Series) -> None:
     """Overwrite target[col] entries where target fails and source passes, matched on policy_id."""
-    rows_to_fix = target_bad_mask & target["policy_id"].notna()
-    if not rows_to_fix.any():
-        return target
-    good_source = source.loc[source_ok_mask & source["policy_id"].notna()].copy()
-    src_lookup  = good_source.groupby("policy_id")[col].first()
-    target = target.copy()
-    target.loc[rows_to_fix, col] = (
-        target.loc[rows_to_fix, "policy_id"]
-        .map(src_lookup)
-        .combine_first(target.loc[rows_to_fix, col])
-    )
-    return target
-
-
-def run_criteria_checker(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
-    for col, rule in CRITERIA.items():
+    rows = np.flatnonzero(target_bad_mask.to_numpy() & (index.rows[target] >= 0))
+    if len(rows):
+        index.fill(target, col, rows, source, index.first_rows(source, source_ok_mask))
+
+
+def run_criteria_checker(freq: pd.DataFrame, sev: pd.DataFrame,
+                         index: PolicyIndex | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Each column's validity depends only on its own values: check every
+    # column of both frames once, up front, then overwrite column by column.
+    # Overwrites only touch failing cells, so the masks stay accurate for the
+    # passing cells the other frame reads from.
+    index   = PolicyIndex.ensure(index, freq, sev)
+    rules   = RuleSet(CRITERIA)
+    freq_ok = rules.validity(freq)
+    sev_ok  = rules.validity(sev)
+    freq = index.replace("freq", freq.copy())
+    sev  = index.replace("sev",  sev.copy())
+    for col in CRITERIA:
         if col not in freq.columns or col not in sev.columns:
             continue
-        freq_ok = _meets_criteria(freq[col], rule)
-        sev_ok  = _meets_criteria(sev[col],  rule)
         # sev ok, freq not → overwrite freq
-        freq = _overwrite_col_by_policy(freq, sev,  col, sev_ok,  ~freq_ok)
+        _overwrite_col_by_policy(index, "freq", "sev",  col, sev_ok[col],  ~freq_ok[col])
         # freq ok, sev not → overwrite sev
-        sev  = _overwrite_col_by_policy(sev,  freq, col, freq_ok, ~sev_ok)
+        _overwrite_col_by_policy(index, "sev",  "freq", col, freq_ok[col], ~sev_ok[col])
     return freq, sev
 
 
 # ── Step 14 – Fill cargo_value / weight from cargo_type ──────────────────────
 
-def _fill_cargo_value_weight(df: pd.DataFrame) -> pd.DataFrame:
+# Rows whose cargo_value and weight are both present but disagree with
+# CARGO_VALUE_MAP:
+#   off     left as they are (counted in the diagnostics)
+#   value   cargo_value rewritten as weight × rate
+#   weight  weight rewritten as cargo_value / rate
+RATE_FIXES   = ("off", "value", "weight")
+RATE_FIX_ENV = "DATA_CLEAN_CARGO_RATE_FIX"
+
+
+def resolve_rate_fix(rate_fix: str | None) -> str:
+    """rate_fix as given, or DATA_CLEAN_CARGO_RATE_FIX when None (default 'off')."""
+    fix = rate_fix or os.environ.get(RATE_FIX_ENV) or "off"
+    if fix not in RATE_FIXES:
+        raise ValueError(f"Unknown cargo rate fix {fix!r}; use one of {list(RATE_FIXES)}")
+    return fix
+
+
+def _rates_of(cargo_types: pd.Index) -> np.ndarray:
+    """CARGO_VALUE_MAP rate per distinct cargo_type, plus a trailing NaN for code -1 (missing)."""
+    rates = cargo_types.str.lower().str.strip().map(CARGO_VALUE_MAP).to_numpy(dtype=float)
+    return np.append(rates, np.nan)
+
+
+def _cargo_rates(*cargo_types: pd.Series) -> list[np.ndarray]:
+    """
+    The CARGO_VALUE_MAP rate of every row's cargo_type (NaN for other types),
+    per column given, looked up once per distinct value: categoricals on their
+    categories, once per dtype (freq and sev share one), plain columns on
+    their factorized uniques.
+    """
+    per_dtype, out = {}, []
+    for cargo_type in cargo_types:
+        if isinstance(cargo_type.dtype, pd.CategoricalDtype):
+            if cargo_type.dtype not in per_dtype:
+                per_dtype[cargo_type.dtype] = _rates_of(cargo_type.cat.categories)
+            out.append(per_dtype[cargo_type.dtype][cargo_type.cat.codes.to_numpy()])
+        else:
+            codes, uniques = pd.factorize(cargo_type)
+            out.append(_rates_of(pd.Index(uniques))[codes])
+    return out
+
+
+def _scaled(df: pd.DataFrame, source: str, rows: np.ndarray, rate: np.ndarray, scale) -> np.ndarray:
+    """df[source] × or ÷ the rate on `rows`."""
+    # the rate in the column's precision, as the scalar rates of the per-type loop were
+    factor = rate[rows].astype(np.result_type(df[source].dtype, np.float32))
+    return scale(df[source].to_numpy()[rows], factor)
+
+
+def _rate_mismatch_mask(df: pd.DataFrame, rate: np.ndarray) -> np.ndarray:
+    """Rows with both cargo_value and weight whose ratio is not their cargo_type's rate."""
+    value  = df["cargo_value"].to_numpy(dtype=float, na_value=np.nan)
+    weight = df["weight"].to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(invalid="ignore"):
+        return ~np.isnan(rate) & ~np.isnan(value) & ~np.isnan(weight) \
+               & ~np.isclose(value, weight * rate, rtol=1e-6)
+
+
+def _fill_from_rate(df: pd.DataFrame, rate: np.ndarray, rate_fix: str = "off"
+                    ) -> tuple[pd.DataFrame, int]:
+    """
+    Rewrite the rows disagreeing with the rate as rate_fix says, then
+    cargo_value = weight × rate where only weight is known and weight =
+    cargo_value / rate where only cargo_value is. Returns the frame and the
+    number of rows rewritten.
+    """
     df = df.copy()
-    for cargo, rate in CARGO_VALUE_MAP.items():
-        mask_type = df["cargo_type"].str.lower().str.strip() == cargo
-        # fill cargo_value from weight
-        mask = mask_type & df["cargo_value"].isna() & df["weight"].notna()
-        df.loc[mask, "cargo_value"] = df.loc[mask, "weight"] * rate
-        # fill weight from cargo_value
-        mask = mask_type & df["weight"].isna() & df["cargo_value"].notna()
-        df.loc[mask, "weight"] = df.loc[mask, "cargo_value"] / rate
-    return df
+    rewritten = 0
+    if rate_fix != "off":
+        off = _rate_mismatch_mask(df, rate)
+        rewritten = int(off.sum())
+        if rewritten:
+            target, source, scale = (("cargo_value", "weight", np.multiply) if rate_fix == "value"
+                                     else ("weight", "cargo_value", np.divide))
+            df.loc[off, target] = _scaled(df, source, off, rate, scale)
+
+    listed = ~np.isnan(rate)
+    for target, source, scale in [("cargo_value", "weight", np.multiply),
+                                  ("weight", "cargo_value", np.divide)]:
+        values = df[source].to_numpy(dtype=float, na_value=np.nan)
+        fill   = listed & df[target].isna().to_numpy() & ~np.isnan(values)
+        if fill.any():
+            df.loc[fill, target] = _scaled(df, source, fill, rate, scale)
+    return df, rewritten
+
+
+def _value_weight(frames: dict[str, pd.DataFrame], rate_fix: str,
+                  diag: Diagnostics | None = None
+                  ) -> tuple[dict[str, pd.DataFrame], dict[str, int]]:
+    """_fill_from_rate on each named frame; also returns the rows rewritten in each."""
+    diag  = diag or Diagnostics()
+    rates = dict(zip(frames, _cargo_rates(*(df["cargo_type"] for df in frames.values()))))
+    diag.metric("fill value/weight", "rows disagreeing with CARGO_VALUE_MAP",
+                lambda: {name: int(_rate_mismatch_mask(df, rates[name]).sum())
+                         for name, df in frames.items()})
+    diag.detail("fill value/weight", "disagreeing rows per cargo_type",
+                lambda: {name: df.loc[_rate_mismatch_mask(df, rates[name]), "cargo_type"]
+                                 .astype(object).value_counts().to_dict()
+                         for name, df in frames.items()})
+    filled = {name: _fill_from_rate(df, rates[name], rate_fix) for name, df in frames.items()}
+    return ({name: df for name, (df, _) in filled.items()},
+            {name: n for name, (_, n) in filled.items()})
+
+
+def _report_rewrites(rewritten: dict[str, int], rate_fix: str,
+                     diag: Diagnostics | None = None) -> None:
+    """Print (and record) the rows rate_fix rewrote per frame; nothing when it is 'off'."""
+    if rate_fix == "off":
+        return
+    column = "cargo_value" if rate_fix == "value" else "weight"
+    counts = ", ".join(f"{name} {n:,}" for name, n in rewritten.items())
+    print(f"  [value/weight] {column} rewritten from CARGO_VALUE_MAP in {counts} rows")
+    (diag or Diagnostics()).metric("fill value/weight", f"rows with {column} rewritten",
+                                   lambda: rewritten)
+
+
+def _fill_cargo_value_weight(freq: pd.DataFrame, sev: pd.DataFrame | None = None,
+                             diag: Diagnostics | None = None, rate_fix: str | None = None
+                             ) -> tuple[pd.DataFrame, pd.DataFrame | None]:
+    """
+    Step 14 on freq and sev (when given): fill cargo_value and weight from
+    each other through the cargo_type's rate, one pass per direction. Rows
+    where both are present but disagree with CARGO_VALUE_MAP are reported
+    (diagnostics) and by default not rewritten, as the rate cannot tell which
+    of the two is off; rate_fix (or DATA_CLEAN_CARGO_RATE_FIX) 'value' or
+    'weight' rewrites that column from the other (see RATE_FIXES).
+    """
+    rate_fix = resolve_rate_fix(rate_fix)
+    frames   = {"freq": freq} if sev is None else {"freq": freq, "sev": sev}
+    filled, rewritten = _value_weight(frames, rate_fix, diag)
+    _report_rewrites(rewritten, rate_fix, diag)
+    return filled["freq"], filled.get("sev")
 
 
 # ── Step 15 – Freq fallback imputation (mode / median) ───────────────────────
 
-def _freq_fallback_impute(freq: pd.DataFrame) -> pd.DataFrame:
-    freq = freq.copy()
-    for col, method in FREQ_FILL_RULES.items():
-        if col not in freq.columns:
-            continue
-        rule = CRITERIA.get(col)
-        if rule is None:
-            continue
-        bad_mask = ~_meets_criteria(freq[col], rule)
-        if not bad_mask.any():
-            continue
-        if method == "mode":
-            fill_val = freq.loc[~bad_mask, col].mode().iloc[0] if (~bad_mask).any() else np.nan
-        else:
-            fill_val = freq.loc[~bad_mask, col].median() if (~bad_mask).any() else np.nan
-        freq.loc[bad_mask, col] = fill_val
-    return freq
+def _freq_fallback_impute(freq: pd.DataFrame, fills: dict | None = None) -> pd.DataFrame:
+    """
+    Replace cells failing CRITERIA with their column's fill (mode / median of
+    the valid values, or the whole book's `fills` in a partitioned run).
+    """
+    return RuleSet(CRITERIA).apply_fills(freq.copy(), fills=fills)
 
 
 # ── Step 16 – Aggregate sev ──────────────────────────────────────────────────
@@ -278,9 +448,9 @@ def aggregate_sev(sev: pd.DataFrame) -> pd.DataFrame:
     keys = ["shipment_id", "policy_id"]
     # count before aggregating
     sev = sev.copy()
-    sev["_claim_count"] = sev.groupby(keys)["shipment_id"].transform("count")
+    sev["_claim_count"] = sev.groupby(keys).transform("size")
     non_numeric = sev.select_dtypes(include="object").columns.difference(keys).tolist()
-    numeric     = sev.select_dtypes(include="number").columns.difference(["_claim_count"]).tolist()
+    numeric     = sev.select_dtypes(include="number").columns.difference(["_claim_count", *keys]).tolist()
 
     agg_dict = {col: "first" for col in non_numeric}
     agg_dict.update({col: "sum" if col == "claim_amount" else "first" for col in numeric})
@@ -293,32 +463,37 @@ def aggregate_sev(sev: pd.DataFrame) -> pd.DataFrame:
 
 # ── Step 17-18 – Merge and final check ───────────────────────────────────────
 
-def merge_datasets(freq: pd.DataFrame, sev: pd.DataFrame) -> pd.DataFrame:
+def merge_datasets(freq: pd.DataFrame, sev: pd.DataFrame,
+                   codebook: pd.DataFrame | None = None,
+                   diag: Diagnostics | None = None) -> pd.DataFrame:
+    diag = diag or Diagnostics()
     merge_keys = ["shipment_id", "policy_id"]
 
     # Only bring claim_amount and claim_count from sev
     sev_slim = sev[merge_keys + ["claim_amount", "claim_count"]].copy()
 
     merged = freq.merge(sev_slim, on=merge_keys, how="left")
+    merged = decode_keys(merged, codebook)
 
     # ── freq rows with no matching sev record → claim_amount = 0, claim_count = 0 ──
     no_claim_mask = merged["claim_amount"].isna()
     merged.loc[no_claim_mask, "claim_amount"] = 0.0
     merged.loc[no_claim_mask, "claim_count"]  = 0
 
-    # ── Print policy_ids with NaN weight ─────────────────────────────────────
-    nan_weight_ids = merged.loc[merged["weight"].isna(), "policy_id"].dropna().unique()
-    if len(nan_weight_ids):
-        print(f"\nPolicy IDs with NaN weight ({len(nan_weight_ids)}):\n{sorted(nan_weight_ids)}")
+    # ── Report policy_ids with NaN weight ────────────────────────────────────
+    def nan_weight_ids() -> list[str]:
+        return sorted(merged.loc[merged["weight"].isna(), "policy_id"].dropna().unique())
+
+    diag.metric("merge", "policy_ids with NaN weight", lambda: len(nan_weight_ids()))
+    diag.detail("merge", "NaN-weight policy_ids", nan_weight_ids)
 
     # ── Generate MI-#### for NaN shipment_id ──────────────────────────────────
     nan_ship_mask = merged["shipment_id"].isna()
     if nan_ship_mask.any():
         # Find the highest existing MI- number across both shipment_id and policy_id
-        mi_pattern = re.compile(r"MI-(\d{4})")
         existing_nums = (
             merged[["shipment_id", "policy_id"]]
-            .apply(lambda col: col.dropna().str.extract(mi_pattern, expand=False))
+            .apply(lambda col: col.dropna().str.extract(MI_PATTERN, expand=False))
             .stack()
             .dropna()
             .astype(int)
@@ -328,87 +503,394 @@ def merge_datasets(freq: pd.DataFrame, sev: pd.DataFrame) -> pd.DataFrame:
         merged.loc[nan_ship_mask, "shipment_id"] = new_ids
 
     # ── NaN report ────────────────────────────────────────────────────────────
-    nan_summary = merged.isna().sum()
-    nan_summary = nan_summary[nan_summary > 0]
-    if not nan_summary.empty:
-        print(f"\nNaN summary in cargo_claims_merged:\n{nan_summary.to_string()}")
-    else:
-        print("\nNo NaNs detected in cargo_claims_merged.")
+    diag.metric("merge", "cargo_claims_merged NaN counts", lambda: nan_counts(merged))
 
     return merged
 
 
 # ── Main pipeline ─────────────────────────────────────────────────────────────
 
-def run_pipeline(freq_path: str, sev_path: str,
-                 output_path: str = "cargo_claims_merged.csv") -> pd.DataFrame:
+def save_output(cargo_claims_merged: pd.DataFrame, output_path: str) -> None:
+    write_output(cargo_claims_merged, output_path)
+    print(f"\nSaved → {output_path}  ({len(cargo_claims_merged):,} rows)")
+
+    # total
+    print(f"Total claim_amount: {cargo_claims_merged['claim_amount'].sum():,.2f}")
+
+
+def run_pipeline(freq_path: str | list[str], sev_path: str | list[str],
+                 output_path: str = "cargo_claims_merged.csv",
+                 chunksize: int | None = None,
+                 profile: bool | StepProfiler | None = None,
+                 cache: bool | str | StageCache | None = None,
+                 input_cache: bool | None = None,
+                 diagnostics: int | str | Diagnostics | None = None,
+                 rate_fix: str | None = None) -> pd.DataFrame:
+
+    if chunksize:
+        return run_pipeline_streaming(freq_path, sev_path, output_path, chunksize, profile,
+                                      input_cache, diagnostics, rate_fix)
+
+    # profile=True (or DATA_CLEAN_PROFILE=1) times every step – see profiling.py
+    # cache=True (or DATA_CLEAN_CACHE_DIR) reuses unchanged stages – see stage_cache.py
+    # input_cache=True (or DATA_CLEAN_INPUT_CACHE=1) loads parsed Arrow copies – see sa_csv.py
+    # diagnostics=1|2 (or DATA_CLEAN_DIAGNOSTICS) records sanity metrics – see diagnostics.py
+    # rate_fix (or DATA_CLEAN_CARGO_RATE_FIX) rewrites rows off CARGO_VALUE_MAP – see RATE_FIXES
+    prof = StepProfiler.resolve(profile, "cargo")
+    steps = StageCache.resolve(cache, prof)
+    diag = Diagnostics.resolve(diagnostics, "cargo")
+    rate_fix = resolve_rate_fix(rate_fix)
 
     # 1 – Load
-    freq, sev = load_data(freq_path, sev_path)
+    freq, sev = steps.run("1 load", load_data, freq_path, sev_path, input_cache=input_cache)
 
     # 2 – Clean string columns
-    freq = _clean_string_columns(freq)
-    sev  = _clean_string_columns(sev)
+    freq = steps.run("2 clean strings (freq)", _clean_string_columns, freq)
+    sev  = steps.run("2 clean strings (sev)",  _clean_string_columns, sev)
 
     # 3 – Drop columns
-    freq, sev = drop_columns(freq, sev)
+    freq, sev = steps.run("3 drop columns", drop_columns, freq, sev)
 
     # 4 – Absolute values
-    freq = _abs_numeric(freq)
-    sev  = _abs_numeric(sev)
+    freq = steps.run("4 abs (freq)", _abs_numeric, freq)
+    sev  = steps.run("4 abs (sev)",  _abs_numeric, sev)
+
+    # 4b – Low-cardinality strings → category
+    freq, sev = steps.run("4b categorise", categorise, freq, sev)
 
     # 5 – Impute sev policy_id from freq
-    sev = _cross_impute(sev, freq, key="policy_id", match_on=["shipment_id", "cargo_type"],
-                        print_remaining=True,
-                        print_label="sev policy_id still NaN after imputation – fix by hand")
+    sev = steps.run("5 impute sev policy_id", _cross_impute, sev, freq,
+                   key="policy_id", match_on=["shipment_id", "cargo_type"],
+                   diag=diag, section="impute sev policy_id")
 
     # 6 – Impute freq policy_id from sev
-    freq = _cross_impute(freq, sev, key="policy_id", match_on=["shipment_id", "cargo_type"])
+    freq = steps.run("6 impute freq policy_id", _cross_impute, freq, sev,
+                    key="policy_id", match_on=["shipment_id", "cargo_type"])
 
     # 7 – Impute sev shipment_id from freq
-    sev = _cross_impute(sev, freq, key="shipment_id", match_on=["policy_id", "cargo_type"],
-                        print_remaining=True,
-                        print_label="sev shipment_id still NaN after imputation – fix by hand")
+    sev = steps.run("7 impute sev shipment_id", _cross_impute, sev, freq,
+                   key="shipment_id", match_on=["policy_id", "cargo_type"],
+                   diag=diag, section="impute sev shipment_id")
 
     # 8 – Impute freq shipment_id from sev
-    freq = _cross_impute(freq, sev, key="shipment_id", match_on=["policy_id", "cargo_type"])
+    freq = steps.run("8 impute freq shipment_id", _cross_impute, freq, sev,
+                    key="shipment_id", match_on=["policy_id", "cargo_type"])
 
     # 9 – Report policies in sev not in freq
-    report_sev_only_policies(sev, freq)
+    steps.run("9 report sev-only policies", report_sev_only_policies, sev, freq, diag=diag)
 
     # 10 – Drop zero claim_amount rows in sev
-    sev = sev.loc[sev["claim_amount"] != 0].copy()
+    sev = steps.run("10 drop zero claims", lambda df: df.loc[df["claim_amount"] != 0].copy(), sev)
 
     # 11 – Generate MI-#### for still-missing freq policy_ids
-    freq = generate_missing_policy_ids(freq)
+    freq = steps.run("11 generate policy_ids", generate_missing_policy_ids, freq)
+
+    # 11b – IDs → integer codes for every join up to the merge
+    freq, sev, codebook = steps.run("11b encode ids", encode_ids, freq, sev)
+
+    # 11c – Row positions per policy_id, shared by steps 12-13
+    index = steps.run("11c policy index", PolicyIndex, freq, sev)
 
     # 12 – General cross-imputation by policy_id
-    freq, sev = cross_impute_by_policy(freq, sev)
+    freq, sev = steps.run("12 cross-impute by policy", cross_impute_by_policy, freq, sev, index)
 
     # 13 – Criteria checker and cross-overwrite
-    freq, sev = run_criteria_checker(freq, sev)
+    freq, sev = steps.run("13 criteria checker", run_criteria_checker, freq, sev, index)
 
     # 14 – Fill cargo_value / weight from cargo_type
-    freq = _fill_cargo_value_weight(freq)
-    sev  = _fill_cargo_value_weight(sev)
+    freq, sev = steps.run("14 fill value/weight", _fill_cargo_value_weight, freq, sev, diag=diag,
+                          rate_fix=rate_fix)
 
     # 15 – Freq fallback imputation (mode / median)
-    freq = _freq_fallback_impute(freq)
+    freq = steps.run("15 freq fallback impute", _freq_fallback_impute, freq)
 
     # 16 – Aggregate sev
-    sev = aggregate_sev(sev)
+    sev = steps.run("16 aggregate sev", aggregate_sev, sev)
 
     # 17-18 – Merge and NaN check
-    cargo_claims_merged = merge_datasets(freq, sev)
+    cargo_claims_merged = steps.run("17-18 merge", merge_datasets, freq, sev, codebook,
+                                    diag=diag)
 
     # 19 – Save
-    cargo_claims_merged.to_csv(output_path, index=False)
-    print(f"\nSaved → {output_path}  ({len(cargo_claims_merged):,} rows)")
+    steps.run("19 save", save_output, cargo_claims_merged, output_path)
+
+    prof.finish()
+    steps.finish()
+    diag.finish(output_path)
+    return steps.value(cargo_claims_merged)
+
+
+# ── Streaming pipeline (sev read in chunks) ───────────────────────────────────
+
+def _freq_lookups(freq: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """The step 5 and step 7 lookups over freq, built once for all sev chunks."""
+    return (_build_lookup(freq, "policy_id", ["shipment_id", "cargo_type"]),
+            _build_lookup(freq, "shipment_id", ["policy_id", "cargo_type"]))
+
+
+def _clean_sev_chunk(chunk: pd.DataFrame, freq: pd.DataFrame,
+                     lookups: tuple[pd.DataFrame, pd.DataFrame] | None = None) -> pd.DataFrame:
+    """Steps 2-5, 7 and 10 for one sev chunk, against the fully cleaned freq."""
+    policy_lookup, id_lookup = lookups or (None, None)
+    chunk = _clean_string_columns(chunk)
+    chunk = chunk.drop(columns=["claim_id", "claim_seq"], errors="ignore")
+    chunk = _abs_numeric(chunk)
+    chunk = _cross_impute(chunk, freq, key="policy_id", match_on=["shipment_id", "cargo_type"],
+                          lookup=policy_lookup)
+    chunk = _cross_impute(chunk, freq, key="shipment_id", match_on=["policy_id", "cargo_type"],
+                          lookup=id_lookup)
+    return chunk.loc[chunk["claim_amount"] != 0]
+
+
+def _load_clean_freq(freq_path: str | list[str], input_cache: bool | None = None) -> pd.DataFrame:
+    """Steps 1-4 for the freq file alone."""
+    freq = read_sa_csv(freq_path, FREQ_SCHEMA, cache=input_cache)
+    freq = _clean_string_columns(freq).drop(columns=["claim_count"], errors="ignore")
+    return _abs_numeric(freq)
+
+
+def run_pipeline_streaming(freq_path: str | list[str], sev_path: str | list[str],
+                           output_path: str = "cargo_claims_merged.csv",
+                           chunksize: int = DEFAULT_CHUNKSIZE,
+                           profile: bool | StepProfiler | None = None,
+                           input_cache: bool | None = None,
+                           diagnostics: int | str | Diagnostics | None = None,
+                           rate_fix: str | None = None) -> pd.DataFrame:
+    """
+    Same steps as run_pipeline, but the sev file is read `chunksize` rows at a
+    time. Each chunk is cleaned and reduced to per-(shipment_id, policy_id)
+    partials (claim_count, claim_amount sum, first-seen shared columns); the
+    freq-side steps then use that aggregated sev, so memory is bounded by the
+    chunk size plus the freq side. Sev IDs are imputed against freq before
+    freq's own IDs are filled from sev (steps 6 and 8 run after the stream).
+    Diagnostics cover the whole-frame steps; per-chunk ID imputation is not
+    reported.
+    """
+    prof = StepProfiler.resolve(profile, "cargo (streaming)")
+    diag = Diagnostics.resolve(diagnostics, "cargo (streaming)")
+    rate_fix = resolve_rate_fix(rate_fix)
+
+    # 1-4 – Load and clean freq
+    freq = prof.run("1-4 load + clean freq", _load_clean_freq, freq_path, input_cache)
+
+    # 5, 7, 10 per chunk, folded into per-key partials (step 16). NaN keys
+    # are kept until step 12 has had its chance to fill sev shipment_ids.
+    keys        = ["shipment_id", "policy_id"]
+    shared_cols = [c for c in freq.columns if c in SEV_COLS and c not in keys]
+    lookups = _freq_lookups(freq)
+    chunks  = (_clean_sev_chunk(chunk, freq, lookups) for chunk in iter_sev_chunks(sev_path, chunksize))
+    sev     = prof.run("5, 7, 10, 16 stream + aggregate sev", stream_aggregate, chunks,
+                       keys=keys, first_cols=shared_cols, dropna=False)
+    freq, sev = prof.run("4b categorise", categorise, freq, sev)
+
+    # 6, 8 – Impute freq policy_id / shipment_id from aggregated sev
+    freq = prof.run("6 impute freq policy_id", _cross_impute, freq, sev,
+                    key="policy_id", match_on=["shipment_id", "cargo_type"])
+    freq = prof.run("8 impute freq shipment_id", _cross_impute, freq, sev,
+                    key="shipment_id", match_on=["policy_id", "cargo_type"])
+
+    # 9, 11-15 – Report, placeholders, cross-imputation, criteria, fills
+    prof.run("9 report sev-only policies", report_sev_only_policies, sev, freq, diag=diag)
+    freq = prof.run("11 generate policy_ids", generate_missing_policy_ids, freq)
+    freq, sev, codebook = prof.run("11b encode ids", encode_ids, freq, sev)
+    index     = prof.run("11c policy index", PolicyIndex, freq, sev)
+    freq, sev = prof.run("12 cross-impute by policy", cross_impute_by_policy, freq, sev, index)
+    sev = prof.run("12 regroup sev", regroup, sev, keys)
+    freq, sev = prof.run("13 criteria checker", run_criteria_checker, freq, sev)  # indexes the regrouped sev
+    freq, _ = prof.run("14 fill value/weight (freq)", _fill_cargo_value_weight, freq, diag=diag,
+                       rate_fix=rate_fix)
+    freq = prof.run("15 freq fallback impute", _freq_fallback_impute, freq)
+
+    # 17-19 – Merge, NaN check, save
+    cargo_claims_merged = prof.run("17-18 merge", merge_datasets, freq, sev, codebook,
+                                   diag=diag)
+    prof.run("19 save", save_output, cargo_claims_merged, output_path)
+
+    prof.finish()
+    diag.finish(output_path)
+    return cargo_claims_merged
 
-    # total
-    print(f"Total claim_amount: {cargo_claims_merged['claim_amount'].sum():,.2f}")
 
-    return cargo_claims_merged
+# ── Partitioned pipeline (out of core, see partitioned.py) ───────────────────
+
+def _clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Steps 2-4 for one freq or sev chunk."""
+    chunk = _clean_string_columns(chunk)
+    chunk = chunk.drop(columns=["claim_count", "claim_id", "claim_seq"], errors="ignore")
+    return _abs_numeric(chunk)
+
+
+def _partition_inputs(freq_path: str | list[str], sev_path: str | list[str],
+                      store: ChunkStore, partitions: int, chunksize: int
+                      ) -> tuple[int, dict[str, pd.CategoricalDtype]]:
+    """
+    Steps 1-8, 10 and 11 as passes over the cleaned chunks, then freq and sev
+    hash-partitioned on policy_id (sev rows without one take no further part
+    in the run). Each ID step is a FirstMatch against the previous pass.
+    Returns the freq row count and the shared category dtypes (step 4b).
+    """
+    policy_match, id_match = ["shipment_id", "cargo_type"], ["policy_id", "cargo_type"]
+    seen: dict[str, list] = {}
+
+    # 1-4 – Clean and spill both files; the sev policy_ids step 5 looks for
+    wanted = []
+    for chunk in iter_sev_chunks(sev_path, chunksize):
+        chunk = _clean_chunk(chunk)
+        store.append("sev_clean", chunk)
+        collect_categories(seen, chunk, CATEGORY_COLS)
+        wanted.append(missing_keys(chunk, "policy_id", policy_match))
+    sev_policy = FirstMatch("policy_id", policy_match, wanted)
+    wanted = []
+    for chunk in iter_sa_csv(freq_path, FREQ_SCHEMA, chunksize):
+        chunk = _clean_chunk(chunk)
+        store.append("freq_clean", chunk)
+        collect_categories(seen, chunk, CATEGORY_COLS)
+        sev_policy.update(chunk)
+        wanted.append(missing_keys(chunk, "policy_id", policy_match))
+    freq_policy = FirstMatch("policy_id", policy_match, wanted)
+
+    # 5 – sev policy_id, looking for the freq policy_ids of step 6
+    wanted = []
+    for chunk in store.pieces("sev_clean"):
+        chunk = _cross_impute(chunk, None, "policy_id", policy_match, lookup=sev_policy.lookup)
+        freq_policy.update(chunk)
+        wanted.append(missing_keys(chunk, "shipment_id", id_match))
+    sev_id = FirstMatch("shipment_id", id_match, wanted)
+
+    # 6 – freq policy_id, looking for the sev shipment_ids of step 7
+    wanted = []
+    for chunk in store.pieces("freq_clean"):
+        chunk = _cross_impute(chunk, None, "policy_id", policy_match, lookup=freq_policy.lookup)
+        sev_id.update(chunk)
+        wanted.append(missing_keys(chunk, "shipment_id", id_match))
+    freq_id = FirstMatch("shipment_id", id_match, wanted)
+
+    # 5, 7, 10 – sev IDs, looking for the freq shipment_ids of step 8; partition
+    for chunk in store.pieces("sev_clean"):
+        chunk = _cross_impute(chunk, None, "policy_id", policy_match, lookup=sev_policy.lookup)
+        chunk = _cross_impute(chunk, None, "shipment_id", id_match, lookup=sev_id.lookup)
+        freq_id.update(chunk)
+        chunk = chunk.loc[(chunk["claim_amount"] != 0) & chunk["policy_id"].notna()]
+        store.append("sev", chunk, hash_partition(chunk["policy_id"], partitions))
+
+    # 6, 8, 11 – freq IDs and MI-#### placeholders, numbered in file order; partition
+    n_rows, n_generated = 0, 0
+    for chunk in store.pieces("freq_clean"):
+        chunk = _cross_impute(chunk, None, "policy_id", policy_match, lookup=freq_policy.lookup)
+        chunk = _cross_impute(chunk, None, "shipment_id", id_match, lookup=freq_id.lookup)
+        missing = int(chunk["policy_id"].isna().sum())
+        chunk = generate_missing_policy_ids(chunk, start=n_generated + 1)
+        chunk[ROW] = np.arange(n_rows, n_rows + len(chunk))
+        store.append("freq", chunk, hash_partition(chunk["policy_id"], partitions))
+        n_rows, n_generated = n_rows + len(chunk), n_generated + missing
+
+    return n_rows, {col: union_dtype(values) for col, values in seen.items()}
+
+
+def _max_mi_number(freq: pd.DataFrame, codebook: pd.DataFrame) -> int:
+    """The highest MI-#### number among freq's (encoded) shipment_ids and policy_ids, 0 if none."""
+    top = 0
+    for col in ["shipment_id", "policy_id"]:
+        codes = pd.unique(freq[col].dropna().to_numpy(dtype=np.int64))
+        nums  = dictionary(codebook, col)[codes].str.extract(MI_PATTERN, expand=False).dropna()
+        if not nums.empty:
+            top = max(top, int(nums.astype(int).max()))
+    return top
+
+
+def _partition_policy_steps(part: int, store: ChunkStore,
+                            dtypes: dict[str, pd.CategoricalDtype], rate_fix: str) -> tuple:
+    """Steps 4b and 11b-14 for one partition, kept for _partition_merge."""
+    freq, sev = to_categorical([store.read("freq", part), store.read("sev", part)],
+                               CATEGORY_COLS, dtypes)
+    freq, sev, codebook = encode_ids(freq, sev)
+    index = PolicyIndex(freq, sev)
+    freq, sev = cross_impute_by_policy(freq, sev, index)
+    freq, sev = run_criteria_checker(freq, sev, index)
+    frames, rewritten = _value_weight({"freq": freq, "sev": sev}, rate_fix)
+    freq, sev = frames["freq"], frames["sev"]
+    store.save("policy_steps", part, (freq, sev, codebook))
+    # what the whole book's steps 15 and 18 need from this partition
+    stats = FillStats(RuleSet(CRITERIA)).update(freq)
+    return (stats, freq.loc[freq["shipment_id"].isna(), ROW].to_numpy(),
+            _max_mi_number(freq, codebook), rewritten)
+
+
+def _partition_merge(part: int, store: ChunkStore, fills: dict, n_rows: int,
+                     n_buckets: int) -> tuple[dict, float]:
+    """Steps 15-18 for one partition, with the book's fills and MI-#### shipment_ids."""
+    freq, sev, codebook = store.load("policy_steps", part)
+    freq   = _freq_fallback_impute(freq, fills)
+    sev    = aggregate_sev(sev)
+    merged = merge_datasets(freq, sev, codebook)
+    no_shipment = freq["shipment_id"].isna().to_numpy()
+    if no_shipment.any():
+        shipment_ids = store.load("shipment_ids", part)
+        merged.loc[no_shipment, "shipment_id"] = merged.loc[no_shipment, ROW].map(shipment_ids).to_numpy()
+    store.append("merged", merged, row_buckets(merged[ROW], n_rows, n_buckets), tag=f"-{part:05d}")
+    return merged.dtypes.to_dict(), float(merged["claim_amount"].sum())
+
+
+def run_pipeline_partitioned(freq_path: str | list[str], sev_path: str | list[str],
+                             output_path: str = "cargo_claims_merged.csv",
+                             partitions: int | None = None,
+                             jobs: int = 1,
+                             chunksize: int = DEFAULT_CHUNKSIZE,
+                             profile: bool | StepProfiler | None = None,
+                             work_dir: str | None = None,
+                             rate_fix: str | None = None) -> SavedOutput:
+    """
+    Same steps and output as run_pipeline, out of core: the inputs are read
+    `chunksize` rows at a time, the ID steps run as passes over them, and the
+    per-policy steps run on `partitions` hash partitions of policy_id (one per
+    DEFAULT_PARTITION_MB of input when None), `jobs` at a time. Spills go to a
+    temporary directory under `work_dir` (default: the output's directory).
+    The step 15 fills are the whole book's (rules.FillStats). Returns the
+    saved output; diagnostics are not recorded in this mode.
+    """
+    prof = StepProfiler.resolve(profile, "cargo (partitioned)")
+    rate_fix = resolve_rate_fix(rate_fix)
+    partitions = partitions or partition_count([freq_path, sev_path])
+    work_dir = work_dir or os.path.dirname(os.path.abspath(output_path))
+
+    with tempfile.TemporaryDirectory(prefix="cargo-partitions-", dir=work_dir) as root:
+        store = ChunkStore(root)
+
+        # 1-11 – Streaming passes, then policy_id partitions
+        n_rows, dtypes = prof.run("1-11 stream + partition", _partition_inputs, freq_path, sev_path,
+                                  store, partitions, chunksize)
+
+        # 4b, 11b-14 per partition
+        parts = prof.run("4b, 11b-14 per partition", map_partitions, _partition_policy_steps,
+                         partitions, jobs, store, dtypes, rate_fix)
+        _report_rewrites({name: sum(part[3][name] for part in parts) for name in ("freq", "sev")},
+                         rate_fix)
+
+        # 15, 18 – The book's fills and MI-#### numbers for the missing shipment_ids
+        stats = FillStats(RuleSet(CRITERIA))
+        for part_stats, _, _, _ in parts:
+            stats.merge(part_stats)
+        fills = stats.fills()
+        no_shipment = np.sort(np.concatenate([rows for _, rows, _, _ in parts]))
+        start = max(top for _, _, top, _ in parts) + 1
+        shipment_ids = pd.Series([f"MI-{start + i:04d}" for i in range(len(no_shipment))],
+                                 index=no_shipment)
+        for part, (_, rows, _, _) in enumerate(parts):
+            if len(rows):
+                store.save("shipment_ids", part, shipment_ids.loc[rows])
+
+        # 15-18 per partition
+        merged = prof.run("15-18 per partition", map_partitions, _partition_merge,
+                          partitions, jobs, store, fills, n_rows, partitions)
+
+        # 19 – Save, in input order
+        rows = prof.run("19 save", write_ordered, store, "merged", partitions,
+                        common_dtypes([out_dtypes for out_dtypes, _ in merged]), output_path)
+
+    print(f"\nSaved → {output_path}  ({rows:,} rows)")
+    print(f"Total claim_amount: {sum(total for _, total in merged):,.2f}")
+    prof.finish()
+    return SavedOutput(output_path, rows)
 
 
 # ── Entry point ───────────────────────────────────────────────────────────────
@@ -416,8 +898,7 @@ def run_pipeline(freq_path: str, sev_path: str,
 # ── Entry point ───────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
-    cargo_claims_merged = run_pipeline(
-        freq_path=r"messy_data\cargo_claims_freq.csv",
-        sev_path=r"messy_data\cargo_claims_sev.csv",
-        output_path="cargo_claims_merged.csv",
-    )
\ No newline at end of file
+    # One line with the default paths; `python -m data_clean run --help` for everything else
+    from data_clean.orchestrate import DEFAULT_DATA_DIR, line_paths
+
+    cargo_claims_merged = run_pipeline(*line_paths("cargo", DEFAULT_DATA_DIR, "."))
\ No newline at end of file
@@ -5,74 +5,109 @@ Production-quality, vectorised pandas pipeline with modular functions,
 minimal printing, and deterministic cleaning steps.
 """
 
+import os
 import re
+import tempfile
+from typing import Iterator
+
 import numpy as np
 import pandas as pd
 
+from data_clean.categoricals import map_unique, to_categorical, union_dtype
+from data_clean.sa_csv import iter_sa_csv, read_sa_csv, read_sa_csvs
+from data_clean.diagnostics import Diagnostics, nan_counts
+from data_clean.key_codes import decode_keys, dictionary, encode_keys
+from data_clean.outputs import SavedOutput, write_output
+from data_clean.partitioned import (ROW, ChunkStore, FirstMatch, collect_categories, common_dtypes,
+                                    hash_partition, map_partitions, missing_keys, partition_count,
+                                    row_buckets, write_ordered)
+from data_clean.policy_index import PolicyIndex
+from data_clean.profiling import StepProfiler
+from data_clean.rules import FillStats, Rule, RuleSet
+from data_clean.stage_cache import StageCache
+from data_clean.streaming import DEFAULT_CHUNKSIZE, regroup, stream_aggregate
+
 
 # ── Constants ────────────────────────────────────────────────────────────────
 
-CRITERIA = {
-    "equipment_type":  ("notnull", None),
-    "equipment_age":   ("range",   (0,   np.inf)),
-    "solar_system":    ("notnull", None),
-    "maintenance_int": ("range",   (100, 5000)),
-    "usage_int":       ("range",   (0,   24)),
-    "exposure":        ("range",   (0,   1)),
+# Column layouts with their kinds for the typed reader (see sa_csv.py)
+FREQ_SCHEMA = {
+    "policy_id":       "str",
+    "equipment_id":    "str",
+    "equipment_type":  "str",
+    "equipment_age":   "float",
+    "solar_system":    "str",
+    "maintenance_int": "float",
+    "usage_int":       "float",
+    "exposure":        "float",
+    "claim_counts":    "score",
 }
 
-# method: "mode" | "median" | "mean"
-FREQ_FILL_RULES = {
-    "equipment_type":  "mode",
-    "equipment_age":   "median",
-    "solar_system":    "mode",
-    "maintenance_int": "mean",
-    "usage_int":       "mean",
-    "exposure":        "median",
+SEV_SCHEMA = {
+    "claim_id":        "skip",
+    "claim_seq":       "skip",
+    "policy_id":       "str",
+    "equipment_id":    "str",
+    "equipment_type":  "str",
+    "equipment_age":   "float",
+    "solar_system":    "str",
+    "maintenance_int": "float",
+    "usage_int":       "float",
+    "exposure":        "float",
+    "claim_amount":    "float",
 }
 
-SUFFIX_PATTERN = re.compile(r"_\?{3}\d{4}$")
+FREQ_COLS = list(FREQ_SCHEMA)
+SEV_COLS  = list(SEV_SCHEMA)
+
+# Criteria (step 13) and freq fallback fill (step 14; "mode" | "median" |
+# "mean" of the valid values) per column – compiled by rules.RuleSet
+CRITERIA = {
+    "equipment_type":  Rule("not_null",              fill="mode"),
+    "equipment_age":   Rule("range",   (0,   np.inf), fill="median"),
+    "solar_system":    Rule("not_null",              fill="mode"),
+    "maintenance_int": Rule("range",   (100, 5000),  fill="mean"),
+    "usage_int":       Rule("range",   (0,   24),    fill="mean"),
+    "exposure":        Rule("range",   (0,   1),     fill="median"),
+}
+
+SUFFIX_PATTERN = r"_\?{3}\d{4}$"   # str, not re.compile: runs in Arrow's regex kernel
+
+# Low-cardinality string columns carried as `category` after step 4
+CATEGORY_COLS = ["equipment_type", "solar_system"]
+
+# ID columns carried as integer codes from step 11b to the merge (see key_codes.py)
+KEY_COLS = ["equipment_id", "policy_id"]
 MI_PATTERN     = re.compile(r"MI-(\d{4})")
 
 
 # ── Step 1 – Load data ───────────────────────────────────────────────────────
 
-def _read_sa_csv(path: str, **kwargs) -> pd.DataFrame:
-    """Read a South-African-format CSV (semicolon-delimited, comma decimals)."""
-    return (
-        pd.read_csv(path, sep=";", decimal=",", **kwargs)
-        .pipe(lambda df: df.apply(
-            lambda col: col.map(lambda x: str(x).replace(",", ".") if isinstance(x, str) else x)
-            if col.dtype == object else col
-        ))
-    )
-
-
-def load_data(freq_path: str, sev_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
-    freq_cols = [
-        "policy_id", "equipment_id", "equipment_type", "equipment_age",
-        "solar_system", "maintenance_int", "usage_int", "exposure", "claim_counts",
-    ]
-    sev_cols = [
-        "claim_id", "claim_seq", "policy_id", "equipment_id", "equipment_type",
-        "equipment_age", "solar_system", "maintenance_int", "usage_int",
-        "exposure", "claim_amount",
-    ]
-    freq = _read_sa_csv(freq_path, names=freq_cols, header=0)
-    sev  = _read_sa_csv(sev_path,  names=sev_cols,  header=0)
+def load_data(freq_path: str | list[str], sev_path: str | list[str],
+              input_cache: bool | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    freq, sev = read_sa_csvs([(freq_path, FREQ_SCHEMA), (sev_path, SEV_SCHEMA)], cache=input_cache)
     return freq, sev
 
 
+def iter_sev_chunks(sev_path: str | list[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield the sev file in chunks of `chunksize` rows, parsed as in load_data."""
+    yield from iter_sa_csv(sev_path, SEV_SCHEMA, chunksize)
+
+
 # ── Step 2 – Clean string columns ────────────────────────────────────────────
 
+def _clean_str_series(col: pd.Series) -> pd.Series:
+    return col.str.strip().str.replace(SUFFIX_PATTERN, "", regex=True)
+
+
 def _clean_string_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Strip whitespace and remove trailing _???#### suffixes from object cols."""
-    obj_cols = df.select_dtypes(include="object").columns
+    """
+    Strip whitespace and remove trailing _???#### suffixes from string cols.
+    Low-cardinality columns are cleaned once per distinct value (map_unique).
+    """
+    obj_cols = df.select_dtypes(include=["object", "str"]).columns
     df = df.copy()
-    df[obj_cols] = df[obj_cols].apply(lambda col: col.str.strip())
-    df[obj_cols] = df[obj_cols].apply(
-        lambda col: col.str.replace(SUFFIX_PATTERN, "", regex=True)
-    )
+    df[obj_cols] = df[obj_cols].apply(map_unique, fn=_clean_str_series)
     return df
 
 
@@ -93,144 +128,150 @@ def _abs_numeric(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+# ── Step 4b – Categorical dtypes ──────────────────────────────────────────────
+
+def categorise(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """CATEGORY_COLS → one shared category dtype in freq and sev."""
+    freq, sev = to_categorical([freq, sev], CATEGORY_COLS)
+    return freq, sev
+
+
 # ── Steps 5-8 – Cross-impute policy_id and equipment_id ─────────────────────
 
-def _build_lookup(src: pd.DataFrame, key: str, match_on: list[str]) -> pd.Series:
-    """Return a Series indexed by tuple(match_on) → key value (first non-null)."""
+def _build_lookup(src: pd.DataFrame, key: str, match_on: list[str]) -> pd.DataFrame:
+    """One row per match_on combination with its key value (first non-null), to join on."""
     valid = src.dropna(subset=[key] + match_on)
-    return valid.groupby(match_on)[key].first()
+    return valid.drop_duplicates(subset=match_on)[match_on + [key]]
 
 
 def _cross_impute(target: pd.DataFrame, source: pd.DataFrame,
                   key: str, match_on: list[str],
-                  print_remaining: bool = False,
-                  print_label: str = "") -> pd.DataFrame:
-    lookup = _build_lookup(source, key, match_on)
+                  diag: Diagnostics | None = None,
+                  section: str = "",
+                  lookup: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Fill NaN target[key] from the source row with the same match_on values,
+    via a left join of the NaN rows against _build_lookup(source, …). Pass a
+    prebuilt `lookup` to reuse it across calls with an unchanged source.
+    With a diag and a `section`, the rows left unresolved are reported.
+    """
     mask = target[key].isna()
     if mask.any():
-        idx_vals = target.loc[mask, match_on].apply(tuple, axis=1)
-        imputed  = idx_vals.map(lookup)
-        target   = target.copy()
-        target.loc[mask, key] = target.loc[mask, key].fillna(imputed)
-
-    if print_remaining and print_label:
-        still_nan = target.loc[target[key].isna(), match_on + [key]]
-        if not still_nan.empty:
-            print(f"\n{print_label}:\n{still_nan.to_string(index=True)}")
+        wanted = target.loc[mask, match_on]
+        # Only rows sharing a first match_on value can match: narrowing to
+        # them keeps the lookup build and join proportional to the gaps.
+        candidates = source if lookup is None else lookup
+        candidates = candidates.loc[candidates[match_on[0]].isin(wanted[match_on[0]].dropna().unique())]
+        if lookup is None:
+            candidates = _build_lookup(candidates, key, match_on)
+        imputed = wanted.merge(candidates, on=match_on, how="left")[key]
+        target  = target.copy()
+        target.loc[mask, key] = imputed.to_numpy()
+
+    if diag is not None and section:
+        diag.metric(section, f"{key} still NaN", lambda: int(target[key].isna().sum()))
+        diag.detail(section, "rows to fix by hand",
+                    lambda: target.loc[target[key].isna(), match_on + [key]])
     return target
 
 
 # ── Step 9 – Policy IDs in sev not in freq ───────────────────────────────────
 
-def report_sev_only_policies(sev: pd.DataFrame, freq: pd.DataFrame) -> None:
-    sev_ids  = set(sev["policy_id"].dropna())
-    freq_ids = set(freq["policy_id"].dropna())
-    only_sev = sorted(sev_ids - freq_ids)
-    print(f"\nPolicy IDs in sev but NOT in freq ({len(only_sev)}):\n{only_sev}")
+def _sev_only_policies(sev: pd.DataFrame, freq: pd.DataFrame) -> list[str]:
+    return sorted(set(sev["policy_id"].dropna()) - set(freq["policy_id"].dropna()))
+
+
+def report_sev_only_policies(sev: pd.DataFrame, freq: pd.DataFrame,
+                             diag: Diagnostics | None = None) -> None:
+    diag = diag or Diagnostics()
+    section = "sev-only policies"
+    diag.metric(section, "policy_ids in sev but not in freq",
+                lambda: len(_sev_only_policies(sev, freq)))
+    diag.detail(section, "policy_ids", lambda: _sev_only_policies(sev, freq))
 
 
 # ── Step 11 – Generate MI-#### placeholders for missing freq policy_ids ───────
 
-def generate_missing_policy_ids(freq: pd.DataFrame) -> pd.DataFrame:
+def generate_missing_policy_ids(freq: pd.DataFrame, start: int = 1) -> pd.DataFrame:
     mask  = freq["policy_id"].isna()
     count = mask.sum()
     if count:
-        new_ids = [f"MI-{i + 1:04d}" for i in range(count)]
+        new_ids = [f"MI-{start + i:04d}" for i in range(count)]
         freq = freq.copy()
         freq.loc[mask, "policy_id"] = new_ids
     return freq
 
 
+def encode_ids(freq: pd.DataFrame, sev: pd.DataFrame
+               ) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Step 11b: KEY_COLS → integer codes shared by freq and sev; returns (freq, sev, codebook)."""
+    (freq, sev), codebook = encode_keys([freq, sev], KEY_COLS)
+    return freq, sev, codebook
+
+
 # ── Step 12 – General NaN imputation by policy_id ────────────────────────────
 
-def _impute_by_policy(target: pd.DataFrame, source: pd.DataFrame,
+def _impute_by_policy(index: PolicyIndex, target: str, source: str,
                       cols: list[str]) -> pd.DataFrame:
-    target = target.copy()
-    src_lookup = source.dropna(subset=["policy_id"]).groupby("policy_id")[cols].first()
+    """For each col, fill NaN in the target frame from the same policy_id's first value in source."""
+    df = index.replace(target, index.frames[target].copy())
     for col in cols:
-        if col not in target.columns or col not in src_lookup.columns:
+        if col not in df.columns or col not in index.frames[source].columns:
             continue
-        mask = target[col].isna() & target["policy_id"].notna()
-        if mask.any():
-            target.loc[mask, col] = (
-                target.loc[mask, "policy_id"]
-                .map(src_lookup[col])
-                .combine_first(target.loc[mask, col])
-            )
-    return target
+        rows = np.flatnonzero(df[col].isna().to_numpy() & (index.rows[target] >= 0))
+        if len(rows):
+            index.fill(target, col, rows, source, index.first_valid(source, col))
+    return df
 
 
-def cross_impute_by_policy(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+def cross_impute_by_policy(freq: pd.DataFrame, sev: pd.DataFrame,
+                           index: PolicyIndex | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    index = PolicyIndex.ensure(index, freq, sev)
     shared_cols = [c for c in freq.columns if c in sev.columns and c != "policy_id"]
-    freq = _impute_by_policy(freq, sev,  shared_cols)
-    sev  = _impute_by_policy(sev,  freq, shared_cols)
+    freq = _impute_by_policy(index, "freq", "sev",  shared_cols)
+    sev  = _impute_by_policy(index, "sev",  "freq", shared_cols)
     return freq, sev
 
 
 # ── Step 13 – Criteria checker and cross-overwrite ───────────────────────────
 
-def _meets_criteria(series: pd.Series, rule: tuple) -> pd.Series:
-    kind, param = rule
-    if kind == "notnull":
-        return series.notna()
-    if kind == "range":
-        lo, hi = param
-        return series.between(lo, hi, inclusive="both")
-    if kind == "isin":
-        return series.isin(param)
-    return pd.Series(True, index=series.index)
-
-
-def _overwrite_col_by_policy(target: pd.DataFrame, source: pd.DataFrame,
-                              col: str, source_ok_mask: pd.Series,
-                              target_bad_mask: pd.Series) -> pd.DataFrame:
-    rows_to_fix = target_bad_mask & target["policy_id"].notna()
-    if not rows_to_fix.any():
-        return target
-    good_source = source.loc[source_ok_mask & source["policy_id"].notna()].copy()
-    src_lookup  = good_source.groupby("policy_id")[col].first()
-    target = target.copy()
-    target.loc[rows_to_fix, col] = (
-        target.loc[rows_to_fix, "policy_id"]
-        .map(src_lookup)
-        .combine_first(target.loc[rows_to_fix, col])
-    )
-    return target
-
-
-def run_criteria_checker(freq: pd.DataFrame, sev: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
-    for col, rule in CRITERIA.items():
+def _overwrite_col_by_policy(index: PolicyIndex, target: str, source: str,
+                             col: str, source_ok_mask: pd.Series,
+                             target_bad_mask: pd.Series) -> None:
+    """Overwrite target[col] entries where target fails and source passes, matched on policy_id."""
+    rows = np.flatnonzero(target_bad_mask.to_numpy() & (index.rows[target] >= 0))
+    if len(rows):
+        index.fill(target, col, rows, source, index.first_rows(source, source_ok_mask))
+
+
+def run_criteria_checker(freq: pd.DataFrame, sev: pd.DataFrame,
+                         index: PolicyIndex | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Each column's validity depends only on its own values: check every
+    # column of both frames once, up front, then overwrite column by column.
+    # Overwrites only touch failing cells, so the masks stay accurate for the
+    # passing cells the other frame reads from.
+    index   = PolicyIndex.ensure(index, freq, sev)
+    rules   = RuleSet(CRITERIA)
+    freq_ok = rules.validity(freq)
+    sev_ok  = rules.validity(sev)
+    freq = index.replace("freq", freq.copy())
+    sev  = index.replace("sev",  sev.copy())
+    for col in CRITERIA:
         if col not in freq.columns or col not in sev.columns:
             continue
-        freq_ok = _meets_criteria(freq[col], rule)
-        sev_ok  = _meets_criteria(sev[col],  rule)
-        freq = _overwrite_col_by_policy(freq, sev,  col, sev_ok,  ~freq_ok)
-        sev  = _overwrite_col_by_policy(sev,  freq, col, freq_ok, ~sev_ok)
+        _overwrite_col_by_policy(index, "freq", "sev",  col, sev_ok[col],  ~freq_ok[col])
+        _overwrite_col_by_policy(index, "sev",  "freq", col, freq_ok[col], ~sev_ok[col])
     return freq, sev
 
 
 # ── Step 14 – Freq fallback imputation (mode / median / mean) ────────────────
 
-def _freq_fallback_impute(freq: pd.DataFrame) -> pd.DataFrame:
-    freq = freq.copy()
-    for col, method in FREQ_FILL_RULES.items():
-        if col not in freq.columns:
-            continue
-        rule = CRITERIA.get(col)
-        if rule is None:
-            continue
-        bad_mask = ~_meets_criteria(freq[col], rule)
-        if not bad_mask.any():
-            continue
-        valid = freq.loc[~bad_mask, col]
-        if method == "mode":
-            fill_val = valid.mode().iloc[0] if not valid.empty else np.nan
-        elif method == "mean":
-            fill_val = valid.mean() if not valid.empty else np.nan
-        else:  # median
-            fill_val = valid.median() if not valid.empty else np.nan
-        freq.loc[bad_mask, col] = fill_val
-    return freq
+def _freq_fallback_impute(freq: pd.DataFrame, fills: dict | None = None) -> pd.DataFrame:
+    """
+    Replace cells failing CRITERIA with their column's fill (mode / median /
+    mean of the valid values, or the whole book's `fills` in a partitioned run).
+    """
+    return RuleSet(CRITERIA).apply_fills(freq.copy(), fills=fills)
 
 
 # ── Step 15 – Aggregate sev ──────────────────────────────────────────────────
@@ -238,9 +279,9 @@ def _freq_fallback_impute(freq: pd.DataFrame) -> pd.DataFrame:
 def aggregate_sev(sev: pd.DataFrame) -> pd.DataFrame:
     keys = ["equipment_id", "policy_id"]
     sev = sev.copy()
-    sev["_claim_count"] = sev.groupby(keys)["equipment_id"].transform("count")
+    sev["_claim_count"] = sev.groupby(keys).transform("size")
     non_numeric = sev.select_dtypes(include="object").columns.difference(keys).tolist()
-    numeric     = sev.select_dtypes(include="number").columns.difference(["_claim_count"]).tolist()
+    numeric     = sev.select_dtypes(include="number").columns.difference(["_claim_count", *keys]).tolist()
 
     agg_dict = {col: "first" for col in non_numeric}
     agg_dict.update({col: "sum" if col == "claim_amount" else "first" for col in numeric})
@@ -254,13 +295,23 @@ def aggregate_sev(sev: pd.DataFrame) -> pd.DataFrame:
 # ── Step 16-17 – Merge and final checks ──────────────────────────────────────
 
 def merge_datasets(freq: pd.DataFrame, sev: pd.DataFrame,
-                   sev_claim_total: float) -> pd.DataFrame:
+                   sev_claim_total: float | None = None,
+                   codebook: pd.DataFrame | None = None,
+                   diag: Diagnostics | None = None) -> pd.DataFrame:
+    """
+    Left-join the aggregated sev onto freq (0 claims where absent) and fill
+    MI-#### equipment_ids. sev_claim_total, the pre-aggregation claim_amount
+    total, is reconciled against the output when diag is enabled. Encoded
+    IDs are decoded with the codebook right after the join.
+    """
+    diag = diag or Diagnostics()
     merge_keys = ["equipment_id", "policy_id"]
 
     # Only bring claim_amount and claim_count from sev
     sev_slim = sev[merge_keys + ["claim_amount", "claim_count"]].copy()
 
     merged = freq.merge(sev_slim, on=merge_keys, how="left")
+    merged = decode_keys(merged, codebook)
 
     # freq rows with no matching sev record → claim_amount = 0, claim_count = 0
     no_claim_mask = merged["claim_amount"].isna()
@@ -282,95 +333,391 @@ def merge_datasets(freq: pd.DataFrame, sev: pd.DataFrame,
         merged.loc[nan_equip_mask, "equipment_id"] = new_ids
 
     # ── Step 18 – Input vs output claim_amount reconciliation ────────────────
-    merged_claim_total = merged["claim_amount"].sum()
-    print(f"\nClaim amount reconciliation:"
-          f"\n  Input  sev  claim_amount total : {sev_claim_total:,.2f}"
-          f"\n  Output merged claim_amount total: {merged_claim_total:,.2f}"
-          f"\n  Difference                      : {merged_claim_total - sev_claim_total:,.2f}")
+    def reconciliation() -> dict[str, float]:
+        merged_claim_total = float(merged["claim_amount"].sum())
+        return {"input sev total": float(sev_claim_total), "output merged total": merged_claim_total,
+                "difference": merged_claim_total - float(sev_claim_total)}
+
+    if sev_claim_total is not None:
+        diag.metric("merge", "claim_amount reconciliation", reconciliation)
 
     # ── NaN report ────────────────────────────────────────────────────────────
-    nan_summary = merged.isna().sum()
-    nan_summary = nan_summary[nan_summary > 0]
-    if not nan_summary.empty:
-        print(f"\nNaN summary in equipment_claims_merged:\n{nan_summary.to_string()}")
-    else:
-        print("\nNo NaNs detected in equipment_claims_merged.")
+    diag.metric("merge", "equipment_claims_merged NaN counts", lambda: nan_counts(merged))
 
     return merged
 
 
 # ── Main pipeline ─────────────────────────────────────────────────────────────
 
-def run_pipeline(freq_path: str, sev_path: str,
-                 output_path: str = "equipment_claims_merged.csv") -> pd.DataFrame:
+def save_output(equipment_claims_merged: pd.DataFrame, output_path: str) -> None:
+    write_output(equipment_claims_merged, output_path)
+    print(f"\nSaved → {output_path}  ({len(equipment_claims_merged):,} rows)")
+
+
+def run_pipeline(freq_path: str | list[str], sev_path: str | list[str],
+                 output_path: str = "equipment_claims_merged.csv",
+                 chunksize: int | None = None,
+                 profile: bool | StepProfiler | None = None,
+                 cache: bool | str | StageCache | None = None,
+                 input_cache: bool | None = None,
+                 diagnostics: int | str | Diagnostics | None = None) -> pd.DataFrame:
+
+    if chunksize:
+        return run_pipeline_streaming(freq_path, sev_path, output_path, chunksize, profile,
+                                      input_cache, diagnostics)
+
+    # profile=True (or DATA_CLEAN_PROFILE=1) times every step – see profiling.py
+    # cache=True (or DATA_CLEAN_CACHE_DIR) reuses unchanged stages – see stage_cache.py
+    # input_cache=True (or DATA_CLEAN_INPUT_CACHE=1) loads parsed Arrow copies – see sa_csv.py
+    # diagnostics=1|2 (or DATA_CLEAN_DIAGNOSTICS) records sanity metrics – see diagnostics.py
+    prof = StepProfiler.resolve(profile, "equipment")
+    steps = StageCache.resolve(cache, prof)
+    diag = Diagnostics.resolve(diagnostics, "equipment")
 
     # 1 – Load
-    freq, sev = load_data(freq_path, sev_path)
+    freq, sev = steps.run("1 load", load_data, freq_path, sev_path, input_cache=input_cache)
 
     # 2 – Clean string columns
-    freq = _clean_string_columns(freq)
-    sev  = _clean_string_columns(sev)
+    freq = steps.run("2 clean strings (freq)", _clean_string_columns, freq)
+    sev  = steps.run("2 clean strings (sev)",  _clean_string_columns, sev)
 
     # 3 – Drop columns
-    freq, sev = drop_columns(freq, sev)
+    freq, sev = steps.run("3 drop columns", drop_columns, freq, sev)
 
     # 4 – Absolute values
-    freq = _abs_numeric(freq)
-    sev  = _abs_numeric(sev)
+    freq = steps.run("4 abs (freq)", _abs_numeric, freq)
+    sev  = steps.run("4 abs (sev)",  _abs_numeric, sev)
+
+    # 4b – Low-cardinality strings → category
+    freq, sev = steps.run("4b categorise", categorise, freq, sev)
 
     # 5 – Impute sev policy_id from freq
-    sev = _cross_impute(sev, freq, key="policy_id", match_on=["equipment_id", "equipment_type"],
-                        print_remaining=True,
-                        print_label="sev policy_id still NaN after imputation – fix by hand")
+    sev = steps.run("5 impute sev policy_id", _cross_impute, sev, freq,
+                   key="policy_id", match_on=["equipment_id", "equipment_type"],
+                   diag=diag, section="impute sev policy_id")
 
     # 6 – Impute freq policy_id from sev
-    freq = _cross_impute(freq, sev, key="policy_id", match_on=["equipment_id", "equipment_type"])
+    freq = steps.run("6 impute freq policy_id", _cross_impute, freq, sev,
+                    key="policy_id", match_on=["equipment_id", "equipment_type"])
 
     # 7 – Impute sev equipment_id from freq
-    sev = _cross_impute(sev, freq, key="equipment_id", match_on=["policy_id", "equipment_type"],
-                        print_remaining=True,
-                        print_label="sev equipment_id still NaN after imputation – fix by hand")
+    sev = steps.run("7 impute sev equipment_id", _cross_impute, sev, freq,
+                   key="equipment_id", match_on=["policy_id", "equipment_type"],
+                   diag=diag, section="impute sev equipment_id")
 
     # 8 – Impute freq equipment_id from sev
-    freq = _cross_impute(freq, sev, key="equipment_id", match_on=["policy_id", "equipment_type"])
+    freq = steps.run("8 impute freq equipment_id", _cross_impute, freq, sev,
+                    key="equipment_id", match_on=["policy_id", "equipment_type"])
 
     # 9 – Report policies in sev not in freq
-    report_sev_only_policies(sev, freq)
+    steps.run("9 report sev-only policies", report_sev_only_policies, sev, freq, diag=diag)
 
     # 10 – Drop zero claim_amount rows in sev
-    sev = sev.loc[sev["claim_amount"] != 0].copy()
+    sev = steps.run("10 drop zero claims", lambda df: df.loc[df["claim_amount"] != 0].copy(), sev)
 
     # 11 – Generate MI-#### for still-missing freq policy_ids
-    freq = generate_missing_policy_ids(freq)
+    freq = steps.run("11 generate policy_ids", generate_missing_policy_ids, freq)
+
+    # 11b – IDs → integer codes for every join up to the merge
+    freq, sev, codebook = steps.run("11b encode ids", encode_ids, freq, sev)
+
+    # 11c – Row positions per policy_id, shared by steps 12-13
+    index = steps.run("11c policy index", PolicyIndex, freq, sev)
 
     # 12 – General cross-imputation by policy_id
-    freq, sev = cross_impute_by_policy(freq, sev)
+    freq, sev = steps.run("12 cross-impute by policy", cross_impute_by_policy, freq, sev, index)
 
     # 13 – Criteria checker and cross-overwrite
-    freq, sev = run_criteria_checker(freq, sev)
+    freq, sev = steps.run("13 criteria checker", run_criteria_checker, freq, sev, index)
 
     # 14 – Freq fallback imputation (mode / median / mean)
-    freq = _freq_fallback_impute(freq)
+    freq = steps.run("14 freq fallback impute", _freq_fallback_impute, freq)
 
-    # 15 – Aggregate sev; capture input total before aggregation
-    sev_claim_total = sev["claim_amount"].sum()
-    sev = aggregate_sev(sev)
+    # 15 – Aggregate sev; capture input total before aggregation (diagnostics only)
+    sev_claim_total = steps.value(sev)["claim_amount"].sum() if diag.enabled() else None
+    sev = steps.run("15 aggregate sev", aggregate_sev, sev)
 
     # 16-17 – Merge, NaN check, reconciliation
-    equipment_claims_merged = merge_datasets(freq, sev, sev_claim_total)
+    equipment_claims_merged = steps.run("16-17 merge", merge_datasets, freq, sev,
+                                        sev_claim_total, codebook, diag=diag)
 
     # 18 – Save
-    equipment_claims_merged.to_csv(output_path, index=False)
-    print(f"\nSaved → {output_path}  ({len(equipment_claims_merged):,} rows)")
-
+    steps.run("18 save", save_output, equipment_claims_merged, output_path)
+
+    prof.finish()
+    steps.finish()
+    diag.finish(output_path)
+    return steps.value(equipment_claims_merged)
+
+
+# ── Streaming pipeline (sev read in chunks) ───────────────────────────────────
+
+def _freq_lookups(freq: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """The step 5 and step 7 lookups over freq, built once for all sev chunks."""
+    return (_build_lookup(freq, "policy_id", ["equipment_id", "equipment_type"]),
+            _build_lookup(freq, "equipment_id", ["policy_id", "equipment_type"]))
+
+
+def _clean_sev_chunk(chunk: pd.DataFrame, freq: pd.DataFrame,
+                     lookups: tuple[pd.DataFrame, pd.DataFrame] | None = None) -> pd.DataFrame:
+    """Steps 2-5, 7 and 10 for one sev chunk, against the fully cleaned freq."""
+    policy_lookup, id_lookup = lookups or (None, None)
+    chunk = _clean_string_columns(chunk)
+    chunk = chunk.drop(columns=["claim_id", "claim_seq"], errors="ignore")
+    chunk = _abs_numeric(chunk)
+    chunk = _cross_impute(chunk, freq, key="policy_id", match_on=["equipment_id", "equipment_type"],
+                          lookup=policy_lookup)
+    chunk = _cross_impute(chunk, freq, key="equipment_id", match_on=["policy_id", "equipment_type"],
+                          lookup=id_lookup)
+    return chunk.loc[chunk["claim_amount"] != 0]
+
+
+def _load_clean_freq(freq_path: str | list[str], input_cache: bool | None = None) -> pd.DataFrame:
+    """Steps 1-4 for the freq file alone."""
+    freq = read_sa_csv(freq_path, FREQ_SCHEMA, cache=input_cache)
+    freq = _clean_string_columns(freq).drop(columns=["claim_counts"], errors="ignore")
+    return _abs_numeric(freq)
+
+
+def run_pipeline_streaming(freq_path: str | list[str], sev_path: str | list[str],
+                           output_path: str = "equipment_claims_merged.csv",
+                           chunksize: int = DEFAULT_CHUNKSIZE,
+                           profile: bool | StepProfiler | None = None,
+                           input_cache: bool | None = None,
+                           diagnostics: int | str | Diagnostics | None = None) -> pd.DataFrame:
+    """
+    Same steps as run_pipeline, but the sev file is read `chunksize` rows at a
+    time. Each chunk is cleaned and reduced to per-(equipment_id, policy_id)
+    partials (claim_count, claim_amount sum, first-seen shared columns); the
+    freq-side steps then use that aggregated sev, so memory is bounded by the
+    chunk size plus the freq side. Sev IDs are imputed against freq before
+    freq's own IDs are filled from sev (steps 6 and 8 run after the stream).
+    Diagnostics cover the whole-frame steps; per-chunk ID imputation is not
+    reported.
+    """
+    prof = StepProfiler.resolve(profile, "equipment (streaming)")
+    diag = Diagnostics.resolve(diagnostics, "equipment (streaming)")
+
+    # 1-4 – Load and clean freq
+    freq = prof.run("1-4 load + clean freq", _load_clean_freq, freq_path, input_cache)
+
+    # 5, 7, 10 per chunk, folded into per-key partials (step 15). NaN keys
+    # are kept until step 12 has had its chance to fill sev equipment_ids.
+    keys        = ["equipment_id", "policy_id"]
+    shared_cols = [c for c in freq.columns if c in SEV_COLS and c not in keys]
+    lookups = _freq_lookups(freq)
+    chunks  = (_clean_sev_chunk(chunk, freq, lookups) for chunk in iter_sev_chunks(sev_path, chunksize))
+    sev     = prof.run("5, 7, 10, 15 stream + aggregate sev", stream_aggregate, chunks,
+                       keys=keys, first_cols=shared_cols, dropna=False)
+    freq, sev = prof.run("4b categorise", categorise, freq, sev)
+
+    # 6, 8 – Impute freq policy_id / equipment_id from aggregated sev
+    freq = prof.run("6 impute freq policy_id", _cross_impute, freq, sev,
+                    key="policy_id", match_on=["equipment_id", "equipment_type"])
+    freq = prof.run("8 impute freq equipment_id", _cross_impute, freq, sev,
+                    key="equipment_id", match_on=["policy_id", "equipment_type"])
+
+    # 9, 11-14 – Report, placeholders, cross-imputation, criteria, fills
+    prof.run("9 report sev-only policies", report_sev_only_policies, sev, freq, diag=diag)
+    freq = prof.run("11 generate policy_ids", generate_missing_policy_ids, freq)
+    freq, sev, codebook = prof.run("11b encode ids", encode_ids, freq, sev)
+    index     = prof.run("11c policy index", PolicyIndex, freq, sev)
+    freq, sev = prof.run("12 cross-impute by policy", cross_impute_by_policy, freq, sev, index)
+    sev_claim_total = sev["claim_amount"].sum() if diag.enabled() else None
+    sev = prof.run("12 regroup sev", regroup, sev, keys)
+    freq, sev = prof.run("13 criteria checker", run_criteria_checker, freq, sev)  # indexes the regrouped sev
+    freq = prof.run("14 freq fallback impute", _freq_fallback_impute, freq)
+
+    # 15-18 – Merge, reconciliation, NaN check, save
+    equipment_claims_merged = prof.run("16-17 merge", merge_datasets, freq, sev,
+                                       sev_claim_total, codebook, diag=diag)
+    prof.run("18 save", save_output, equipment_claims_merged, output_path)
+
+    prof.finish()
+    diag.finish(output_path)
     return equipment_claims_merged
 
 
+# ── Partitioned pipeline (out of core, see partitioned.py) ───────────────────
+
+def _clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Steps 2-4 for one freq or sev chunk."""
+    chunk = _clean_string_columns(chunk)
+    chunk = chunk.drop(columns=["claim_counts", "claim_id", "claim_seq"], errors="ignore")
+    return _abs_numeric(chunk)
+
+
+def _partition_inputs(freq_path: str | list[str], sev_path: str | list[str],
+                      store: ChunkStore, partitions: int, chunksize: int
+                      ) -> tuple[int, dict[str, pd.CategoricalDtype]]:
+    """
+    Steps 1-8, 10 and 11 as passes over the cleaned chunks, then freq and sev
+    hash-partitioned on policy_id (sev rows without one take no further part
+    in the run). Each ID step is a FirstMatch against the previous pass.
+    Returns the freq row count and the shared category dtypes (step 4b).
+    """
+    policy_match, id_match = ["equipment_id", "equipment_type"], ["policy_id", "equipment_type"]
+    seen: dict[str, list] = {}
+
+    # 1-4 – Clean and spill both files; the sev policy_ids step 5 looks for
+    wanted = []
+    for chunk in iter_sev_chunks(sev_path, chunksize):
+        chunk = _clean_chunk(chunk)
+        store.append("sev_clean", chunk)
+        collect_categories(seen, chunk, CATEGORY_COLS)
+        wanted.append(missing_keys(chunk, "policy_id", policy_match))
+    sev_policy = FirstMatch("policy_id", policy_match, wanted)
+    wanted = []
+    for chunk in iter_sa_csv(freq_path, FREQ_SCHEMA, chunksize):
+        chunk = _clean_chunk(chunk)
+        store.append("freq_clean", chunk)
+        collect_categories(seen, chunk, CATEGORY_COLS)
+        sev_policy.update(chunk)
+        wanted.append(missing_keys(chunk, "policy_id", policy_match))
+    freq_policy = FirstMatch("policy_id", policy_match, wanted)
+
+    # 5 – sev policy_id, looking for the freq policy_ids of step 6
+    wanted = []
+    for chunk in store.pieces("sev_clean"):
+        chunk = _cross_impute(chunk, None, "policy_id", policy_match, lookup=sev_policy.lookup)
+        freq_policy.update(chunk)
+        wanted.append(missing_keys(chunk, "equipment_id", id_match))
+    sev_id = FirstMatch("equipment_id", id_match, wanted)
+
+    # 6 – freq policy_id, looking for the sev equipment_ids of step 7
+    wanted = []
+    for chunk in store.pieces("freq_clean"):
+        chunk = _cross_impute(chunk, None, "policy_id", policy_match, lookup=freq_policy.lookup)
+        sev_id.update(chunk)
+        wanted.append(missing_keys(chunk, "equipment_id", id_match))
+    freq_id = FirstMatch("equipment_id", id_match, wanted)
+
+    # 5, 7, 10 – sev IDs, looking for the freq equipment_ids of step 8; partition
+    for chunk in store.pieces("sev_clean"):
+        chunk = _cross_impute(chunk, None, "policy_id", policy_match, lookup=sev_policy.lookup)
+        chunk = _cross_impute(chunk, None, "equipment_id", id_match, lookup=sev_id.lookup)
+        freq_id.update(chunk)
+        chunk = chunk.loc[(chunk["claim_amount"] != 0) & chunk["policy_id"].notna()]
+        store.append("sev", chunk, hash_partition(chunk["policy_id"], partitions))
+
+    # 6, 8, 11 – freq IDs and MI-#### placeholders, numbered in file order; partition
+    n_rows, n_generated = 0, 0
+    for chunk in store.pieces("freq_clean"):
+        chunk = _cross_impute(chunk, None, "policy_id", policy_match, lookup=freq_policy.lookup)
+        chunk = _cross_impute(chunk, None, "equipment_id", id_match, lookup=freq_id.lookup)
+        missing = int(chunk["policy_id"].isna().sum())
+        chunk = generate_missing_policy_ids(chunk, start=n_generated + 1)
+        chunk[ROW] = np.arange(n_rows, n_rows + len(chunk))
+        store.append("freq", chunk, hash_partition(chunk["policy_id"], partitions))
+        n_rows, n_generated = n_rows + len(chunk), n_generated + missing
+
+    return n_rows, {col: union_dtype(values) for col, values in seen.items()}
+
+
+def _max_mi_number(freq: pd.DataFrame, codebook: pd.DataFrame) -> int:
+    """The highest MI-#### number among freq's (encoded) equipment_ids and policy_ids, 0 if none."""
+    top = 0
+    for col in ["equipment_id", "policy_id"]:
+        codes = pd.unique(freq[col].dropna().to_numpy(dtype=np.int64))
+        nums  = dictionary(codebook, col)[codes].str.extract(MI_PATTERN, expand=False).dropna()
+        if not nums.empty:
+            top = max(top, int(nums.astype(int).max()))
+    return top
+
+
+def _partition_policy_steps(part: int, store: ChunkStore,
+                            dtypes: dict[str, pd.CategoricalDtype]) -> tuple:
+    """Steps 4b and 11b-13 for one partition, kept for _partition_merge."""
+    freq, sev = to_categorical([store.read("freq", part), store.read("sev", part)],
+                               CATEGORY_COLS, dtypes)
+    freq, sev, codebook = encode_ids(freq, sev)
+    index = PolicyIndex(freq, sev)
+    freq, sev = cross_impute_by_policy(freq, sev, index)
+    freq, sev = run_criteria_checker(freq, sev, index)
+    store.save("policy_steps", part, (freq, sev, codebook))
+    # what the whole book's steps 14 and 17 need from this partition
+    stats = FillStats(RuleSet(CRITERIA)).update(freq)
+    return stats, freq.loc[freq["equipment_id"].isna(), ROW].to_numpy(), _max_mi_number(freq, codebook)
+
+
+def _partition_merge(part: int, store: ChunkStore, fills: dict, n_rows: int,
+                     n_buckets: int) -> tuple[dict, float]:
+    """Steps 14-17 for one partition, with the book's fills and MI-#### equipment_ids."""
+    freq, sev, codebook = store.load("policy_steps", part)
+    freq   = _freq_fallback_impute(freq, fills)
+    sev    = aggregate_sev(sev)
+    merged = merge_datasets(freq, sev, codebook=codebook)
+    no_equipment = freq["equipment_id"].isna().to_numpy()
+    if no_equipment.any():
+        equipment_ids = store.load("equipment_ids", part)
+        merged.loc[no_equipment, "equipment_id"] = merged.loc[no_equipment, ROW].map(equipment_ids).to_numpy()
+    store.append("merged", merged, row_buckets(merged[ROW], n_rows, n_buckets), tag=f"-{part:05d}")
+    return merged.dtypes.to_dict(), float(merged["claim_amount"].sum())
+
+
+def run_pipeline_partitioned(freq_path: str | list[str], sev_path: str | list[str],
+                             output_path: str = "equipment_claims_merged.csv",
+                             partitions: int | None = None,
+                             jobs: int = 1,
+                             chunksize: int = DEFAULT_CHUNKSIZE,
+                             profile: bool | StepProfiler | None = None,
+                             work_dir: str | None = None) -> SavedOutput:
+    """
+    Same steps and output as run_pipeline, out of core: the inputs are read
+    `chunksize` rows at a time, the ID steps run as passes over them, and the
+    per-policy steps run on `partitions` hash partitions of policy_id (one per
+    DEFAULT_PARTITION_MB of input when None), `jobs` at a time. Spills go to a
+    temporary directory under `work_dir` (default: the output's directory).
+    The step 14 fills are the whole book's (rules.FillStats), so the output
+    is run_pipeline's whatever the partition count. Returns the saved
+    output; diagnostics are not recorded in this mode.
+    """
+    prof = StepProfiler.resolve(profile, "equipment (partitioned)")
+    partitions = partitions or partition_count([freq_path, sev_path])
+    work_dir = work_dir or os.path.dirname(os.path.abspath(output_path))
+
+    with tempfile.TemporaryDirectory(prefix="equipment-partitions-", dir=work_dir) as root:
+        store = ChunkStore(root)
+
+        # 1-11 – Streaming passes, then policy_id partitions
+        n_rows, dtypes = prof.run("1-11 stream + partition", _partition_inputs, freq_path, sev_path,
+                                  store, partitions, chunksize)
+
+        # 4b, 11b-13 per partition
+        parts = prof.run("4b, 11b-13 per partition", map_partitions, _partition_policy_steps,
+                         partitions, jobs, store, dtypes)
+
+        # 14, 17 – The book's fills and MI-#### numbers for the missing equipment_ids
+        stats = FillStats(RuleSet(CRITERIA))
+        for part_stats, _, _ in parts:
+            stats.merge(part_stats)
+        fills = stats.fills()
+        no_equipment = np.sort(np.concatenate([rows for _, rows, _ in parts]))
+        start = max(top for _, _, top in parts) + 1
+        equipment_ids = pd.Series([f"MI-{start + i:04d}" for i in range(len(no_equipment))],
+                                  index=no_equipment)
+        for part, (_, rows, _) in enumerate(parts):
+            if len(rows):
+                store.save("equipment_ids", part, equipment_ids.loc[rows])
+
+        # 14-17 per partition
+        merged = prof.run("14-17 per partition", map_partitions, _partition_merge,
+                          partitions, jobs, store, fills, n_rows, partitions)
+
+        # 18 – Save, in input order
+        rows = prof.run("18 save", write_ordered, store, "merged", partitions,
+                        common_dtypes([out_dtypes for out_dtypes, _ in merged]), output_path)
+
+    print(f"\nSaved → {output_path}  ({rows:,} rows)")
+    print(f"Total claim_amount: {sum(total for _, total in merged):,.2f}")
+    prof.finish()
+    return SavedOutput(output_path, rows)
+
+
 # ── Entry point ───────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
-    equipment_claims_merged = run_pipeline(
-        freq_path=r"messy_data\equipment_claims_freq.csv",
-        sev_path=r"messy_data\equipment_claims_sev.csv",
-        output_path="equipment_claims_merged.csv",
-    )
\ No newline at end of file
+    # One line with the default paths; `python -m data_clean run --help` for everything else
+    from data_clean.orchestrate import DEFAULT_DATA_DIR, line_paths
+
+    equipment_claims_merged = run_pipeline(*line_paths("equipment", DEFAULT_DATA_DIR, "."))
\ No newline at end of file
@@ -4,66 +4,76 @@ Processes frequency (freq) and severity (sev) datasets through cleaning,
 imputation, validation, merging, and export.
 """
 
+import os
 import re
+import tempfile
+from typing import Iterator
+
 import pandas as pd
 import numpy as np
 
-# Frequency dataset column list
-FREQ_COLS = [
-    'policy_id', 'worker_id', 'solar_system', 'station_id', 'occupation', 
-    'employment_type', 'experience_yrs', 'accident_history_flag', 
-    'psych_stress_index', 'hours_per_week', 'supervision_level', 
-    'gravity_level', 'safety_training_index', 'protective_gear_quality', 
-    'base_salary', 'exposure', 'claim_count'
-]
+from data_clean.categoricals import map_unique, to_categorical, union_dtype
+from data_clean.diagnostics import Diagnostics, nan_counts
+from data_clean.key_codes import decode_keys, encode_keys
+from data_clean.outputs import SavedOutput, write_output
+from data_clean.partitioned import (ROW, ChunkStore, FirstMatch, collect_categories, common_dtypes,
+                                    hash_partition, map_partitions, missing_keys, partition_count,
+                                    row_buckets, write_ordered)
+from data_clean.policy_index import PolicyIndex
+from data_clean.sa_csv import iter_sa_csv, numeric_cols, read_sa_csv, read_sa_csvs
+from data_clean.profiling import StepProfiler
+from data_clean.rules import FillStats, Rule, RuleSet
+from data_clean.stage_cache import StageCache
+from data_clean.streaming import DEFAULT_CHUNKSIZE, stream_aggregate
+
+# Frequency dataset layout, with column kinds for the typed reader (see sa_csv.py)
+FREQ_SCHEMA: dict[str, str] = {
+    'policy_id': 'str', 'worker_id': 'str', 'solar_system': 'str', 'station_id': 'str',
+    'occupation': 'str', 'employment_type': 'str', 'experience_yrs': 'float',
+    'accident_history_flag': 'score', 'psych_stress_index': 'score',
+    'hours_per_week': 'score', 'supervision_level': 'float', 'gravity_level': 'float',
+    'safety_training_index': 'score', 'protective_gear_quality': 'score',
+    'base_salary': 'float', 'exposure': 'float', 'claim_count': 'score',
+}
+
+# Severity dataset layout
+SEV_SCHEMA: dict[str, str] = {
+    'claim_id': 'skip', 'claim_seq': 'skip', 'policy_id': 'str', 'worker_id': 'str',
+    'solar_system': 'str', 'station_id': 'str', 'occupation': 'str',
+    'employment_type': 'str', 'experience_yrs': 'float', 'accident_history_flag': 'score',
+    'psych_stress_index': 'score', 'hours_per_week': 'score', 'supervision_level': 'float',
+    'gravity_level': 'float', 'safety_training_index': 'score',
+    'protective_gear_quality': 'score', 'base_salary': 'float', 'exposure': 'float',
+    'injury_type': 'str', 'injury_cause': 'str', 'claim_length': 'float',
+    'claim_amount': 'float',
+}
+
+FREQ_COLS = list(FREQ_SCHEMA)
+SEV_COLS  = list(SEV_SCHEMA)
+_COLUMN_KINDS = {**FREQ_SCHEMA, **SEV_SCHEMA}
 
-# Severity dataset column list
-SEV_COLS = [
-    'claim_id', 'claim_seq', 'policy_id', 'worker_id', 'solar_system', 
-    'station_id', 'occupation', 'employment_type', 'experience_yrs', 
-    'accident_history_flag', 'psych_stress_index', 'hours_per_week', 
-    'supervision_level', 'gravity_level', 'safety_training_index', 
-    'protective_gear_quality', 'base_salary', 'exposure', 'injury_type', 
-    'injury_cause', 'claim_length', 'claim_amount'
-]
 # ──────────────────────────────────────────────
 # 1. LOAD DATA
 # ──────────────────────────────────────────────
-def load_data(freq_path: str, sev_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Load freq and sev datasets from South African (semicolon-delimited) CSV files."""
-    freq = pd.read_csv(freq_path, sep=";", names=FREQ_COLS, header=0, dtype=str)
-    sev  = pd.read_csv(sev_path,  sep=";", names=SEV_COLS,  header=0, dtype=str)
-
-    # Clean Freq
-    freq_numeric_cols = ['experience_yrs', 'accident_history_flag', 
-                         'psych_stress_index', 'hours_per_week', 'supervision_level', 
-                         'gravity_level', 'safety_training_index', 'protective_gear_quality', 
-                         'base_salary', 'exposure', 'claim_count'] 
-
-    for col in freq_numeric_cols:
-        # Strip whitespace, replace comma, then convert
-        freq[col] = freq[col].str.strip().str.replace(',', '.', regex=False)
-        freq[col] = pd.to_numeric(freq[col], errors='coerce')
-
-    # Clean Sev
-    sev_numeric_cols = ['experience_yrs', 'accident_history_flag', 'psych_stress_index', 
-                        'hours_per_week', 'supervision_level', 'gravity_level', 
-                        'safety_training_index', 'protective_gear_quality', 'base_salary', 
-                        'exposure', 'claim_length', 'claim_amount'] 
-
-    for col in sev_numeric_cols:
-        # FIXED: Ensure you are referencing 'sev' here, not 'freq'
-        sev[col] = sev[col].str.strip().str.replace(',', '.', regex=False)
-        sev[col] = pd.to_numeric(sev[col], errors='coerce')
-
-    print(f"Total claim_amount: {sev['claim_amount'].sum():,.2f}")
-    print(sev.head(10))
+def load_data(freq_path: str | list[str], sev_path: str | list[str],
+              input_cache: bool | None = None,
+              diag: Diagnostics | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Load freq and sev datasets from South African (semicolon-delimited) CSV files, concurrently."""
+    diag = diag or Diagnostics()
+    freq, sev = read_sa_csvs([(freq_path, FREQ_SCHEMA), (sev_path, SEV_SCHEMA)], cache=input_cache)
+
+    diag.metric('load', 'sev claim_amount total', lambda: float(sev['claim_amount'].sum()))
+    diag.detail('load', 'sev head', lambda: sev.head(10))
     return freq, sev
+
+def iter_sev_chunks(sev_path: str | list[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield the sev file in chunks of `chunksize` rows, parsed as in load_data."""
+    yield from iter_sa_csv(sev_path, SEV_SCHEMA, chunksize)
 # ──────────────────────────────────────────────
 # 2. STRING CLEANING – strip spaces & cut suffix
 # ──────────────────────────────────────────────
 
-_SUFFIX_RE = re.compile(r'_[A-Za-z]{3}\d{4}$')
+_SUFFIX_RE = r'_[A-Za-z]{3}\d{4}$'   # plain str so pyarrow strings match it natively
 
 def _clean_str_series(s: pd.Series) -> pd.Series:
     s = s.str.strip()
@@ -72,10 +82,13 @@ def _clean_str_series(s: pd.Series) -> pd.Series:
     return s
 
 def clean_string_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Step 2: strip + remove trailing _???#### from all non-numeric columns."""
+    """
+    Step 2: strip + remove trailing _???#### from all non-numeric columns.
+    Low-cardinality columns are cleaned once per distinct value (map_unique).
+    """
     # include=['object', 'str'] avoids Pandas 4 deprecation warning
     str_cols = df.select_dtypes(include=['object', 'str']).columns
-    df[str_cols] = df[str_cols].apply(_clean_str_series)
+    df[str_cols] = df[str_cols].apply(map_unique, fn=_clean_str_series)
     return df
 
 
@@ -93,13 +106,37 @@ def _increment_policy_id(pid: str) -> str:
     return f"{prefix}{int(num_str) + 1:0{len(num_str)}d}"
 
 def fill_freq_policy_id(freq: pd.DataFrame) -> pd.DataFrame:
-    """Step 3: propagate-and-increment policy_id for NaN rows in freq."""
+    """
+    Step 3: propagate-and-increment policy_id for NaN rows in freq.
+
+    The k-th NaN of a run gets the last known ID + k, zero-padded to that
+    ID's width – the same IDs as applying _increment_policy_id row by row,
+    in O(n): forward-fill the anchor position, take the offset within the
+    run, then rebuild every gap's suffix at once.
+    """
+    gaps = freq['policy_id'].isna().to_numpy()
+    if not gaps.any():
+        return freq
+
+    pos    = np.arange(len(gaps))
+    anchor = np.maximum.accumulate(np.where(gaps, -1, pos))[gaps]
+    if anchor[0] < 0:
+        raise ValueError("No prior policy_id found before first NaN row.")
+
+    known = freq['policy_id'].iloc[anchor].reset_index(drop=True)
+    parts = known.str.extract(_POL_RE)
+    bad   = parts[1].isna()
+    if bad.any():
+        raise ValueError(f"Unexpected policy_id format: {known[bad].iloc[0]}")
+
+    number = (parts[1].astype('int64') + (pos[gaps] - anchor)).astype(str)
+    width  = parts[1].str.len()
+    for w in width.unique():
+        at = width == w
+        number[at] = number[at].str.zfill(w)
+
     pid = freq['policy_id'].copy()
-    for i in pid[pid.isna()].index:
-        prev = pid[:i].dropna()
-        if prev.empty:
-            raise ValueError("No prior policy_id found before first NaN row.")
-        pid.at[i] = _increment_policy_id(prev.iloc[-1])
+    pid[gaps] = (parts[0] + number).to_numpy()
     freq['policy_id'] = pid
     return freq
 
@@ -108,9 +145,9 @@ def fill_freq_policy_id(freq: pd.DataFrame) -> pd.DataFrame:
 # 4. SET worker_id in freq (W-00001 … W-#####)
 # ──────────────────────────────────────────────
 
-def assign_freq_worker_id(freq: pd.DataFrame) -> pd.DataFrame:
-    """Step 4: overwrite worker_id with sequential W-##### identifiers."""
-    freq['worker_id'] = [f"W-{i:05d}" for i in range(1, len(freq) + 1)]
+def assign_freq_worker_id(freq: pd.DataFrame, start: int = 1) -> pd.DataFrame:
+    """Step 4: overwrite worker_id with sequential W-##### identifiers (from `start`)."""
+    freq['worker_id'] = [f"W-{i:05d}" for i in range(start, start + len(freq))]
     return freq
 
 
@@ -144,36 +181,53 @@ def _fix_comma_decimals(s: pd.Series) -> pd.Series:
 
 
 def _cast_numeric(df: pd.DataFrame) -> pd.DataFrame:
-    """Coerce all columns that look numeric to float."""
-    for col in df.columns:
-        fixed = _fix_comma_decimals(df[col]) if df[col].dtype == object else df[col]
-        converted = pd.to_numeric(fixed, errors='coerce')
-        if converted.notna().any():
-            df[col] = converted
+    """Coerce the columns _COLUMN_KINDS declares numeric (a no-op after the typed reader)."""
+    for col in numeric_cols(df, _COLUMN_KINDS):
+        df[col] = pd.to_numeric(_fix_comma_decimals(df[col]), errors='coerce')
     return df
 
 def abs_numeric(df: pd.DataFrame) -> pd.DataFrame:
-    """Step 6: take absolute value of all numeric entries."""
+    """Step 6: take absolute value of the schema's numeric columns."""
     df = _cast_numeric(df)
-    num_cols = df.select_dtypes(include='number').columns
+    num_cols = numeric_cols(df, _COLUMN_KINDS)
     df[num_cols] = df[num_cols].abs()
     return df
 
 
+# ──────────────────────────────────────────────
+# 6b. CATEGORICAL DTYPES for low-cardinality strings
+# ──────────────────────────────────────────────
+
+_CATEGORY_COLS = [
+    'solar_system', 'station_id', 'occupation', 'employment_type',
+    'injury_type', 'injury_cause',
+]
+
+def categorise(freq: pd.DataFrame, sev: pd.DataFrame
+               ) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Step 6b: convert _CATEGORY_COLS to one category dtype shared by freq and sev."""
+    freq, sev = to_categorical([freq, sev], _CATEGORY_COLS)
+    return freq, sev
+
+
 # ──────────────────────────────────────────────
 # 7. IMPUTE sev.policy_id from freq via worker_id
 # ──────────────────────────────────────────────
 
-def impute_sev_policy_id(sev: pd.DataFrame, freq: pd.DataFrame) -> pd.DataFrame:
+def impute_sev_policy_id(sev: pd.DataFrame, freq: pd.DataFrame,
+                         diag: Diagnostics | None = None) -> pd.DataFrame:
     """Step 7: fill NaN policy_id in sev using freq matched on worker_id."""
+    diag = diag or Diagnostics()
     freq_map = (freq.dropna(subset=['worker_id', 'policy_id'])
                     .drop_duplicates('worker_id')
                     .set_index('worker_id')['policy_id'])
     mask = sev['policy_id'].isna()
-    sev.loc[mask, 'policy_id'] = sev.loc[mask, 'worker_id'].map(freq_map)
-    still_nan = sev.loc[sev['policy_id'].isna(), 'worker_id'].tolist()
-    if still_nan:
-        print("sev policy_id still NaN – fix by hand:", still_nan)
+    # astype: with nothing to look up, map() gives float NaN, which a str column refuses
+    sev.loc[mask, 'policy_id'] = sev.loc[mask, 'worker_id'].map(freq_map).astype(sev['policy_id'].dtype)
+    diag.metric('impute_sev_policy_id', 'sev policy_id still NaN',
+                lambda: int(sev['policy_id'].isna().sum()))
+    diag.detail('impute_sev_policy_id', 'worker_ids to fix by hand',
+                lambda: sev.loc[sev['policy_id'].isna(), 'worker_id'].tolist())
     return sev
 
 
@@ -181,16 +235,19 @@ def impute_sev_policy_id(sev: pd.DataFrame, freq: pd.DataFrame) -> pd.DataFrame:
 # 8. IMPUTE freq.worker_id from sev via policy_id
 # ──────────────────────────────────────────────
 
-def impute_freq_worker_id(freq: pd.DataFrame, sev: pd.DataFrame) -> pd.DataFrame:
+def impute_freq_worker_id(freq: pd.DataFrame, sev: pd.DataFrame,
+                          diag: Diagnostics | None = None) -> pd.DataFrame:
     """Step 8: fill NaN worker_id in freq using sev matched on policy_id."""
+    diag = diag or Diagnostics()
     sev_map = (sev.dropna(subset=['policy_id', 'worker_id'])
                   .drop_duplicates('policy_id')
                   .set_index('policy_id')['worker_id'])
     mask = freq['worker_id'].isna()
-    freq.loc[mask, 'worker_id'] = freq.loc[mask, 'policy_id'].map(sev_map)
-    still_nan = freq.loc[freq['worker_id'].isna(), 'policy_id'].tolist()
-    if still_nan:
-        print("freq worker_id still NaN – fix by hand:", still_nan)
+    freq.loc[mask, 'worker_id'] = freq.loc[mask, 'policy_id'].map(sev_map).astype(freq['worker_id'].dtype)
+    diag.metric('impute_freq_worker_id', 'freq worker_id still NaN',
+                lambda: int(freq['worker_id'].isna().sum()))
+    diag.detail('impute_freq_worker_id', 'policy_ids to fix by hand',
+                lambda: freq.loc[freq['worker_id'].isna(), 'policy_id'].tolist())
     return freq
 
 
@@ -198,19 +255,35 @@ def impute_freq_worker_id(freq: pd.DataFrame, sev: pd.DataFrame) -> pd.DataFrame
 # 9. IMPUTE sev.worker_id from freq via policy_id
 # ──────────────────────────────────────────────
 
-def impute_sev_worker_id(sev: pd.DataFrame, freq: pd.DataFrame) -> pd.DataFrame:
+def impute_sev_worker_id(sev: pd.DataFrame, freq: pd.DataFrame,
+                         diag: Diagnostics | None = None) -> pd.DataFrame:
     """Step 9: fill NaN worker_id in sev using freq matched on policy_id."""
+    diag = diag or Diagnostics()
     freq_map = (freq.dropna(subset=['policy_id', 'worker_id'])
                     .drop_duplicates('policy_id')
                     .set_index('policy_id')['worker_id'])
     mask = sev['worker_id'].isna()
-    sev.loc[mask, 'worker_id'] = sev.loc[mask, 'policy_id'].map(freq_map)
-    still_nan = sev.loc[sev['worker_id'].isna(), 'policy_id'].tolist()
-    if still_nan:
-        print("sev worker_id still NaN – fix by hand:", still_nan)
+    sev.loc[mask, 'worker_id'] = sev.loc[mask, 'policy_id'].map(freq_map).astype(sev['worker_id'].dtype)
+    diag.metric('impute_sev_worker_id', 'sev worker_id still NaN',
+                lambda: int(sev['worker_id'].isna().sum()))
+    diag.detail('impute_sev_worker_id', 'policy_ids to fix by hand',
+                lambda: sev.loc[sev['worker_id'].isna(), 'policy_id'].tolist())
     return sev
 
 
+# ──────────────────────────────────────────────
+# 9b. ENCODE ID keys (decoded again by the merge)
+# ──────────────────────────────────────────────
+
+_KEY_COLS = ['worker_id', 'policy_id']
+
+def encode_ids(freq: pd.DataFrame, sev: pd.DataFrame
+               ) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Step 9b: _KEY_COLS → integer codes shared by freq and sev (see key_codes.py)."""
+    (freq, sev), codebook = encode_keys([freq, sev], _KEY_COLS)
+    return freq, sev, codebook
+
+
 # ──────────────────────────────────────────────
 # 10. CROSS-IMPUTE shared columns by worker_id
 # ──────────────────────────────────────────────
@@ -223,24 +296,24 @@ _SHARED_COLS = [
     'exposure',
 ]
 
-def cross_impute_by_worker_id(sev: pd.DataFrame, freq: pd.DataFrame
+def cross_impute_by_worker_id(sev: pd.DataFrame, freq: pd.DataFrame,
+                              index: PolicyIndex | None = None
                               ) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Step 10: for each shared column, fill NaN from the other df by worker_id."""
-    def _build_map(df: pd.DataFrame, col: str) -> pd.Series:
-        return (df.dropna(subset=['worker_id', col])
-                  .drop_duplicates('worker_id')
-                  .set_index('worker_id')[col])
-
+    """
+    Step 10: for each shared column, fill NaN from the other df by worker_id
+    (its first non-null value, as both stood before the column was filled).
+    """
+    index  = PolicyIndex.ensure(index, freq, sev, key='worker_id')
     shared = [c for c in _SHARED_COLS if c in sev.columns and c in freq.columns]
     for col in shared:
-        sev_map  = _build_map(sev,  col)
-        freq_map = _build_map(freq, col)
+        sev_first  = index.first_valid('sev',  col)
+        freq_first = index.first_valid('freq', col)
 
-        mask_s = sev['worker_id'].notna() & sev[col].isna()
-        sev.loc[mask_s, col] = sev.loc[mask_s, 'worker_id'].map(freq_map)
+        rows_s = np.flatnonzero((index.rows['sev'] >= 0) & sev[col].isna().to_numpy())
+        index.fill('sev', col, rows_s, 'freq', freq_first)
 
-        mask_f = freq['worker_id'].notna() & freq[col].isna()
-        freq.loc[mask_f, col] = freq.loc[mask_f, 'worker_id'].map(sev_map)
+        rows_f = np.flatnonzero((index.rows['freq'] >= 0) & freq[col].isna().to_numpy())
+        index.fill('freq', col, rows_f, 'sev', sev_first)
 
     return sev, freq
 
@@ -249,68 +322,55 @@ def cross_impute_by_worker_id(sev: pd.DataFrame, freq: pd.DataFrame
 # 11. CROSS-VALIDATE shared columns by worker_id
 # ──────────────────────────────────────────────
 
-_CRITERIA: dict[str, tuple] = {
-    'station_id':              ('not_nan',),
-    'solar_system':            ('not_nan',),
-    'occupation':              ('not_nan',),
-    'employment_type':         ('not_nan',),
-    'experience_yrs':          ('range', 0, 40),
-    'accident_history_flag':   ('isin', [0, 1]),
-    'psych_stress_index':      ('isin', [1, 2, 3, 4, 5]),
-    'hours_per_week':          ('isin', [20, 25, 30, 40]),
-    'supervision_level':       ('range', 0, 1),
-    'gravity_level':           ('range', 0.75, 1.50),
-    'safety_training_index':   ('isin', [1, 2, 3, 4, 5]),
-    'protective_gear_quality': ('isin', [1, 2, 3, 4, 5]),
-    'base_salary':             ('range', 20_000, np.inf),
-    'exposure':                ('range', 0, 1),
+# Criteria plus the freq fallback fill (steps 11-12) – compiled by rules.RuleSet.
+# last_resort is used when a column has no valid values to take a stat from.
+_CRITERIA: dict[str, Rule] = {
+    'station_id':              Rule('not_blank',                    fill='mode'),
+    'solar_system':            Rule('not_blank',                    fill='mode'),
+    'occupation':              Rule('not_blank',                    fill='mode'),
+    'employment_type':         Rule('not_blank',                    fill='mode'),
+    'experience_yrs':          Rule('range', (0, 40),               'median', 5),
+    'accident_history_flag':   Rule('isin', [0, 1],                 'median', 0),
+    'psych_stress_index':      Rule('isin', [1, 2, 3, 4, 5],        'median', 3),
+    'hours_per_week':          Rule('isin', [20, 25, 30, 40],       fill=30),
+    'supervision_level':       Rule('range', (0, 1),                'median', 0.5),
+    'gravity_level':           Rule('range', (0.75, 1.50),          'median', 1.0),
+    'safety_training_index':   Rule('isin', [1, 2, 3, 4, 5],        'median', 3),
+    'protective_gear_quality': Rule('isin', [1, 2, 3, 4, 5],        'median', 3),
+    'base_salary':             Rule('range', (20_000, np.inf),      'mean',   30_000),
+    'exposure':                Rule('range', (0, 1),                'median', 0.5),
 }
 
-def _meets(series: pd.Series, rule: tuple) -> pd.Series:
-    """Return boolean mask: True where value passes the rule."""
-    kind = rule[0]
-    if kind == 'not_nan':
-        return series.notna() & (series.astype(str).str.strip() != '')
-    if kind == 'range':
-        lo, hi = rule[1], rule[2]
-        num = pd.to_numeric(_fix_comma_decimals(series), errors='coerce')
-        return num.notna() & (num >= lo) & (num <= hi)
-    if kind == 'isin':
-        num = pd.to_numeric(_fix_comma_decimals(series), errors='coerce')
-        return num.isin(rule[1])
-    return pd.Series(False, index=series.index)
-
-def cross_validate_by_worker_id(sev: pd.DataFrame, freq: pd.DataFrame
+def cross_validate_by_worker_id(sev: pd.DataFrame, freq: pd.DataFrame,
+                                index: PolicyIndex | None = None
                                 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Step 11: per worker_id, if one df has a valid value and the other doesn't,
-    overwrite the invalid one. Uses worker_id join to avoid index misalignment.
+    overwrite the invalid one (NaN when the other has no valid value either).
+    Validity of every shared column is checked once per df, up front; only
+    invalid cells are overwritten, so the masks stay accurate for the valid
+    cells the other df reads from.
     """
-    shared = [c for c in _CRITERIA if c in sev.columns and c in freq.columns]
+    index   = PolicyIndex.ensure(index, freq, sev, key='worker_id')
+    shared  = [c for c in _CRITERIA if c in sev.columns and c in freq.columns]
+    rules   = RuleSet({col: _CRITERIA[col] for col in shared})
+    sev_ok  = rules.validity(sev)
+    freq_ok = rules.validity(freq)
 
     for col in shared:
-        rule = _CRITERIA[col]
-
-        # Build worker_id → valid_value maps from each df
-        sev_valid  = sev.loc[_meets(sev[col], rule), ['worker_id', col]]\
-                        .dropna(subset=['worker_id'])\
-                        .drop_duplicates('worker_id')\
-                        .set_index('worker_id')[col]
-
-        freq_valid = freq.loc[_meets(freq[col], rule), ['worker_id', col]]\
-                         .dropna(subset=['worker_id'])\
-                         .drop_duplicates('worker_id')\
-                         .set_index('worker_id')[col]
+        # first valid row per worker_id in each df
+        sev_valid  = index.first_rows('sev',  sev_ok[col])
+        freq_valid = index.first_rows('freq', freq_ok[col])
 
         # sev value invalid → fill from freq where freq has valid value
-        sev_bad_mask = (~_meets(sev[col], rule)) & sev['worker_id'].notna()
-        if sev_bad_mask.any():
-            sev.loc[sev_bad_mask, col] = sev.loc[sev_bad_mask, 'worker_id'].map(freq_valid)
+        sev_bad = np.flatnonzero(~sev_ok[col].to_numpy() & (index.rows['sev'] >= 0))
+        if len(sev_bad):
+            index.fill('sev', col, sev_bad, 'freq', freq_valid, clear_missing=True)
 
         # freq value invalid → fill from sev where sev has valid value
-        freq_bad_mask = (~_meets(freq[col], rule)) & freq['worker_id'].notna()
-        if freq_bad_mask.any():
-            freq.loc[freq_bad_mask, col] = freq.loc[freq_bad_mask, 'worker_id'].map(sev_valid)
+        freq_bad = np.flatnonzero(~freq_ok[col].to_numpy() & (index.rows['freq'] >= 0))
+        if len(freq_bad):
+            index.fill('freq', col, freq_bad, 'sev', sev_valid, clear_missing=True)
 
     return sev, freq
 
@@ -319,84 +379,25 @@ def cross_validate_by_worker_id(sev: pd.DataFrame, freq: pd.DataFrame
 # 12 & 13. FALLBACK IMPUTATION (freq & sev)
 # ──────────────────────────────────────────────
 
-_FREQ_RULES: dict[str, tuple] = {
-    'station_id':              ('not_nan',              'mode'),
-    'solar_system':            ('not_nan',              'mode'),
-    'occupation':              ('not_nan',              'mode'),
-    'employment_type':         ('not_nan',              'mode'),
-    'experience_yrs':          ('range', 0, 40,         'median'),
-    'accident_history_flag':   ('isin', [0, 1],         'median'),
-    'psych_stress_index':      ('isin', [1,2,3,4,5],    'median'),
-    'hours_per_week':          ('isin', [20,25,30,40],  30),
-    'supervision_level':       ('range', 0, 1,          'median'),
-    'gravity_level':           ('range', 0.75, 1.50,    'median'),
-    'safety_training_index':   ('isin', [1,2,3,4,5],    'median'),
-    'protective_gear_quality': ('isin', [1,2,3,4,5],    'median'),
-    'base_salary':             ('range', 20_000, np.inf,'mean'),
-    'exposure':                ('range', 0, 1,          'median'),
-}
+_FREQ_RULES = _CRITERIA
 
-_SEV_RULES: dict[str, tuple] = {
+_SEV_RULES: dict[str, Rule] = {
     **_FREQ_RULES,
-    'accident_history_flag':   ('isin', [0, 1],         'mode'),
-    'injury_type':             ('not_nan',              'mode'),
-    'injury_cause':            ('not_nan',              'mode'),
-    'claim_length':            ('range', 3, 1000,       'median'),
-}
-
-# Hard-coded last-resort fallbacks if no valid values exist in column
-_LAST_RESORT: dict[str, object] = {
-    'experience_yrs': 5, 'accident_history_flag': 0, 'psych_stress_index': 3,
-    'hours_per_week': 30, 'supervision_level': 0.5, 'gravity_level': 1.0,
-    'safety_training_index': 3, 'protective_gear_quality': 3,
-    'base_salary': 30_000, 'exposure': 0.5,
+    'accident_history_flag':   Rule('isin', [0, 1],                 fill='mode'),
+    'injury_type':             Rule('not_blank',                    fill='mode'),
+    'injury_cause':            Rule('not_blank',                    fill='mode'),
+    'claim_length':            Rule('range', (3, 1000),             fill='median'),
 }
 
-def _parse_rule(rule_tuple: tuple) -> tuple[tuple, str | int | float]:
-    """Split a combined rule tuple into (criteria_tuple, fill_strategy)."""
-    *crit, fill = rule_tuple
-    return tuple(crit), fill
-
-def _compute_fill(series: pd.Series, col: str, crit: tuple,
-                  strategy: str | int | float) -> object:
-    num_series = (pd.to_numeric(_fix_comma_decimals(series), errors='coerce')
-                  if crit[0] in ('range', 'isin') else series)
-    valid = num_series[_meets(num_series, crit)]
-
-    if isinstance(strategy, (int, float)):
-        return strategy
-    if strategy == 'mode':
-        return series.mode().iloc[0] if not series.mode().empty else np.nan
-    if strategy == 'median':
-        val = valid.median() if not valid.empty else np.nan
-    elif strategy == 'mean':
-        val = valid.mean() if not valid.empty else np.nan
-    else:
-        val = np.nan
-
-    # If computed stat is still NaN, use hard-coded last resort
-    if pd.isna(val):
-        val = _LAST_RESORT.get(col, np.nan)
-        if not pd.isna(val):
-            print(f"  [fallback] '{col}' had no valid values – using last-resort fill: {val}")
-    return val
-
-def apply_fallback_imputation(df: pd.DataFrame,
-                              rules: dict[str, tuple]) -> pd.DataFrame:
-    """Steps 12/13: for each column, replace invalid/NaN values with fill stat."""
-    for col, rule_tuple in rules.items():
-        if col not in df.columns:
-            continue
-        crit, fill_strategy = _parse_rule(rule_tuple)
-
-        if crit[0] in ('range', 'isin'):
-            df[col] = pd.to_numeric(_fix_comma_decimals(df[col]), errors='coerce')
-
-        bad_mask = ~_meets(df[col], crit)
-        if bad_mask.any():
-            fill_val = _compute_fill(df[col], col, crit, fill_strategy)
-            df.loc[bad_mask, col] = fill_val
-    return df
+def apply_fallback_imputation(df: pd.DataFrame, rules: dict[str, Rule],
+                              fills: dict | None = None) -> pd.DataFrame:
+    """
+    Steps 12/13: replace invalid/NaN values with each column's fill (mode,
+    median or mean of its valid values, or a constant; a partitioned run
+    passes the whole book's `fills`). range / isin columns are stored as
+    parsed numbers.
+    """
+    return RuleSet(rules).apply_fills(df, coerce=True, fills=fills)
 
 
 # ──────────────────────────────────────────────
@@ -412,110 +413,156 @@ def drop_invalid_claim_amounts(sev: pd.DataFrame) -> pd.DataFrame:
 # ──────────────────────────────────────────────
 # 15 & 16. MERGE & NaN CHECK
 # ──────────────────────────────────────────────
-def merge_datasets(freq: pd.DataFrame, sev: pd.DataFrame) -> pd.DataFrame:
+
+# How sev claims meet freq workers:
+#   dominant  one row per worker: claim_count, claim_amount and claim_length
+#             sums, claim_length_max, the most frequent injury_type /
+#             injury_cause (ties: first seen)
+#   listed    as dominant, but the distinct injury values, comma-joined
+#   explode   every claim row joined onto its worker (one row per claim)
+MERGE_MODES    = ('dominant', 'listed', 'explode')
+MERGE_MODE_ENV = 'DATA_CLEAN_WORKERS_MERGE'
+_INJURY_COLS   = ['injury_type', 'injury_cause']
+
+def resolve_merge_mode(merge_mode: str | None) -> str:
+    """merge_mode as given, or DATA_CLEAN_WORKERS_MERGE when None (default 'dominant')."""
+    mode = merge_mode or os.environ.get(MERGE_MODE_ENV) or 'dominant'
+    if mode not in MERGE_MODES:
+        raise ValueError(f"Unknown workers merge mode {mode!r}; use one of {list(MERGE_MODES)}")
+    return mode
+
+def _dominant(sev: pd.DataFrame, col: str) -> pd.Series:
+    """Per worker_id, the most frequent non-null value of col (ties: first seen)."""
+    counts = (sev.groupby(['worker_id', col], sort=False, observed=True).size()
+                 .reset_index(name='n'))
+    best = counts.sort_values('n', ascending=False, kind='stable').drop_duplicates('worker_id')
+    return best.set_index('worker_id')[col]
+
+def _listed(sev: pd.DataFrame, col: str) -> pd.Series:
+    """Per worker_id, its distinct non-null values of col, comma-joined in order seen."""
+    pairs  = sev[['worker_id', col]].dropna().drop_duplicates()
+    values = pairs[col].astype(str).set_axis(pairs['worker_id'])
+    rank   = pairs.groupby('worker_id', sort=False).cumcount().to_numpy()
+    # one vectorised pass per rank instead of a Python join per worker
+    listed = values[rank == 0]
+    for k in range(1, rank.max() + 1 if len(rank) else 1):
+        more = values[rank == k]
+        listed.loc[more.index] = listed.loc[more.index] + ', ' + more
+    return listed.astype('category')   # few distinct combinations
+
+def aggregate_claims(sev: pd.DataFrame, injuries: str = 'dominant') -> pd.DataFrame:
     """
-    Merge severity data onto frequency data by worker_id.
-    Brings injury_type, injury_cause, claim_length, claim_amount from sev to freq.
-    Fills NaN values with 0 for these columns after merge.
+    Step 15a: sev claim rows → one row per worker_id (rows without one are
+    dropped, as the join would). injuries: 'dominant' or 'listed'.
     """
-    # DIAGNOSTIC: Check initial state
-    print("\n" + "="*50)
-    print("MERGE DIAGNOSTICS")
-    print("="*50)
-    
-    # 1. Check worker_id relationships
-    freq_workers = set(freq['worker_id'].unique())
-    sev_workers = set(sev['worker_id'].unique())
-    
-    print(f"\n1. Worker ID Statistics:")
-    print(f"   - Unique workers in freq: {len(freq_workers)}")
-    print(f"   - Unique workers in sev: {len(sev_workers)}")
-    print(f"   - Workers in both: {len(freq_workers & sev_workers)}")
-    print(f"   - Workers only in freq: {len(freq_workers - sev_workers)}")
-    print(f"   - Workers only in sev: {len(sev_workers - freq_workers)}")
-    
-    # 2. Check claim amounts before merge
-    print(f"\n2. SEV Claim Amount Statistics (before merge):")
-    print(f"   - Total rows in sev: {len(sev)}")
-    print(f"   - Total claim_amount: {sev['claim_amount'].sum():,.2f}")
-    print(f"   - Mean claim_amount: {sev['claim_amount'].mean():,.2f}")
-    print(f"   - Median claim_amount: {sev['claim_amount'].median():,.2f}")
-    print(f"   - Min claim_amount: {sev['claim_amount'].min():,.2f}")
-    print(f"   - Max claim_amount: {sev['claim_amount'].max():,.2f}")
-    
-    # 3. Check for multiple claims per worker
-    claims_per_worker = sev.groupby('worker_id').size()
-    multi_claim_workers = claims_per_worker[claims_per_worker > 1]
-    print(f"\n3. Multiple Claims Analysis:")
-    print(f"   - Workers with multiple claims: {len(multi_claim_workers)}")
-    if len(multi_claim_workers) > 0:
-        print(f"   - Distribution of claims per worker:")
-        print(claims_per_worker.value_counts().sort_index().to_string())
-        
-        # Show example of worker with multiple claims
-        example_worker = multi_claim_workers.index[0]
-        print(f"\n   Example - Worker {example_worker}:")
-        example_claims = sev[sev['worker_id'] == example_worker][['claim_amount']]
-        print(example_claims.to_string())
-    
-    # Define columns to bring from sev
-    cols_to_bring = ['worker_id', 'injury_type', 'injury_cause', 'claim_length', 'claim_amount']
+    sev     = sev.dropna(subset=['worker_id'])
+    grouped = sev.groupby('worker_id', sort=False)
+    agg = grouped.agg(claim_length=('claim_length', 'sum'),
+                      claim_length_max=('claim_length', 'max'),
+                      claim_amount=('claim_amount', 'sum'),
+                      claim_count=('claim_amount', 'size'))
+    reduce = _dominant if injuries == 'dominant' else _listed
+    for col in reversed(_INJURY_COLS):
+        agg.insert(0, col, reduce(sev, col).reindex(agg.index))
+    return agg.reset_index()
+
+def _worker_overlap(freq: pd.DataFrame, sev: pd.DataFrame) -> dict[str, int]:
+    freq_workers = pd.Index(freq['worker_id'].unique())
+    sev_workers  = pd.Index(sev['worker_id'].unique())
+    both = len(freq_workers.intersection(sev_workers))
+    return {'freq': len(freq_workers), 'sev': len(sev_workers), 'both': both,
+            'freq only': len(freq_workers) - both, 'sev only': len(sev_workers) - both}
+
+def _example_multi_claim(sev: pd.DataFrame, codebook: pd.DataFrame | None) -> pd.DataFrame:
+    """The claims of the first worker_id (sorted) with more than one sev row."""
+    sev    = decode_keys(sev[['worker_id', 'claim_amount']], codebook)
+    counts = sev['worker_id'].value_counts().sort_index()
+    multi  = counts.index[counts > 1]
+    return sev.loc[sev['worker_id'] == multi[0], ['worker_id', 'claim_amount']] if len(multi) else None
+
+def _reduction(freq: pd.DataFrame, sev: pd.DataFrame, merged: pd.DataFrame) -> dict:
+    """Rows and memory of the per-worker merge against the explode join it replaces."""
+    explode_rows = len(freq[['worker_id']].merge(sev[['worker_id']], on='worker_id', how='left'))
+    merged_mb    = merged.memory_usage(deep=True).sum() / 1024 ** 2
+    return {'claim rows': len(sev), 'explode rows': explode_rows, 'merged rows': len(merged),
+            'rows saved': explode_rows - len(merged),
+            'merged MB': round(merged_mb, 2),
+            'explode MB (est.)': round(merged_mb * explode_rows / max(len(merged), 1), 2)}
+
+def merge_datasets(freq: pd.DataFrame, sev: pd.DataFrame,
+                   codebook: pd.DataFrame | None = None,
+                   diag: Diagnostics | None = None,
+                   merge_mode: str = 'dominant') -> pd.DataFrame:
+    """
+    Merge severity data onto frequency data by worker_id (see MERGE_MODES).
+    Brings injury_type, injury_cause, claim_length, claim_amount (and, when
+    aggregated, claim_count / claim_length_max) from sev to freq; sev that is
+    already one row per worker (streaming) is joined as is. Fills NaN values
+    with 0 for these columns after merge. Encoded IDs are decoded with the
+    codebook right after the join.
+    Worker overlap, claim-amount statistics and row duplication (or, when
+    aggregated, the row / memory reduction) are recorded on diag (only
+    computed when its level asks for them).
+    """
+    diag = diag or Diagnostics()
+    section = 'merge_datasets'
+
+    # Before the merge: worker_id overlap, sev claim amounts, claims per worker
+    diag.metric(section, 'unique worker_ids', lambda: _worker_overlap(freq, sev))
+    diag.metric(section, 'sev claim_amount',
+                lambda: sev['claim_amount'].agg(['count', 'sum', 'mean', 'median', 'min', 'max']))
+    diag.metric(section, 'workers with multiple claims',
+                lambda: int((sev['worker_id'].value_counts() > 1).sum()))
+    diag.detail(section, 'claims per worker (distribution)',
+                lambda: sev['worker_id'].value_counts().value_counts().sort_index())
+    diag.detail(section, 'example multi-claim worker', lambda: _example_multi_claim(sev, codebook))
+
+    claims = sev
+    if merge_mode != 'explode' and 'claim_count' not in sev.columns:
+        sev = aggregate_claims(sev, injuries=merge_mode)
+
+    # Define columns to bring from sev (claim_count only exists if sev is pre-aggregated)
+    cols_to_bring = ['worker_id', 'injury_type', 'injury_cause', 'claim_length',
+                     'claim_length_max', 'claim_amount', 'claim_count']
     
     # Filter only existing columns from sev
     existing_cols = [col for col in cols_to_bring if col in sev.columns]
     sev_sub = sev[existing_cols].copy()
     
-    # 4. Check freq before merge
-    print(f"\n4. FREQ Statistics (before merge):")
-    print(f"   - Total rows in freq: {len(freq)}")
-    
     # Merge sev onto freq by worker_id (left join keeps all freq rows)
     merged = freq.merge(sev_sub, on='worker_id', how='left')
-    
-    # 5. Check merge result
-    print(f"\n5. MERGE Result:")
-    print(f"   - Rows after merge: {len(merged)}")
-    print(f"   - Rows added: {len(merged) - len(freq)}")
-    
-    # 6. Check for duplication
-    if len(merged) > len(freq):
-        print(f"   ⚠️  WARNING: Merge created {len(merged) - len(freq)} additional rows!")
-        print(f"      This indicates multiple sev rows per worker_id")
-        
-        # Show which workers are causing duplication
-        worker_counts = merged.groupby('worker_id').size()
-        duplicated_workers = worker_counts[worker_counts > 1]
-        print(f"\n      Workers with multiple rows after merge: {len(duplicated_workers)}")
-        if len(duplicated_workers) > 5:
-            print(duplicated_workers.head(10).to_string())
-    
-    # 7. Check claim amounts after merge (before fillna)
-    print(f"\n6. Claim Amount After Merge (before fillna):")
-    print(f"   - Total claim_amount: {merged['claim_amount'].sum():,.2f}")
-    print(f"   - Mean claim_amount: {merged['claim_amount'].mean():,.2f}")
-    print(f"   - Null count: {merged['claim_amount'].isna().sum()}")
+    merged = decode_keys(merged, codebook)
+
+    # Rows added by the merge mean several sev rows per worker_id
+    diag.metric(section, 'rows',
+                lambda: {'freq': len(freq), 'merged': len(merged), 'added': len(merged) - len(freq)})
+    if sev is not claims:
+        diag.metric(section, 'reduction vs explode', lambda: _reduction(freq, claims, merged))
+    diag.detail(section, 'workers with multiple rows after merge',
+                lambda: merged['worker_id'].value_counts().loc[lambda n: n > 1])
+    diag.metric(section, 'claim_amount before fillna',
+                lambda: {'sum':   float(merged['claim_amount'].sum()),
+                         'mean':  float(merged['claim_amount'].mean()),
+                         'nulls': int(merged['claim_amount'].isna().sum())})
     
     # Fill NaN values with 0 for the severity columns
-    severity_cols = ['injury_type', 'injury_cause', 'claim_length', 'claim_amount']
+    severity_cols = ['injury_type', 'injury_cause', 'claim_length', 'claim_length_max',
+                     'claim_amount', 'claim_count']
     for col in severity_cols:
         if col in merged.columns:
+            if isinstance(merged[col].dtype, pd.CategoricalDtype):
+                merged[col] = merged[col].cat.add_categories([0])
             merged[col] = merged[col].fillna(0)
     
-    # 8. Final check
-    print(f"\n7. FINAL Claim Amount:")
-    print(f"   - Total claim_amount: {merged['claim_amount'].sum():,.2f}")
-    print(f"   - Ratio to original SEV total: {merged['claim_amount'].sum() / sev['claim_amount'].sum():.2f}x")
-    print("="*50 + "\n")
+    diag.metric(section, 'final claim_amount',
+                lambda: {'sum': float(merged['claim_amount'].sum()),
+                         'ratio to sev': float(merged['claim_amount'].sum() / sev['claim_amount'].sum())})
     
     return merged
-def check_nans(df: pd.DataFrame, label: str) -> None:
-    """Step 16: report NaN counts per column."""
-    nan_counts = df.isna().sum()
-    nan_counts = nan_counts[nan_counts > 0]
-    if nan_counts.empty:
-        print(f"[{label}] No NaN values found.")
-    else:
-        print(f"[{label}] NaN summary:\n{nan_counts.to_string()}\n")
+def check_nans(df: pd.DataFrame, label: str, diag: Diagnostics | None = None) -> None:
+    """Step 16: record NaN counts per column (empty when none)."""
+    diag = diag or Diagnostics()
+    diag.metric('check_nans', f'{label} NaN counts', lambda: nan_counts(df))
 
 
 # ──────────────────────────────────────────────
@@ -523,8 +570,8 @@ def check_nans(df: pd.DataFrame, label: str) -> None:
 # ──────────────────────────────────────────────
 
 def save_output(df: pd.DataFrame, path: str) -> None:
-    """Step 17: save to semicolon-delimited CSV."""
-    df.to_csv(path, index=False, sep=";", decimal=",")
+    """Step 17: save to semicolon-delimited CSV (or Parquet, by extension)."""
+    write_output(df, path, sep=";", decimal=",")
     print(f"Saved → {path}")
 
 
@@ -532,31 +579,297 @@ def save_output(df: pd.DataFrame, path: str) -> None:
 # MAIN PIPELINE
 # ──────────────────────────────────────────────
 
-def run_pipeline(freq_path: str = r"messy_data\workers_claims_freq.csv",
-                 sev_path:  str = r"messy_data\workers_claims_sev.csv",
-                 out_path:  str = "business_claims_merged.csv") -> pd.DataFrame:
-
-    freq, sev = load_data(freq_path, sev_path)
+def run_pipeline(freq_path: str | list[str] = os.path.join('messy_data', 'workers_claims_freq.csv'),
+                 sev_path:  str | list[str] = os.path.join('messy_data', 'workers_claims_sev.csv'),
+                 out_path:  str = 'workers_claims_merged.csv',
+                 chunksize: int | None = None,
+                 profile:   bool | StepProfiler | None = None,
+                 cache:     bool | str | StageCache | None = None,
+                 input_cache: bool | None = None,
+                 diagnostics: int | str | Diagnostics | None = None,
+                 merge_mode: str | None = None) -> pd.DataFrame:
+
+    # merge_mode (or DATA_CLEAN_WORKERS_MERGE) picks per-worker or per-claim rows – see MERGE_MODES
+    merge_mode = resolve_merge_mode(merge_mode)
+    if chunksize:
+        # streaming folds sev into per-worker partials, so it has no per-claim rows
+        if merge_mode == 'explode':
+            raise ValueError("merge_mode 'explode' does not combine with chunksize "
+                             "(streaming writes one row per worker)")
+        return run_pipeline_streaming(freq_path, sev_path, out_path, chunksize, profile,
+                                      input_cache, diagnostics)
+
+    # profile=True (or DATA_CLEAN_PROFILE=1) times every step – see profiling.py
+    # cache=True (or DATA_CLEAN_CACHE_DIR) reuses unchanged stages – see stage_cache.py
+    # input_cache=True (or DATA_CLEAN_INPUT_CACHE=1) loads parsed Arrow copies – see sa_csv.py
+    # diagnostics=1|2 (or DATA_CLEAN_DIAGNOSTICS) records sanity metrics – see diagnostics.py
+    prof = StepProfiler.resolve(profile, 'workers')
+    steps = StageCache.resolve(cache, prof)
+    diag = Diagnostics.resolve(diagnostics, 'workers')
+    freq, sev = steps.run('load', load_data, freq_path, sev_path, input_cache=input_cache,
+                          diag=diag)
+    freq = steps.run('clean strings (freq)', clean_string_columns, freq)
+    sev  = steps.run('clean strings (sev)', clean_string_columns, sev)
+    freq = steps.run('fill_freq_policy_id', fill_freq_policy_id, freq)
+    freq = steps.run('assign_freq_worker_id', assign_freq_worker_id, freq)
+    freq, sev = steps.run('drop_columns', drop_columns, freq, sev)
+    freq = steps.run('abs (freq)', abs_numeric, freq)
+    sev  = steps.run('abs (sev)', abs_numeric, sev)
+    freq, sev = steps.run('categorise', categorise, freq, sev)
+    sev  = steps.run('impute_sev_policy_id', impute_sev_policy_id, sev, freq, diag=diag)
+    freq = steps.run('impute_freq_worker_id', impute_freq_worker_id, freq, sev, diag=diag)
+    sev  = steps.run('impute_sev_worker_id', impute_sev_worker_id, sev, freq, diag=diag)
+    freq, sev, codebook = steps.run('encode_ids', encode_ids, freq, sev)
+    index = steps.run('worker index', PolicyIndex, freq, sev, key='worker_id')
+    sev, freq = steps.run('cross_impute_by_worker_id', cross_impute_by_worker_id, sev, freq, index)
+    sev, freq = steps.run('cross_validate_by_worker_id', cross_validate_by_worker_id, sev, freq,
+                          index)
+    sev  = steps.run('drop_invalid_claim_amounts', drop_invalid_claim_amounts, sev)
+    freq = steps.run('fallback (freq)', apply_fallback_imputation, freq, _FREQ_RULES)
+    sev  = steps.run('fallback (sev)', apply_fallback_imputation, sev, _SEV_RULES)
+    workers_claims_merged = steps.run('merge_datasets', merge_datasets, freq, sev, codebook,
+                                      diag=diag, merge_mode=merge_mode)
+    steps.run('check_nans', check_nans, workers_claims_merged, "workers_claims_merged",
+              diag=diag)
+    steps.run('save', save_output, workers_claims_merged, out_path)
+    prof.finish()
+    steps.finish()
+    diag.finish(out_path)
+    return steps.value(workers_claims_merged)
+
+
+# ──────────────────────────────────────────────
+# STREAMING PIPELINE (sev read in chunks)
+# ──────────────────────────────────────────────
+
+# Sev-only columns: their fallback fill is applied per chunk, before aggregation,
+# with the whole sev file's statistics (a first pass, see _sev_only_fills)
+_SEV_ONLY_RULES = {col: _SEV_RULES[col] for col in ('injury_type', 'injury_cause', 'claim_length')}
+
+def _clean_sev_chunk(chunk: pd.DataFrame, freq: pd.DataFrame,
+                     fills: dict | None = None) -> pd.DataFrame:
+    """
+    Steps 2, 5-7, 9 and 14 for one sev chunk, against freq, then step 13
+    (sev-only columns) with `fills` when given.
+    """
+    chunk = clean_string_columns(chunk)
+    chunk = chunk.drop(columns=['claim_id', 'claim_seq'], errors='ignore')
+    chunk = abs_numeric(chunk)
+    chunk = impute_sev_policy_id(chunk, freq)
+    chunk = impute_sev_worker_id(chunk, freq)
+    chunk = drop_invalid_claim_amounts(chunk)
+    if fills is None:
+        return chunk
+    return apply_fallback_imputation(chunk, _SEV_ONLY_RULES, fills)
+
+def _sev_only_fills(sev_path: str | list[str], freq: pd.DataFrame, chunksize: int) -> dict:
+    """Step 13's sev-only fills over the whole sev file: a first pass, merged per chunk."""
+    stats = FillStats(RuleSet(_SEV_ONLY_RULES))
+    for chunk in iter_sev_chunks(sev_path, chunksize):
+        stats.update(_clean_sev_chunk(chunk, freq))
+    return stats.fills()
+
+def _load_clean_freq(freq_path: str | list[str], input_cache: bool | None = None) -> pd.DataFrame:
+    """Freq-side load and cleaning (steps 1-6) for the streaming pipeline."""
+    freq = read_sa_csv(freq_path, FREQ_SCHEMA, cache=input_cache)
     freq = clean_string_columns(freq)
-    sev  = clean_string_columns(sev)
     freq = fill_freq_policy_id(freq)
     freq = assign_freq_worker_id(freq)
-    freq, sev = drop_columns(freq, sev)
-    freq = abs_numeric(freq)
-    sev  = abs_numeric(sev)
-    sev  = impute_sev_policy_id(sev, freq)
-    freq = impute_freq_worker_id(freq, sev)
-    sev  = impute_sev_worker_id(sev, freq)
-    sev, freq = cross_impute_by_worker_id(sev, freq)
-    sev, freq = cross_validate_by_worker_id(sev, freq)
-    sev  = drop_invalid_claim_amounts(sev)
-    freq = apply_fallback_imputation(freq, _FREQ_RULES)
-    sev  = apply_fallback_imputation(sev,  _SEV_RULES)
-    business_claims_merged = merge_datasets(freq, sev)
-    check_nans(business_claims_merged, "business_claims_merged")
-    save_output(business_claims_merged, out_path)
-    return business_claims_merged
+    freq = freq.drop(columns=['claim_count'], errors='ignore')
+    return abs_numeric(freq)
+
+def _stream_sev(sev_path: str | list[str], freq: pd.DataFrame, chunksize: int,
+                fills: dict) -> pd.DataFrame:
+    """Clean and fill each sev chunk and fold it into per-worker partials."""
+    chunks = (_clean_sev_chunk(chunk, freq, fills)
+              for chunk in iter_sev_chunks(sev_path, chunksize))
+    return stream_aggregate(chunks, keys=['worker_id'],
+                            first_cols=['policy_id', *_SHARED_COLS, 'injury_type', 'injury_cause'],
+                            sum_cols=['claim_amount', 'claim_length'])
+
+def run_pipeline_streaming(freq_path: str | list[str], sev_path: str | list[str],
+                           out_path: str = "workers_claims_merged.csv",
+                           chunksize: int = DEFAULT_CHUNKSIZE,
+                           profile: bool | StepProfiler | None = None,
+                           input_cache: bool | None = None,
+                           diagnostics: int | str | Diagnostics | None = None) -> pd.DataFrame:
+    """
+    Same steps as run_pipeline, but the sev file is read `chunksize` rows at a
+    time and reduced to per-worker partials: claim_count, claim_amount and
+    claim_length sums, first-seen policy_id / shared / injury columns. Memory
+    is bounded by the chunk size plus the freq side.
+
+    The output therefore has one row per freq worker (with claim_count)
+    whatever the merge mode, with first-seen rather than dominant injury
+    values and no claim_length_max. The sev-only fallback fills use the
+    whole file's statistics, gathered in a first pass over it (rules.FillStats),
+    so the sev file is read twice. Diagnostics cover the whole-frame steps only.
+    """
+    prof = StepProfiler.resolve(profile, 'workers (streaming)')
+    diag = Diagnostics.resolve(diagnostics, 'workers (streaming)')
+    freq = prof.run('load + clean freq', _load_clean_freq, freq_path, input_cache)
+    sev_fills = prof.run('sev fill statistics', _sev_only_fills, sev_path, freq, chunksize)
+    sev  = prof.run('stream + aggregate sev', _stream_sev, sev_path, freq, chunksize, sev_fills)
+    freq, sev = prof.run('categorise', categorise, freq, sev)
+    freq = prof.run('impute_freq_worker_id', impute_freq_worker_id, freq, sev, diag=diag)
+    freq, sev, codebook = prof.run('encode_ids', encode_ids, freq, sev)
+    index = prof.run('worker index', PolicyIndex, freq, sev, key='worker_id')
+    sev, freq = prof.run('cross_impute_by_worker_id', cross_impute_by_worker_id, sev, freq, index)
+    sev, freq = prof.run('cross_validate_by_worker_id', cross_validate_by_worker_id, sev, freq,
+                         index)
+    freq = prof.run('fallback (freq)', apply_fallback_imputation, freq, _FREQ_RULES)
+    workers_claims_merged = prof.run('merge_datasets', merge_datasets, freq, sev, codebook,
+                                     diag=diag)
+    prof.run('check_nans', check_nans, workers_claims_merged, "workers_claims_merged", diag=diag)
+    prof.run('save', save_output, workers_claims_merged, out_path)
+    prof.finish()
+    diag.finish(out_path)
+    return workers_claims_merged
+
+
+# ──────────────────────────────────────────────
+# PARTITIONED PIPELINE (out of core, see partitioned.py)
+# ──────────────────────────────────────────────
+
+def _clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Steps 2, 5 and 6 for one sev chunk."""
+    chunk = clean_string_columns(chunk)
+    chunk = chunk.drop(columns=['claim_id', 'claim_seq'], errors='ignore')
+    return abs_numeric(chunk)
+
+def _clean_freq_chunk(chunk: pd.DataFrame, previous: pd.DataFrame | None, start: int) -> pd.DataFrame:
+    """
+    Steps 2-6 for one freq chunk. Step 3 continues from `previous`, the last
+    row of the chunk before (so a run of missing policy_ids can cross chunks);
+    step 4 numbers the workers from `start`.
+    """
+    chunk = clean_string_columns(chunk)
+    if previous is not None:
+        chunk = fill_freq_policy_id(pd.concat([previous, chunk], ignore_index=True)).iloc[1:]
+    else:
+        chunk = fill_freq_policy_id(chunk)
+    chunk = assign_freq_worker_id(chunk.reset_index(drop=True), start)
+    return chunk
+
+def _partition_inputs(freq_path: str | list[str], sev_path: str | list[str],
+                      store: ChunkStore, partitions: int, chunksize: int
+                      ) -> tuple[int, dict[str, pd.CategoricalDtype], FillStats]:
+    """
+    Steps 1-9 as passes over the chunks, then freq and sev hash-partitioned on
+    worker_id. Steps 7 and 9 look up freq through FirstMatch; step 8 has
+    nothing to fill (step 4 numbers every freq row). Sev rows left without a
+    worker_id never reach the merge, but step 13's statistics cover them:
+    they go into the returned sev FillStats instead of a partition.
+    Returns the freq row count, the shared category dtypes and those stats.
+    """
+    seen: dict[str, list] = {}
+
+    # 2, 5, 6 for sev, spilled until freq has been seen; the IDs steps 7 and 9 look for
+    wanted_policy, wanted_worker = [], []
+    for chunk in iter_sev_chunks(sev_path, chunksize):
+        chunk = _clean_chunk(chunk)
+        store.append('sev_clean', chunk)
+        collect_categories(seen, chunk, _CATEGORY_COLS)
+        wanted_policy.append(missing_keys(chunk, 'policy_id', ['worker_id']))
+        wanted_worker.append(missing_keys(chunk, 'worker_id', ['policy_id']))
+    policy_of = FirstMatch('policy_id', ['worker_id'], wanted_policy)
+    worker_of = FirstMatch('worker_id', ['policy_id'], wanted_worker)
+
+    # 1-6 for freq, straight into the partitions
+    n_rows, previous = 0, None
+    for chunk in iter_sa_csv(freq_path, FREQ_SCHEMA, chunksize):
+        chunk = _clean_freq_chunk(chunk, previous, n_rows + 1)
+        previous = chunk.iloc[-1:]
+        chunk = abs_numeric(chunk.drop(columns=['claim_count'], errors='ignore'))
+        collect_categories(seen, chunk, _CATEGORY_COLS)
+        policy_of.update(chunk)
+        worker_of.update(chunk)
+        chunk[ROW] = np.arange(n_rows, n_rows + len(chunk))
+        store.append('freq', chunk, hash_partition(chunk['worker_id'], partitions))
+        n_rows += len(chunk)
+
+    # 7, 9 for sev
+    orphans = FillStats(RuleSet(_SEV_RULES))
+    for chunk in store.pieces('sev_clean'):
+        chunk = impute_sev_policy_id(chunk, policy_of.lookup)
+        chunk = impute_sev_worker_id(chunk, worker_of.lookup)
+        no_worker = chunk['worker_id'].isna()
+        if no_worker.any():
+            orphans.update(drop_invalid_claim_amounts(chunk.loc[no_worker].copy()))
+        chunk = chunk.loc[~no_worker]
+        store.append('sev', chunk, hash_partition(chunk['worker_id'], partitions))
+
+    return n_rows, {col: union_dtype(values) for col, values in seen.items()}, orphans
+
+def _partition_worker_steps(part: int, store: ChunkStore,
+                            dtypes: dict[str, pd.CategoricalDtype]) -> tuple[FillStats, FillStats]:
+    """Steps 6b, 9b-11 and 14 for one partition, kept for _partition_merge."""
+    freq, sev = to_categorical([store.read('freq', part), store.read('sev', part)],
+                               _CATEGORY_COLS, dtypes)
+    freq, sev, codebook = encode_ids(freq, sev)
+    index = PolicyIndex(freq, sev, key='worker_id')
+    sev, freq = cross_impute_by_worker_id(sev, freq, index)
+    sev, freq = cross_validate_by_worker_id(sev, freq, index)
+    sev = drop_invalid_claim_amounts(sev)
+    store.save('worker_steps', part, (freq, sev, codebook))
+    # for the whole book's steps 12 and 13
+    return FillStats(RuleSet(_FREQ_RULES)).update(freq), FillStats(RuleSet(_SEV_RULES)).update(sev)
+
+def _partition_merge(part: int, store: ChunkStore, freq_fills: dict, sev_fills: dict,
+                     merge_mode: str, n_rows: int, n_buckets: int) -> dict:
+    """Steps 12, 13 and 15 for one partition, with the book's fills."""
+    freq, sev, codebook = store.load('worker_steps', part)
+    freq = apply_fallback_imputation(freq, _FREQ_RULES, freq_fills)
+    sev  = apply_fallback_imputation(sev, _SEV_RULES, sev_fills)
+    merged = merge_datasets(freq, sev, codebook, merge_mode=merge_mode)
+    store.append('merged', merged, row_buckets(merged[ROW], n_rows, n_buckets), tag=f'-{part:05d}')
+    return merged.dtypes.to_dict()
+
+def run_pipeline_partitioned(freq_path: str | list[str], sev_path: str | list[str],
+                             out_path: str = 'workers_claims_merged.csv',
+                             partitions: int | None = None,
+                             jobs: int = 1,
+                             chunksize: int = DEFAULT_CHUNKSIZE,
+                             profile: bool | StepProfiler | None = None,
+                             work_dir: str | None = None,
+                             merge_mode: str | None = None) -> SavedOutput:
+    """
+    Same steps and output as run_pipeline, out of core: the inputs are read
+    `chunksize` rows at a time and the per-worker steps (10-16) run on
+    `partitions` hash partitions of worker_id (one per DEFAULT_PARTITION_MB
+    of input when None), `jobs` at a time, spilled to a temporary directory
+    under `work_dir` (default: the output's directory). The fallback fills
+    (steps 12-13) are the whole book's statistics (rules.FillStats), so the
+    output is run_pipeline's whatever the partition count. Diagnostics are
+    not recorded in this mode.
+    """
+    merge_mode = resolve_merge_mode(merge_mode)
+    prof = StepProfiler.resolve(profile, 'workers (partitioned)')
+    partitions = partitions or partition_count([freq_path, sev_path])
+    work_dir = work_dir or os.path.dirname(os.path.abspath(out_path))
+
+    with tempfile.TemporaryDirectory(prefix='workers-partitions-', dir=work_dir) as root:
+        store = ChunkStore(root)
+        n_rows, dtypes, sev_stats = prof.run('stream + partition', _partition_inputs, freq_path,
+                                             sev_path, store, partitions, chunksize)
+        parts = prof.run('cross_impute + cross_validate', map_partitions, _partition_worker_steps,
+                         partitions, jobs, store, dtypes)
+        freq_stats = FillStats(RuleSet(_FREQ_RULES))
+        for part_freq, part_sev in parts:
+            freq_stats.merge(part_freq)
+            sev_stats.merge(part_sev)
+        merged = prof.run('fallback + merge_datasets', map_partitions, _partition_merge,
+                          partitions, jobs, store, freq_stats.fills(), sev_stats.fills(),
+                          merge_mode, n_rows, partitions)
+        rows = prof.run('save', write_ordered, store, 'merged', partitions,
+                        common_dtypes(merged), out_path, sep=';', decimal=',')
+    print(f"Saved → {out_path}")
+    prof.finish()
+    return SavedOutput(out_path, rows, sep=';', decimal=',')
 
 
 if __name__ == "__main__":
-    business_claims_merged = run_pipeline()
\ No newline at end of file
+    # One line with the default paths; `python -m data_clean run --help` for everything else
+    from data_clean.orchestrate import DEFAULT_DATA_DIR, line_paths
+
+    workers_claims_merged = run_pipeline(*line_paths('workers', DEFAULT_DATA_DIR, '.'))
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Pipeline diagnostics
+====================
+Sanity metrics the pipelines used to print unconditionally (ID overlaps,
+claim-amount statistics, NaN summaries, sample rows, unresolved rows) are
+recorded on a Diagnostics object instead, and only computed when its level
+asks for them:
+
+    0  off      nothing computed or printed (default)
+    1  summary  scalar metrics: counts, totals, overlaps, NaN summaries
+    2  detail   also sample rows and the rows / IDs left unresolved
+
+Enable with run_pipeline(..., diagnostics=1 | "detail" | Diagnostics(...)) or
+the environment:
+    DATA_CLEAN_DIAGNOSTICS=<level>    0-2 or off / summary / detail
+
+Metrics are passed as zero-argument callables, so a disabled level costs one
+comparison and no pandas work. Every recorded metric is printed and kept in
+diag.report ({section: {name: value}}), which is JSON-serialisable; frames and
+long series are kept as their row count plus the first DETAIL_ROWS rows.
+run_pipeline writes the report next to its output as <output>.diagnostics.json.
+Stages served from the stage cache replay their recorded metrics along with
+their stdout.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+OFF, SUMMARY, DETAIL = 0, 1, 2
+LEVELS = {"off": OFF, "summary": SUMMARY, "detail": DETAIL}
+
+DIAGNOSTICS_ENV = "DATA_CLEAN_DIAGNOSTICS"
+DETAIL_ROWS     = 20
+
+
+def _level(value) -> int:
+    if isinstance(value, str) and value.strip().lower() in LEVELS:
+        return LEVELS[value.strip().lower()]
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or value is None:
+        return SUMMARY if value else OFF
+    if isinstance(value, int) and OFF <= value <= DETAIL:
+        return value
+    raise ValueError(f"Unknown diagnostics level {value!r}; use 0-2 or one of {list(LEVELS)}")
+
+
+def _jsonable(value):
+    """value as plain JSON types; frames / long series → {"rows", "head"}."""
+    if isinstance(value, pd.DataFrame):
+        head = value.head(DETAIL_ROWS).reset_index()
+        return {"rows": len(value),
+                "head": [{str(k): _jsonable(v) for k, v in row.items()}
+                         for row in head.to_dict(orient="records")]}
+    if isinstance(value, pd.Series):
+        if len(value) > DETAIL_ROWS:
+            return {"rows": len(value), "head": _jsonable(value.head(DETAIL_ROWS))}
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset, np.ndarray, pd.Index)):
+        items = sorted(value, key=str) if isinstance(value, (set, frozenset)) else list(value)
+        if len(items) > DETAIL_ROWS:
+            return {"rows": len(items), "head": [_jsonable(v) for v in items[:DETAIL_ROWS]]}
+        return [_jsonable(v) for v in items]
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return None if pd.isna(value) else str(value)
+
+
+def _text(value) -> str:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        if value.empty:
+            return "none"
+        shown = value.head(DETAIL_ROWS)
+        more  = f"\n  … {len(value) - DETAIL_ROWS:,} more rows" if len(value) > DETAIL_ROWS else ""
+        return "\n" + shown.to_string() + more
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f"{value:,}"
+    return str(_jsonable(value))
+
+
+def nan_counts(df: pd.DataFrame) -> dict[str, int]:
+    """Per-column NaN counts, columns without NaNs left out."""
+    counts = df.isna().sum()
+    return {str(col): int(n) for col, n in counts[counts > 0].items()}
+
+
+class Diagnostics:
+    """Lazily computed, structured pipeline diagnostics. See module docstring."""
+
+    def __init__(self, level: int | str = OFF, label: str = ""):
+        self.level   = _level(level)
+        self.label   = label
+        self.entries: list[list] = []   # [section, name, value], in recording order
+
+    @classmethod
+    def resolve(cls, diagnostics: "int | str | bool | Diagnostics | None",
+                label: str = "") -> "Diagnostics":
+        """A Diagnostics as is; None reads DATA_CLEAN_DIAGNOSTICS; anything else is a level."""
+        if isinstance(diagnostics, Diagnostics):
+            return diagnostics
+        if diagnostics is None:
+            diagnostics = os.environ.get(DIAGNOSTICS_ENV) or OFF
+        return cls(diagnostics, label)
+
+    def __repr__(self) -> str:
+        # Stable across runs: the stage cache keys stages on it
+        return f"Diagnostics(level={self.level})"
+
+    def enabled(self, level: int = SUMMARY) -> bool:
+        return self.level >= level
+
+    def metric(self, section: str, name: str, fn, level: int = SUMMARY):
+        """Record and print fn() when `level` is enabled; return it (None when disabled)."""
+        if self.level < level:
+            return None
+        value = fn()
+        self.entries.append([section, name, _jsonable(value)])
+        print(f"[{section}] {name}: {_text(value)}")
+        return value
+
+    def detail(self, section: str, name: str, fn):
+        """metric() at DETAIL level – sample rows, unresolved rows and IDs."""
+        return self.metric(section, name, fn, level=DETAIL)
+
+    @property
+    def report(self) -> dict:
+        report: dict[str, dict] = {}
+        for section, name, value in self.entries:
+            report.setdefault(section, {})[name] = value
+        return report
+
+    def to_json(self, indent: int | None = 2) -> str:
+        return json.dumps({"label": self.label, "level": self.level, "report": self.report},
+                          indent=indent)
+
+    def finish(self, output_path: str | None = None) -> dict:
+        """Write <output_path stem>.diagnostics.json when anything was recorded; return the report."""
+        if self.entries and output_path:
+            path = os.path.splitext(output_path)[0] + ".diagnostics.json"
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(self.to_json())
+        return self.report
@@ -0,0 +1,110 @@
+"""
+Incremental (delta) processing helpers
+======================================
+Shared pieces for pipelines that keep a state directory between runs and
+then only process newly arrived sev rows:
+
+  - group_sum_state  per-key claim_count / claim_amount that can be extended
+                     with new rows and still equal a full groupby().sum()
+  - save_state / load_state   pickled frames + manifest.json in a directory
+  - file_digest      content hash used to refuse applying a delta twice
+
+Exactness: pandas sums float groups with Kahan (compensated) summation, so
+adding a delta's sum to the stored sum would differ from a full rerun in the
+last bits. The running compensation term is therefore stored next to each
+sum and the delta rows are folded in with the same recurrence, in file order.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+STATE_VERSION = 2
+MANIFEST      = "manifest.json"
+
+AGG_COLUMNS = ["claim_count", "claim_amount", "claim_amount_comp"]
+
+
+def group_sum_state(keys: pd.Series, values: pd.Series,
+                    prior: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Fold rows (in order) into per-key running aggregates.
+
+    Parameters
+    ----------
+    keys   : group key per row; NaN keys are ignored, as in groupby
+    values : claim_amount per row; NaN values count as claims but add nothing
+    prior  : previous result (index = key, AGG_COLUMNS) to continue from
+
+    Returns
+    -------
+    DataFrame indexed by key with claim_count, claim_amount and the Kahan
+    compensation claim_amount_comp (keys in prior order, then new keys).
+    """
+    prior = prior if prior is not None else pd.DataFrame(columns=AGG_COLUMNS)
+    keep  = keys.notna().to_numpy()
+    keys, values = keys[keep], values[keep].to_numpy(dtype=float)
+
+    index = prior.index.append(pd.Index(keys.unique()).difference(prior.index, sort=False))
+    count = prior["claim_count"].reindex(index, fill_value=0).to_numpy(dtype=np.int64, copy=True)
+    sumx  = prior["claim_amount"].reindex(index, fill_value=0.0).to_numpy(dtype=float, copy=True)
+    comp  = prior["claim_amount_comp"].reindex(index, fill_value=0.0).to_numpy(dtype=float, copy=True)
+
+    codes = index.get_indexer(keys)
+    count += np.bincount(codes, minlength=len(index))
+
+    # One vectorised step per claim rank: every key's n-th new row is added
+    # at step n, so each key still sees its rows in file order. The rows are
+    # sorted by rank once, so each step reads only its own contiguous slice.
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    rank  = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+    order = np.argsort(rank, kind="stable")
+    codes, values = codes[order], values[order]
+    ends  = np.cumsum(np.bincount(rank))
+    for start, end in zip([0, *ends[:-1].tolist()], ends.tolist()):
+        g, v = codes[start:end], values[start:end]
+        with np.errstate(invalid="ignore"):
+            y = v - comp[g]
+            t = sumx[g] + y
+            c = t - sumx[g] - y
+        comp[g] = np.where(np.isnan(c), 0.0, c)  # ±inf values: keep the sum, not NaN
+        sumx[g] = t
+
+    return pd.DataFrame(
+        {"claim_count": count, "claim_amount": sumx, "claim_amount_comp": comp}, index=index
+    )
+
+
+def file_digest(path: str, block: int = 1 << 20) -> str:
+    """sha256 of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def save_state(state_dir: str, frames: dict[str, pd.DataFrame | pd.Series],
+               manifest: dict) -> None:
+    """Write each frame as <name>.pkl (dtypes kept exactly) plus manifest.json."""
+    os.makedirs(state_dir, exist_ok=True)
+    for name, df in frames.items():
+        df.to_pickle(os.path.join(state_dir, f"{name}.pkl"))
+    with open(os.path.join(state_dir, MANIFEST), "w", encoding="utf-8") as fh:
+        json.dump({**manifest, "version": STATE_VERSION, "frames": sorted(frames)}, fh, indent=2)
+
+
+def load_state(state_dir: str) -> tuple[dict[str, pd.DataFrame | pd.Series], dict]:
+    """Inverse of save_state. Raises FileNotFoundError if no state exists."""
+    with open(os.path.join(state_dir, MANIFEST), encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("version") != STATE_VERSION:
+        raise ValueError(f"State in {state_dir} has version {manifest.get('version')}, "
+                         f"expected {STATE_VERSION} – rebuild it with a full run")
+    frames = {name: pd.read_pickle(os.path.join(state_dir, f"{name}.pkl"))
+              for name in manifest["frames"]}
+    return frames, manifest
@@ -0,0 +1,80 @@
+"""
+Integer-encoded ID keys
+=======================
+policy / shipment / equipment / worker IDs are high-cardinality strings, so
+the merges, groupbys and .map lookups keyed on them spend most of their time
+hashing and comparing strings. Once a line's IDs are final (imputed and
+generated), encode_keys swaps every ID column for a dense integer code
+(nullable Int32; Int64 past 2**31 keys) into ONE dictionary per ID column
+shared by freq and sev, so equal IDs get equal codes in both frames and
+every later join runs on integers. decode_keys restores the strings in the
+final merge, before the output is checked and saved.
+
+The dictionary ("codebook") is a plain frame of (column, key) rows, a key's
+code being its position within its column, so it passes through the stage
+cache like any other stage output. Codes follow first appearance (freq
+first): the pipelines only use groupby order through joins and lookups, so
+the output does not depend on it. Missing IDs stay missing (<NA>).
+"""
+
+import numpy as np
+import pandas as pd
+
+CODEBOOK_COLS = ["column", "key"]
+
+
+def _code_dtype(n_keys: int) -> pd.api.extensions.ExtensionDtype:
+    return pd.Int32Dtype() if n_keys < 2 ** 31 else pd.Int64Dtype()
+
+
+def encode_keys(frames: list[pd.DataFrame], cols: list[str]
+                ) -> tuple[list[pd.DataFrame], pd.DataFrame]:
+    """
+    Replace `cols` by integer codes shared across all `frames`; return the
+    frames and the codebook. Each column is factorized once over the
+    concatenation of the frames that have it.
+    """
+    frames = [df.copy() for df in frames]
+    books  = []
+    for col in cols:
+        present = [df for df in frames if col in df.columns]
+        if not present:
+            continue
+        codes, uniques = pd.factorize(pd.concat([df[col] for df in present], ignore_index=True))
+        dtype = _code_dtype(len(uniques))
+        start = 0
+        for df in present:
+            part  = codes[start:start + len(df)]
+            start += len(df)
+            missing = part < 0
+            df[col] = pd.arrays.IntegerArray(np.where(missing, 0, part).astype(dtype.numpy_dtype),
+                                             missing)
+        books.append(pd.DataFrame({"column": col, "key": uniques}))
+    codebook = pd.concat(books, ignore_index=True) if books else pd.DataFrame(columns=CODEBOOK_COLS)
+    return frames, codebook
+
+
+def dictionary(codebook: pd.DataFrame, col: str) -> pd.Index:
+    """The keys of `col`, in code order."""
+    return pd.Index(codebook.loc[codebook["column"] == col, "key"], name=col)
+
+
+def decode_series(series: pd.Series, codebook: pd.DataFrame, col: str | None = None) -> pd.Series:
+    """The IDs behind a code series (`col` defaults to its name); <NA> → NaN."""
+    keys  = dictionary(codebook, col or series.name)
+    codes = series.fillna(-1).to_numpy(dtype=np.int64)
+    return pd.Series(keys.array.take(codes, allow_fill=True), index=series.index, name=series.name)
+
+
+def decode_keys(df: pd.DataFrame, codebook: pd.DataFrame | None) -> pd.DataFrame:
+    """Every encoded column of `df` back to its IDs (df unchanged without a codebook)."""
+    if codebook is None:
+        return df
+    encoded = [col for col in pd.unique(codebook["column"])
+               if col in df.columns and pd.api.types.is_integer_dtype(df[col].dtype)]
+    if not encoded:
+        return df
+    df = df.copy()
+    for col in encoded:
+        df[col] = decode_series(df[col], codebook, col)
+    return df
@@ -0,0 +1,210 @@
+"""
+Multi-line orchestrator
+=======================
+Runs the four independent claim pipelines (business interruption, cargo,
+equipment, workers comp) on a process pool and reports per-line wall time.
+With partitions set, each line runs out of core instead (run_pipeline_partitioned,
+see partitioned.py), its own partitions on partition_jobs processes.
+
+Each line's prints go to <output_dir>/<line>.log so parallel runs do not
+interleave on the console. Run one at a time (--jobs 1), each line's inputs
+are prefetched into the OS page cache while the line before it computes.
+
+Inputs are found under data_dir by file name or glob pattern ({line} stands
+for the line name); a pattern matching several files is read as one input
+made of those shards, in sorted order (see sa_csv.py).
+
+The command line is `python -m data_clean run` (see __main__.py); this
+module's own entry point is the same command:
+    python -m data_clean.orchestrate --jobs 4
+"""
+
+import contextlib
+import glob
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from data_clean.outputs import OUTPUT_FORMATS
+from data_clean.sa_csv import prefetch as prefetch_files, shard_list
+from data_clean.streaming import DEFAULT_CHUNKSIZE
+
+# line name → module exposing run_pipeline(freq_path, sev_path, output_path, chunksize=...)
+# and run_pipeline_partitioned(freq_path, sev_path, output_path, partitions=...)
+LINE_MODULES = {
+    "business":  "data_clean.clean_business_data",
+    "cargo":     "data_clean.clean_cargo_data",
+    "equipment": "data_clean.clean_equipment_data",
+    "workers":   "data_clean.clean_workers_comp",
+}
+
+DEFAULT_DATA_DIR = "messy_data"
+DEFAULT_FREQ     = "{line}_claims_freq.csv"
+DEFAULT_SEV      = "{line}_claims_sev.csv"
+
+
+def resolve_input(pattern: str) -> str | list[str]:
+    """A path as is; a glob pattern as its one match, or the sorted list of its shards."""
+    if not any(c in pattern for c in "*?["):
+        return pattern
+    matches = sorted(glob.glob(pattern))
+    if not matches:
+        raise FileNotFoundError(f"No input files match {pattern!r}")
+    return matches[0] if len(matches) == 1 else matches
+
+
+def line_paths(line: str, data_dir: str, output_dir: str, output_format: str = "csv",
+               freq: str = DEFAULT_FREQ, sev: str = DEFAULT_SEV
+               ) -> tuple[str | list[str], str | list[str], str]:
+    """
+    (freq, sev, output) paths for a line, by default messy_data/cargo_claims_freq.csv,
+    messy_data/cargo_claims_sev.csv and cargo_claims_merged.csv. freq / sev are
+    file names or glob patterns relative to data_dir, with {line} for the line.
+    """
+    return (
+        resolve_input(os.path.join(data_dir, freq.format(line=line))),
+        resolve_input(os.path.join(data_dir, sev.format(line=line))),
+        os.path.join(output_dir, f"{line}_claims_merged{OUTPUT_FORMATS[output_format]}"),
+    )
+
+
+def _run_line(line: str, freq_path: str | list[str], sev_path: str | list[str], output_path: str,
+              chunksize: int | None, return_frame: bool, profile: bool = False,
+              cache: str | None = None, input_cache: bool = False,
+              diagnostics: str | None = None, partitions: int | None = None,
+              partition_jobs: int = 1, work_dir: str | None = None) -> dict:
+    """Worker body: run one line's pipeline with its stdout captured to a log file."""
+    module   = importlib.import_module(LINE_MODULES[line])
+    log_path = os.path.splitext(output_path)[0] + ".log"
+    t0 = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        # profile=None leaves DATA_CLEAN_PROFILE in charge
+        if partitions is not None:
+            merged = module.run_pipeline_partitioned(
+                freq_path, sev_path, output_path, partitions=partitions or None,
+                jobs=partition_jobs, chunksize=chunksize or DEFAULT_CHUNKSIZE,
+                profile=True if profile else None, work_dir=work_dir)
+            if return_frame:
+                merged = merged.load()
+        else:
+            merged = module.run_pipeline(freq_path, sev_path, output_path, chunksize=chunksize,
+                                         profile=True if profile else None, cache=cache,
+                                         input_cache=True if input_cache else None,
+                                         diagnostics=diagnostics)
+    return {
+        "line":        line,
+        "output_path": output_path,
+        "log_path":    log_path,
+        "seconds":     time.perf_counter() - t0,
+        "rows":        len(merged),
+        "merged":      merged if return_frame else None,
+    }
+
+
+def run_lines(lines: list[str] | None = None, data_dir: str = DEFAULT_DATA_DIR,
+              output_dir: str = ".", max_workers: int | None = None,
+              chunksize: int | None = None, return_frames: bool = True,
+              paths: dict[str, tuple[str, str, str]] | None = None,
+              profile: bool = False, cache: str | None = None,
+              input_cache: bool = False,
+              diagnostics: str | None = None,
+              prefetch: bool = True,
+              output_format: str = "csv",
+              freq: str = DEFAULT_FREQ,
+              sev: str = DEFAULT_SEV,
+              partitions: int | None = None,
+              partition_jobs: int = 1,
+              work_dir: str | None = None) -> dict[str, dict]:
+    """
+    Run the selected lines' pipelines, in parallel when max_workers > 1.
+
+    Parameters
+    ----------
+    lines         : subset of LINE_MODULES (default: all four)
+    data_dir      : directory holding the inputs (<line>_claims_freq.csv / _sev.csv)
+    output_dir    : directory for <line>_claims_merged.<ext> and <line>_claims_merged.log
+    max_workers   : process count (default: one per line, capped at the CPU count)
+    chunksize     : forwarded to run_pipeline (streaming mode when set)
+    return_frames : ship merged DataFrames back from the workers; if False
+                    only the output paths are returned (cheaper for big lines)
+    paths         : per-line (freq, sev, output) overrides of the default paths
+    profile       : print each line's per-step profile table into its log
+    cache         : stage cache directory shared by the lines (see stage_cache.py);
+                    None leaves DATA_CLEAN_CACHE_DIR in charge
+    input_cache   : load inputs from their parsed Arrow copies when current
+                    (see sa_csv.py); False leaves DATA_CLEAN_INPUT_CACHE in charge
+    diagnostics   : diagnostics level (0-2 / off, summary, detail) written to each
+                    line's log and <line>_claims_merged.diagnostics.json (see
+                    diagnostics.py); None leaves DATA_CLEAN_DIAGNOSTICS in charge
+    prefetch      : when lines run one at a time, read the next line's inputs
+                    into the OS page cache while the current line computes
+    output_format : a key of outputs.OUTPUT_FORMATS ("csv" / "parquet")
+    freq, sev     : input file names or glob patterns under data_dir, {line}
+                    standing for the line name (see line_paths)
+    partitions    : run out of core on this many hash partitions per line (0: one per
+                    partitioned.DEFAULT_PARTITION_MB of input); chunksize is then the
+                    rows read at a time, and cache / input_cache / diagnostics are unused
+    partition_jobs: processes per line for its partitions
+    work_dir      : directory for the partitions' temporary files (default: output_dir)
+
+    Returns
+    -------
+    {line: {"line", "output_path", "log_path", "seconds", "rows", "merged"}}
+    """
+    lines = list(LINE_MODULES) if lines is None else lines
+    unknown = sorted(set(lines) - set(LINE_MODULES))
+    if unknown:
+        raise ValueError(f"Unknown line(s): {unknown}. Choose from {list(LINE_MODULES)}")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}. "
+                         f"Choose from {list(OUTPUT_FORMATS)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = paths or {}
+    jobs = {line: paths.get(line) or line_paths(line, data_dir, output_dir, output_format, freq, sev)
+            for line in lines}
+    max_workers = max_workers or min(len(lines), os.cpu_count() or 1)
+
+    results = {}
+    if max_workers == 1:
+        queue = list(jobs.items())
+        for i, (line, (freq_path, sev_path, output_path)) in enumerate(queue):
+            if prefetch and i + 1 < len(queue):
+                next_freq, next_sev, _ = queue[i + 1][1]
+                prefetch_files(shard_list(next_freq) + shard_list(next_sev),
+                               cache=True if input_cache else None)
+            results[line] = _run_line(line, freq_path, sev_path, output_path,
+                                      chunksize, return_frames, profile, cache, input_cache,
+                                      diagnostics, partitions, partition_jobs, work_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(_run_line, line, *job, chunksize, return_frames, profile, cache,
+                            input_cache, diagnostics, partitions, partition_jobs, work_dir): line
+                for line, job in jobs.items()
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+    return {line: results[line] for line in lines}
+
+
+def summarise(results: dict[str, dict], wall_seconds: float) -> pd.DataFrame:
+    """Per-line wall time / row count table, plus the end-to-end wall time."""
+    table = pd.DataFrame(
+        [{k: r[k] for k in ("line", "seconds", "rows", "output_path")} for r in results.values()]
+    )
+    print(table.to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+    print(f"\nWall time: {wall_seconds:,.2f}s  "
+          f"(sum of lines {table['seconds'].sum():,.2f}s)")
+    return table
+
+
+if __name__ == "__main__":
+    from data_clean.__main__ import main
+
+    sys.exit(main(["run", *sys.argv[1:]]))
@@ -0,0 +1,112 @@
+"""
+Output formats
+==============
+Every line saves its merged frame through write_output(df, path, **csv_options);
+the format follows the extension of the output path:
+
+  .parquet  Parquet (needs pyarrow). Dtypes survive the round trip, so
+            categories, float32 scores and integer IDs read back as written;
+            a column mixing value types (workers comp fills missing injury
+            labels with 0) is stored as strings, as the CSV would hold it.
+  other     CSV, in the line's own layout (csv_options, e.g. sep=";")
+
+python -m data_clean run --format parquet picks the extension (see __main__.py).
+
+OutputWriter writes the same file piece by piece, for outputs that are never
+whole in memory (partitioned runs, see partitioned.py); SavedOutput stands
+in for the merged frame such a run returns.
+"""
+
+import os
+
+import pandas as pd
+
+# format name → extension of <line>_claims_merged.<ext>
+OUTPUT_FORMATS = {"csv": ".csv", "parquet": ".parquet"}
+
+
+def output_format(path: str) -> str:
+    """The OUTPUT_FORMATS name write_output uses for path."""
+    return "parquet" if os.path.splitext(path)[1].lower() == ".parquet" else "csv"
+
+
+def _mixed(values: pd.Index | pd.Series) -> bool:
+    return values.dtype == object and values.dropna().map(type).nunique() > 1
+
+
+def _parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """df with the columns (or categories) that mix value types as strings."""
+    fixes = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            if _mixed(s.cat.categories):
+                fixes[col] = s.cat.rename_categories(s.cat.categories.map(str))
+        elif _mixed(s):
+            fixes[col] = s.map(str, na_action="ignore")
+    return df.assign(**fixes) if fixes else df
+
+
+def write_output(df: pd.DataFrame, path: str, **csv_options) -> None:
+    """Write df to path as Parquet or CSV, by extension (see module docstring)."""
+    if output_format(path) == "parquet":
+        _parquet_safe(df).to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, **csv_options)
+
+
+class OutputWriter:
+    """
+    write_output in pieces: append() frames with the same columns in order,
+    then close() (or use it as a context manager). CSV pieces after the
+    first go without a header; Parquet pieces become row groups of one file,
+    cast to the first piece's schema.
+    """
+
+    def __init__(self, path: str, **csv_options):
+        self.path, self.csv_options = path, csv_options
+        self.parquet = output_format(path) == "parquet"
+        self._writer = None
+        self._first  = True
+
+    def append(self, df: pd.DataFrame) -> None:
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(_parquet_safe(df), preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            df.to_csv(self.path, index=False, header=self._first, mode="w" if self._first else "a",
+                      **self.csv_options)
+        self._first = False
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SavedOutput:
+    """A merged output on disk: len() is its row count, load() reads it back."""
+
+    def __init__(self, path: str, rows: int, **csv_options):
+        self.path, self.rows, self.csv_options = path, rows, csv_options
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __repr__(self) -> str:
+        return f"SavedOutput({self.path!r}, rows={self.rows:,})"
+
+    def load(self) -> pd.DataFrame:
+        if output_format(self.path) == "parquet":
+            return pd.read_parquet(self.path)
+        return pd.read_csv(self.path, **self.csv_options)
@@ -0,0 +1,241 @@
+"""
+Hash-partitioned (out-of-core) runs
+===================================
+Shared helpers for each line's run_pipeline_partitioned, which never holds a
+whole freq or sev frame in memory:
+
+  1. streaming passes over the inputs, `chunksize` rows at a time: the
+     row-wise cleaning steps, the ID imputation steps (each a semi-join,
+     FirstMatch, against the previous pass) and the ID numbering; the
+     cleaned chunks are spilled to disk in order between passes
+  2. both frames are hash-partitioned on the per-policy key (policy_id,
+     worker_id for workers comp) into N partitions on disk, so every row of
+     a policy lands in the same partition
+  3. the per-policy steps (cross-imputation, criteria, fills, aggregation,
+     merge) run on one partition at a time, in parallel on a process pool;
+     the fallback fills use statistics gathered over all partitions first
+     (rules.FillStats), so they are the whole book's, not the partition's
+  4. the merged partitions are written back in input row order: each freq
+     row carries its position (ROW) through the run, merged rows are
+     bucketed by it, and the buckets are sorted and appended to the output
+
+Peak memory is one partition (a few per process with jobs > 1) plus the
+lookups for the rows whose IDs are missing. ChunkStore is the on-disk layer:
+tables of pickled pieces, per partition, read back in the order written.
+"""
+
+import itertools
+import math
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from data_clean.outputs import OutputWriter
+from data_clean.sa_csv import shard_list
+
+# input CSV bytes per partition when the count is left to partition_count
+DEFAULT_PARTITION_MB = 256
+
+# position of a freq row in the input, carried through a partitioned run
+ROW = "_row"
+
+
+def partition_count(paths: list[str | list[str]], partition_mb: int = DEFAULT_PARTITION_MB) -> int:
+    """Partitions for inputs of this size: one per `partition_mb` MB of CSV."""
+    size = sum(os.path.getsize(p) for path in paths for p in shard_list(path))
+    return max(1, math.ceil(size / (partition_mb * 1024 ** 2)))
+
+
+def hash_partition(keys: pd.Series, n: int) -> np.ndarray:
+    """Partition number (0..n-1) of each key; equal keys always share one."""
+    return (pd.util.hash_pandas_object(keys, index=False).to_numpy() % np.uint64(n)).astype(np.intp)
+
+
+# ── Dtypes across pieces ──────────────────────────────────────────────────────
+
+def common_dtype(a, b):
+    """The dtype both a and b convert to without loss (pd.concat's, for the kinds used here)."""
+    if a == b:
+        return a
+    if isinstance(a, pd.CategoricalDtype) and isinstance(b, pd.CategoricalDtype):
+        return pd.CategoricalDtype(a.categories.union(b.categories, sort=False))
+    if isinstance(a, np.dtype) and isinstance(b, np.dtype) and a.kind in "biuf" and b.kind in "biuf":
+        return np.result_type(a, b)
+    return np.dtype(object)
+
+
+def common_dtypes(dtypes: list[dict]) -> dict:
+    """common_dtype per column over several {column: dtype} maps."""
+    out = {}
+    for mapping in dtypes:
+        for col, dtype in mapping.items():
+            out[col] = dtype if col not in out else common_dtype(out[col], dtype)
+    return out
+
+
+def _cast(df: pd.DataFrame, dtypes: dict | None) -> pd.DataFrame:
+    if not dtypes:
+        return df
+    changed = {c: d for c, d in dtypes.items() if c in df.columns and df[c].dtype != d}
+    return df.astype(changed) if changed else df
+
+
+# ── On-disk tables ────────────────────────────────────────────────────────────
+
+class ChunkStore:
+    """
+    Tables of DataFrame pieces under `root`, each split into partitions:
+    <root>/<table>/<partition>/<seq><tag>.pkl. append() writes the rows of
+    a frame to their partitions (all to partition 0 without `parts`);
+    pieces() / read() return a partition's pieces in the order written,
+    cast to the common dtypes of everything appended to the table (chunks
+    of one CSV can come out int64 in one and float64 in the next).
+
+    A store is pickled into the worker processes of map_partitions; pieces
+    appended there need a `tag` unique to the worker's partition.
+    """
+
+    def __init__(self, root: str):
+        self.root   = root
+        self.dtypes: dict[str, dict] = {}
+        self._seq   = 0
+
+    def _dir(self, table: str, part: int) -> str:
+        return os.path.join(self.root, table, f"{part:05d}")
+
+    def append(self, table: str, df: pd.DataFrame, parts: np.ndarray | None = None,
+               tag: str = "") -> None:
+        if df.empty and table in self.dtypes:
+            return
+        self.dtypes[table] = common_dtypes([self.dtypes.get(table, {}), df.dtypes.to_dict()])
+        seq, self._seq = self._seq, self._seq + 1
+        if parts is None:
+            self._write(table, 0, seq, tag, df)
+            return
+        order  = np.argsort(parts, kind="stable")
+        bounds = np.flatnonzero(np.diff(parts[order])) + 1
+        for rows in np.split(order, bounds):
+            if len(rows):
+                self._write(table, int(parts[rows[0]]), seq, tag, df.iloc[rows])
+
+    def _write(self, table: str, part: int, seq: int, tag: str, df: pd.DataFrame) -> None:
+        folder = self._dir(table, part)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{seq:09d}{tag}.pkl"), "wb") as fh:
+            pickle.dump(df, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def pieces(self, table: str, part: int = 0) -> Iterator[pd.DataFrame]:
+        folder = self._dir(table, part)
+        names  = sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+        for name in names:
+            with open(os.path.join(folder, name), "rb") as fh:
+                yield _cast(pickle.load(fh), self.dtypes.get(table))
+
+    def read(self, table: str, part: int = 0) -> pd.DataFrame:
+        """The partition as one frame (empty, with the table's columns, if it has no rows)."""
+        frames = list(self.pieces(table, part))
+        if not frames:
+            return pd.DataFrame({c: pd.Series(dtype=d) for c, d in self.dtypes[table].items()})
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].reset_index(drop=True)
+
+    def save(self, name: str, part: int, obj) -> None:
+        """Keep one object per partition (a stage's frames between map_partitions calls)."""
+        folder = os.path.join(self.root, name)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{part:05d}.pkl"), "wb") as fh:
+            pickle.dump(obj, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, name: str, part: int):
+        with open(os.path.join(self.root, name, f"{part:05d}.pkl"), "rb") as fh:
+            return pickle.load(fh)
+
+
+# ── Streaming semi-join for the ID imputation steps ───────────────────────────
+
+class FirstMatch:
+    """
+    _build_lookup(source, key, match_on) over a source seen chunk by chunk,
+    kept only for the `wanted` match_on combinations (those of the rows whose
+    key is missing): the first source row per combination with key and
+    match_on all present. `lookup` is the result, to pass as _cross_impute's
+    lookup=.
+    """
+
+    def __init__(self, key: str, match_on: list[str], wanted: list[pd.DataFrame]):
+        self.key, self.match_on = key, match_on
+        self.missing = (pd.concat(wanted, ignore_index=True).drop_duplicates() if wanted
+                        else pd.DataFrame(columns=match_on))
+        self.found: list[pd.DataFrame] = []
+        self._empty = pd.DataFrame(columns=match_on + [key])
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if self.missing.empty:
+            return
+        valid = chunk.dropna(subset=[self.key] + self.match_on)
+        valid = valid.drop_duplicates(subset=self.match_on)[self.match_on + [self.key]]
+        self._empty = valid.iloc[:0]
+        hits  = valid.merge(self.missing, on=self.match_on)
+        if hits.empty:
+            return
+        self.found.append(hits)
+        rest = self.missing.merge(hits[self.match_on], on=self.match_on, how="left", indicator=True)
+        self.missing = rest.loc[rest["_merge"] == "left_only", self.match_on]
+
+    @property
+    def lookup(self) -> pd.DataFrame:
+        return pd.concat(self.found, ignore_index=True) if self.found else self._empty
+
+
+def missing_keys(chunk: pd.DataFrame, key: str, match_on: list[str]) -> pd.DataFrame:
+    """The distinct match_on values of the chunk's rows missing `key`, for a FirstMatch."""
+    return chunk.loc[chunk[key].isna(), match_on].dropna().drop_duplicates()
+
+
+def collect_categories(seen: dict[str, list], chunk: pd.DataFrame, cols: list[str]) -> None:
+    """Add the chunk's values of `cols` to `seen`, for categoricals.union_dtype."""
+    for col in cols:
+        if col in chunk.columns:
+            seen.setdefault(col, []).append(pd.unique(chunk[col].dropna()))
+
+
+# ── Running the partitions ────────────────────────────────────────────────────
+
+def map_partitions(fn, n: int, jobs: int = 1, *args) -> list:
+    """[fn(p, *args) for p in range(n)], on `jobs` processes when jobs > 1."""
+    if jobs <= 1 or n == 1:
+        return [fn(p, *args) for p in range(n)]
+    with ProcessPoolExecutor(max_workers=min(jobs, n)) as pool:
+        return list(pool.map(fn, range(n), *(itertools.repeat(arg, n) for arg in args)))
+
+
+def row_buckets(rows: pd.Series, n_rows: int, n_buckets: int) -> np.ndarray:
+    """The output bucket of each ROW value: n_buckets ranges of the input rows."""
+    size = max(1, math.ceil(n_rows / n_buckets))
+    return (rows.to_numpy(dtype=np.int64) // size).astype(np.intp)
+
+
+def write_ordered(store: ChunkStore, table: str, n_buckets: int, dtypes: dict,
+                  output_path: str, **csv_options) -> int:
+    """
+    Write `table`'s buckets to output_path in ROW order (ROW dropped), each
+    cast to `dtypes`, the common dtypes of the merged partitions. Returns
+    the number of rows written.
+    """
+    store.dtypes[table] = dtypes
+    rows = 0
+    with OutputWriter(output_path, **csv_options) as out:
+        for bucket in range(n_buckets):
+            frames = list(store.pieces(table, bucket))
+            if not frames:
+                continue
+            df = pd.concat(frames, ignore_index=True)
+            df = df.iloc[np.argsort(df[ROW].to_numpy(), kind="stable")].drop(columns=ROW)
+            out.append(df)
+            rows += len(df)
+        if not rows:
+            out.append(pd.DataFrame({c: pd.Series(dtype=d) for c, d in dtypes.items() if c != ROW}))
+    return rows
@@ -0,0 +1,98 @@
+"""
+Policy index
+============
+The cross-imputation and criteria steps of cargo / equipment (12-13) and
+workers comp (10-11, keyed on worker_id) all ask the same question per
+column and direction: "the first source row of this ID with a (valid)
+value". Each used to rebuild a groupby(...).first() or
+drop_duplicates().set_index() lookup for it. A PolicyIndex is built once,
+after the IDs are final, and answers it with array gathers:
+
+  keys          sorted array of the IDs present in freq or sev
+  rows[frame]   per row, the position of its ID in keys (-1: no ID)
+  first rows    per key, the first row of a frame passing a mask (-1: none),
+                one np.minimum.at pass over rows; the "first non-null"
+                arrays are cached per column and updated incrementally by
+                fill(), which is how the steps write
+
+The index describes one (freq, sev) pair and edits those frames in place;
+replace() swaps in a copy of a frame. PolicyIndex.ensure rebuilds it for any
+other pair (e.g. stage outputs served from the stage cache), so passing one
+between stages is always safe.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class PolicyIndex:
+    """Row positions of every ID in freq and sev. See module docstring."""
+
+    def __init__(self, freq: pd.DataFrame, sev: pd.DataFrame, key: str = "policy_id"):
+        self.key    = key
+        self.frames = {"freq": freq, "sev": sev}
+        ids = pd.concat([freq[key], sev[key]], ignore_index=True).dropna()
+        self.keys = np.sort(pd.unique(ids.to_numpy()))   # hash-based unique, then sort the few keys
+        self.rows = {name: self._slots(df[key]) for name, df in self.frames.items()}
+        self._first: dict[tuple[str, str], np.ndarray] = {}
+
+    @classmethod
+    def ensure(cls, index: "PolicyIndex | None", freq: pd.DataFrame, sev: pd.DataFrame,
+               key: str = "policy_id") -> "PolicyIndex":
+        """index when it describes exactly these frames, else a new index over them."""
+        if index is not None and index.frames["freq"] is freq and index.frames["sev"] is sev:
+            return index
+        return cls(freq, sev, key if index is None else index.key)
+
+    def __repr__(self) -> str:
+        # Its contents follow from the frames: the stage cache keys on those
+        return f"PolicyIndex(key={self.key!r})"
+
+    def _slots(self, ids: pd.Series) -> np.ndarray:
+        present = ids.notna().to_numpy()
+        slots   = np.full(len(ids), -1, dtype=np.intp)
+        slots[present] = np.searchsorted(self.keys, ids[present].to_numpy())
+        return slots
+
+    def replace(self, frame: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Bind `frame` to df, a copy of it (same rows and IDs); return df."""
+        self.frames[frame] = df
+        return df
+
+    def first_rows(self, frame: str, mask) -> np.ndarray:
+        """Per key, the position of the first `frame` row where mask holds (-1: none)."""
+        slots = self.rows[frame]
+        sel   = np.flatnonzero(np.asarray(mask, dtype=bool) & (slots >= 0))
+        none  = len(slots)
+        first = np.full(len(self.keys), none, dtype=np.intp)
+        np.minimum.at(first, slots[sel], sel)
+        return np.where(first == none, -1, first)
+
+    def first_valid(self, frame: str, col: str) -> np.ndarray:
+        """first_rows of the non-null values of `col` (cached, kept current by fill)."""
+        if (frame, col) not in self._first:
+            self._first[frame, col] = self.first_rows(frame, self.frames[frame][col].notna())
+        return self._first[frame, col]
+
+    def fill(self, target: str, col: str, rows: np.ndarray, source: str, first: np.ndarray,
+             clear_missing: bool = False) -> None:
+        """
+        Set target[col] at row positions `rows` to the source row `first`
+        gives for their ID. Rows whose ID has none keep their value, or become
+        NaN with clear_missing.
+        """
+        slots = self.rows[target][rows]
+        src   = np.where(slots >= 0, first[slots], -1)
+        hit   = src >= 0
+        df, j = self.frames[target], self.frames[target].columns.get_loc(col)
+        if clear_missing and not hit.all():
+            df.iloc[rows[~hit], j] = np.nan
+            self._first.pop((target, col), None)   # a first value may be gone: recompute on demand
+        if hit.any():
+            df.iloc[rows[hit], j] = self.frames[source][col].iloc[src[hit]].array
+            if (target, col) in self._first:
+                # rows given a value lead their key when they come before its first one
+                none  = len(df)
+                known = np.where(self._first[target, col] < 0, none, self._first[target, col])
+                np.minimum.at(known, slots[hit], rows[hit])
+                self._first[target, col] = np.where(known == none, -1, known)
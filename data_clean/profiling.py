@@ -0,0 +1,130 @@
+"""
+Per-step profiling hooks
+========================
+Opt-in instrumentation for run_pipeline. Each step is called through
+StepProfiler.run(), which records wall time, CPU time, the tracemalloc peak
+(memory allocated above the step's starting point) and the rows going in and
+coming out. Disabled profilers call the step directly, so the default path
+pays nothing and the pipeline's output never changes.
+
+Enable with run_pipeline(..., profile=True) or the environment:
+    DATA_CLEAN_PROFILE=1              per-step table printed at the end
+    DATA_CLEAN_PROFILE_DIR=<dir>      also dump one cProfile .prof per step
+"""
+
+import cProfile
+import os
+import re
+import time
+import tracemalloc
+
+import pandas as pd
+
+PROFILE_ENV     = "DATA_CLEAN_PROFILE"
+PROFILE_DIR_ENV = "DATA_CLEAN_PROFILE_DIR"
+
+
+def _count_rows(objs) -> int:
+    """Total rows across the DataFrames / Series in objs (tuples are flattened)."""
+    total = 0
+    for obj in objs:
+        if isinstance(obj, (pd.DataFrame, pd.Series)):
+            total += len(obj)
+        elif isinstance(obj, tuple):
+            total += _count_rows(obj)
+    return total
+
+
+class StepProfiler:
+    """Collects one record per pipeline step; see module docstring."""
+
+    def __init__(self, enabled: bool = True, cprofile_dir: str | None = None,
+                 trace_memory: bool = True, label: str = ""):
+        self.enabled      = enabled
+        self.label        = label
+        self.cprofile_dir = cprofile_dir
+        self.trace_memory = trace_memory
+        self.records: list[dict] = []
+        self._owns_tracing = False
+
+    @classmethod
+    def resolve(cls, profile: "bool | StepProfiler | None", label: str = "") -> "StepProfiler":
+        """
+        profile : a StepProfiler to fill in, True/False, or None to follow
+                  the DATA_CLEAN_PROFILE / DATA_CLEAN_PROFILE_DIR variables.
+        label   : pipeline name, used in the printed table and as the
+                  cProfile sub-directory (<DATA_CLEAN_PROFILE_DIR>/<label>/)
+        """
+        if isinstance(profile, StepProfiler):
+            return profile
+        cprofile_dir = os.environ.get(PROFILE_DIR_ENV) or None
+        if profile is None:
+            profile = os.environ.get(PROFILE_ENV, "") not in ("", "0") or cprofile_dir is not None
+        if cprofile_dir and label:
+            cprofile_dir = os.path.join(cprofile_dir, re.sub(r"\W+", "_", label).strip("_"))
+        return cls(enabled=bool(profile), cprofile_dir=cprofile_dir, label=label)
+
+    def run(self, name: str, fn, *args, **kwargs):
+        """Call fn(*args, **kwargs) as step `name` and return its result unchanged."""
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            mem_base = tracemalloc.get_traced_memory()[0]
+
+        profiler = cProfile.Profile() if self.cprofile_dir else None
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            out = fn(*args, **kwargs)
+        finally:
+            if profiler:
+                profiler.disable()
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+
+        peak_mb = None
+        if self.trace_memory:
+            peak_mb = (tracemalloc.get_traced_memory()[1] - mem_base) / 1024 ** 2
+
+        if profiler:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            slug = re.sub(r"\W+", "_", name).strip("_")
+            profiler.dump_stats(os.path.join(self.cprofile_dir,
+                                             f"{len(self.records) + 1:02d}_{slug}.prof"))
+
+        self.records.append({
+            "step":        name,
+            "wall_s":      wall,
+            "cpu_s":       cpu,
+            "peak_mem_mb": peak_mb,
+            "rows_in":     _count_rows(list(args) + list(kwargs.values())),
+            "rows_out":    _count_rows([out]),
+        })
+        return out
+
+    def table(self) -> pd.DataFrame:
+        """One row per recorded step, plus a TOTAL row."""
+        table = pd.DataFrame(self.records,
+                             columns=["step", "wall_s", "cpu_s", "peak_mem_mb", "rows_in", "rows_out"])
+        if not table.empty:
+            total = {"step": "TOTAL", "wall_s": table["wall_s"].sum(), "cpu_s": table["cpu_s"].sum(),
+                     "peak_mem_mb": table["peak_mem_mb"].max(), "rows_in": "", "rows_out": ""}
+            table = pd.concat([table, pd.DataFrame([total])], ignore_index=True)
+        return table
+
+    def finish(self) -> pd.DataFrame | None:
+        """Stop memory tracing (if this profiler started it) and print the table."""
+        if not self.enabled:
+            return None
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+        table = self.table()
+        print(f"\n=== Step profile{' – ' + self.label if self.label else ''} ===")
+        print(table.to_string(index=False, float_format=lambda x: f"{x:,.3f}"))
+        return table
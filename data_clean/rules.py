@@ -0,0 +1,230 @@
+"""
+Validity / fallback rule engine
+===============================
+Every line describes its column criteria once, as a dict of Rule:
+
+    RULES = {
+        "cargo_type": Rule("not_null",                 fill="mode"),
+        "route_risk": Rule("isin",  {1, 2, 3, 4, 5},   fill="median"),
+        "weight":     Rule("range", (0, np.inf)),
+        "hours":      Rule("isin",  [20, 25, 30, 40],  fill=30),
+        "salary":     Rule("range", (20_000, np.inf),  fill="mean", last_resort=30_000),
+    }
+
+  kind         not_null  – value present
+               not_blank – value present and not an all-whitespace string
+               range     – numeric lo <= x <= hi (param = (lo, hi))
+               isin      – numeric x in param
+  fill         "mode" / "median" / "mean" of the column's valid values, a
+               constant, or None (checked, never filled)
+  last_resort  used instead of a statistic that came out NaN (no valid values)
+
+RuleSet(spec) compiles a spec: range bounds become arrays, so all range
+columns of a frame are checked in one broadcast comparison over a 2-D float
+block, and each numeric column is parsed (comma decimals → float) once.
+validity(df) returns the whole-frame bitmask the cross-validation steps
+work from; apply_fills(df) replaces invalid cells with the fill values.
+
+FillStats accumulates the mode / median / mean fills over pieces of a frame
+(the partitions of an out-of-core run, see partitioned.py) as mergeable
+sketches (sketches.py), so the fills of the whole frame can be applied to
+each piece: apply_fills(piece, fills=…).
+
+Specs stay plain dicts of tuples, so the stage cache fingerprints them like
+any other module constant.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from data_clean.categoricals import mode_value
+from data_clean.sketches import (DEFAULT_EXACT_LIMIT, CountMap, MedianSketch, RunningMean,
+                                 resolve_error)
+
+NUMERIC_KINDS = ("range", "isin")
+
+
+class Rule(NamedTuple):
+    kind:        str
+    param:       object = None
+    fill:        object = None
+    last_resort: object = None
+
+
+def parse_numeric(series: pd.Series) -> pd.Series:
+    """Numeric view of a column: as is when already numeric, else comma decimals → float (NaN if unparsable)."""
+    if pd.api.types.is_numeric_dtype(series.dtype) and not isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    text = series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+    if pd.api.types.is_string_dtype(text.dtype):
+        fixed = text.str.strip().str.replace(",", ".", regex=False)
+        text  = fixed.where(fixed.notna(), text)   # non-string cells of object columns
+    return pd.to_numeric(text, errors="coerce")
+
+
+def _not_blank(series: pd.Series) -> np.ndarray:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        blank = np.flatnonzero(series.cat.categories.astype(str).str.strip() == "")
+        codes = series.cat.codes.to_numpy()
+        return (codes >= 0) & ~np.isin(codes, blank)
+    return (series.notna() & (series.astype(str).str.strip() != "")).to_numpy()
+
+
+class RuleSet:
+    """A compiled rule spec. See module docstring."""
+
+    def __init__(self, spec: dict[str, Rule]):
+        self.spec    = {col: Rule(*rule) for col, rule in spec.items()}
+        self.numeric = [c for c, r in self.spec.items() if r.kind in NUMERIC_KINDS]
+        ranges       = [c for c in self.numeric if self.spec[c].kind == "range"]
+        self._range_cols = ranges
+        self._lo = np.array([self.spec[c].param[0] for c in ranges], dtype=float)
+        self._hi = np.array([self.spec[c].param[1] for c in ranges], dtype=float)
+        self._isin = {c: np.asarray(list(self.spec[c].param), dtype=float)
+                      for c in self.numeric if self.spec[c].kind == "isin"}
+
+    def columns(self, df: pd.DataFrame) -> list[str]:
+        return [c for c in self.spec if c in df.columns]
+
+    def parse(self, df: pd.DataFrame) -> dict[str, pd.Series]:
+        """parse_numeric for every range / isin column present in df."""
+        return {c: parse_numeric(df[c]) for c in self.numeric if c in df.columns}
+
+    def validity(self, df: pd.DataFrame, parsed: dict[str, pd.Series] | None = None) -> pd.DataFrame:
+        """Boolean frame (df.index × ruled columns present in df): True where the cell passes."""
+        parsed = self.parse(df) if parsed is None else parsed
+        out = {}
+
+        present = [i for i, c in enumerate(self._range_cols) if c in parsed]
+        if present:
+            block = np.column_stack([parsed[self._range_cols[i]].to_numpy(dtype=float, na_value=np.nan)
+                                     for i in present])
+            with np.errstate(invalid="ignore"):
+                ok = (block >= self._lo[present]) & (block <= self._hi[present])
+            out.update({self._range_cols[i]: ok[:, j] for j, i in enumerate(present)})
+
+        for col, values in self._isin.items():
+            if col in parsed:
+                out[col] = np.isin(parsed[col].to_numpy(dtype=float, na_value=np.nan), values)
+
+        for col in self.columns(df):
+            kind = self.spec[col].kind
+            if kind == "not_null":
+                out[col] = df[col].notna().to_numpy()
+            elif kind == "not_blank":
+                out[col] = _not_blank(df[col])
+
+        return pd.DataFrame({c: out[c] for c in self.columns(df)}, index=df.index)
+
+    def fill_value(self, col: str, values: pd.Series) -> object:
+        """The fill for `col` given its valid values, falling back to last_resort."""
+        rule = self.spec[col]
+        if rule.fill == "mode":
+            return mode_value(values)
+        if rule.fill == "median":
+            val = values.median() if not values.empty else np.nan
+        elif rule.fill == "mean":
+            # exactly summed, as FillStats sums it over pieces
+            val = RunningMean().update(values).value()
+        else:
+            return rule.fill
+        return self._last_resort(col, val)
+
+    def _last_resort(self, col: str, val: object) -> object:
+        rule = self.spec[col]
+        if pd.isna(val) and rule.last_resort is not None:
+            val = rule.last_resort
+            print(f"  [fallback] '{col}' had no valid values – using last-resort fill: {val}")
+        return val
+
+    def apply_fills(self, df: pd.DataFrame, coerce: bool = False,
+                    fills: dict[str, object] | None = None) -> pd.DataFrame:
+        """
+        Replace invalid cells of every column with a fill by its column's fill
+        value (in place; returns df). coerce=True also stores the parsed
+        numeric version of range / isin columns. `fills` (FillStats.fills())
+        replaces the statistics of df's own valid values.
+        """
+        parsed = self.parse(df)
+        valid  = self.validity(df, parsed)
+        for col in valid.columns:
+            if self.spec[col].fill is None:
+                continue
+            if coerce and col in parsed:
+                df[col] = parsed[col]
+            bad = ~valid[col].to_numpy()
+            if bad.any():
+                if fills is not None:
+                    df.loc[bad, col] = fills[col]
+                    continue
+                source = parsed[col] if col in parsed else df[col]
+                df.loc[bad, col] = self.fill_value(col, source[~bad])
+        return df
+
+
+class FillStats:
+    """
+    The fill values of a RuleSet, accumulated piece by piece: update(df) per
+    piece (or merge() the stats of pieces done elsewhere), then fills() gives
+    what apply_fills would use on the concatenated frame. Each statistic is a
+    mergeable sketch (see sketches.py): mode and mean are exact, and median
+    is exact up to `exact_limit` distinct values and within rank `error`
+    beyond.
+    """
+
+    def __init__(self, rules: RuleSet, error: float | None = None,
+                 exact_limit: int = DEFAULT_EXACT_LIMIT):
+        self.rules  = rules
+        self.error, self.exact_limit = resolve_error(error), exact_limit
+        self.stats: dict[str, CountMap | MedianSketch | RunningMean] = {}
+        self.bad:   dict[str, int] = {}
+
+    def _sketch(self, fill: str) -> CountMap | MedianSketch | RunningMean:
+        if fill == "mode":
+            return CountMap()
+        if fill == "median":
+            return MedianSketch(self.error, self.exact_limit)
+        return RunningMean()
+
+    def update(self, df: pd.DataFrame) -> "FillStats":
+        parsed = self.rules.parse(df)
+        valid  = self.rules.validity(df, parsed)
+        for col in valid.columns:
+            fill = self.rules.spec[col].fill
+            if fill is None:
+                continue
+            ok = valid[col].to_numpy()
+            self.bad[col] = self.bad.get(col, 0) + int((~ok).sum())
+            if fill not in ("mode", "median", "mean"):
+                continue
+            if col not in self.stats:
+                self.stats[col] = self._sketch(fill)
+            self.stats[col].update((parsed[col] if col in parsed else df[col])[ok])
+        return self
+
+    def merge(self, other: "FillStats") -> "FillStats":
+        for col, n in other.bad.items():
+            self.bad[col] = self.bad.get(col, 0) + n
+        for col, stat in other.stats.items():
+            self.stats[col] = stat if col not in self.stats else self.stats[col].merge(stat)
+        return self
+
+    def fills(self) -> dict[str, object]:
+        """The fill of every column that has invalid cells (last_resort applied)."""
+        out = {}
+        for col, bad in self.bad.items():
+            if not bad:
+                continue
+            fill = self.rules.spec[col].fill
+            stat = self.stats.get(col) or self._sketch(fill)
+            if fill == "mode":
+                out[col] = stat.mode()
+            elif fill == "median":
+                out[col] = self.rules._last_resort(col, stat.median())
+            elif fill == "mean":
+                out[col] = self.rules._last_resort(col, stat.value())
+            else:
+                out[col] = fill
+        return out
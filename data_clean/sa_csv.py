@@ -0,0 +1,301 @@
+"""
+Typed South-African CSV reader
+==============================
+Shared loader for the semicolon-delimited, comma-decimal claim files.
+
+Each line declares a per-column schema (column name → kind), in file order:
+    "str"   – IDs and labels, always kept as strings
+    "float" – SA comma-decimal numbers
+    "score" – small integer scales / counts
+    "skip"  – present in the file but never parsed (usecols)
+
+Comma decimals are parsed natively during tokenisation (pyarrow's CSV
+reader when installed, otherwise the pandas C engine). Numeric columns are
+inferred exactly as pd.to_numeric would (int64 when complete, float64 with
+NaN); only a numeric column that contains non-numeric junk is converted
+afterwards, with a single vectorised pass instead of a per-cell lambda.
+
+"score" columns are then downcast losslessly: to the narrowest integer dtype
+that holds their range when complete (int8 for a 1-5 scale), to float32 when
+they have gaps (small integers are exact in float32). "float" columns stay
+float64: ratios and amounts are not exact in float32, and sums / means of
+them must not change.
+
+Input cache: with cache=True (or DATA_CLEAN_INPUT_CACHE=1) the typed frame is
+also written as an Arrow IPC (Feather v2) file next to the source,
+.<name>.arrow, tagged with the source's size, mtime and sha256 plus the
+schema it was parsed with. Later reads memory-map that file instead of
+parsing the CSV. A changed mtime alone (touch, fresh checkout) costs one
+hash, not a re-parse, and the new mtime is stored so later reads skip the
+hash again; any other change re-parses and rewrites the file.
+Needs pyarrow; without it the cache is silently off.
+
+Concurrency: read_sa_csvs reads several files (a line's freq and sev) on one
+thread each. The Arrow CSV reader and the C engine release the GIL while they
+read and tokenise, so on slow (network) storage one file's I/O wait overlaps
+the other's parse. prefetch() pulls files into the OS page cache on a
+background thread, so a later read of them starts warm.
+
+Shards: wherever a path is taken, a list of paths (e.g. the sorted matches of
+a glob) is read as one file: each shard is parsed (and cached) on its own,
+concurrently, and the frames are concatenated in list order.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from data_clean.incremental import file_digest
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # fall back to the pandas C engine
+    pa = pa_csv = pa_ipc = None
+
+NUMERIC_KINDS = {"float", "score"}
+SKIP = "skip"
+
+INPUT_CACHE_ENV     = "DATA_CLEAN_INPUT_CACHE"
+INPUT_CACHE_VERSION = 1          # bump when parsing changes in a way the schema does not show
+_CACHE_META_KEY     = b"data_clean"
+
+# pandas' default NA tokens, so both engines agree on what is missing
+_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+]
+
+
+def _to_numeric(s: pd.Series) -> pd.Series:
+    """Return s as a numeric column; strings are stripped and comma-fixed first."""
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s
+    return pd.to_numeric(s.str.strip().str.replace(",", ".", regex=False), errors="coerce")
+
+
+def _downcast_score(s: pd.Series) -> pd.Series:
+    """int64 → narrowest int; float64 → float32 when every value round-trips exactly."""
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return pd.to_numeric(s, downcast="integer")
+    if s.dtype == np.float64:
+        values = s.to_numpy()
+        narrow = values.astype(np.float32)
+        if ((narrow == values) | np.isnan(values)).all():
+            return pd.Series(narrow, index=s.index, name=s.name)
+    return s
+
+
+def _apply_schema(df: pd.DataFrame, schema: dict[str, str]) -> pd.DataFrame:
+    for col, kind in schema.items():
+        if kind in NUMERIC_KINDS and col in df.columns:
+            df[col] = _to_numeric(df[col])
+            if kind == "score":
+                df[col] = _downcast_score(df[col])
+    return df
+
+
+def _str_cols(schema: dict[str, str]) -> list[str]:
+    return [col for col, kind in schema.items() if kind == "str"]
+
+
+def _used_cols(schema: dict[str, str]) -> list[str]:
+    return [col for col, kind in schema.items() if kind != SKIP]
+
+
+def numeric_cols(df: pd.DataFrame, schema: dict[str, str]) -> list[str]:
+    """Columns of df that the schema declares numeric, in df's order."""
+    return [col for col in df.columns if schema.get(col) in NUMERIC_KINDS]
+
+
+# ── Input cache ──────────────────────────────────────────────────────────────
+
+def input_cache_path(path: str) -> str:
+    """The Arrow IPC file read_sa_csv(path, ..., cache=True) keeps next to path."""
+    head, tail = os.path.split(path)
+    return os.path.join(head, f".{tail}.arrow")
+
+
+def _cache_enabled(cache: bool | None) -> bool:
+    if cache is None:
+        cache = os.environ.get(INPUT_CACHE_ENV, "") not in ("", "0")
+    return bool(cache) and pa_ipc is not None
+
+
+def _cache_key(schema: dict[str, str], engine: str) -> str:
+    return json.dumps({"version": INPUT_CACHE_VERSION, "engine": engine, "schema": schema})
+
+
+def _read_cached(path: str, key: str) -> pd.DataFrame | None:
+    """The cached frame for path, or None when missing, stale or unreadable."""
+    cache_path = input_cache_path(path)
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with pa.memory_map(cache_path) as source:
+            reader = pa_ipc.open_file(source)
+            meta   = json.loads((reader.schema.metadata or {}).get(_CACHE_META_KEY, b"{}"))
+            st     = os.stat(path)
+            if meta.get("key") != key or meta.get("size") != st.st_size:
+                return None
+            touched = meta.get("mtime_ns") != st.st_mtime_ns
+            if touched and meta.get("sha256") != file_digest(path):
+                return None
+            table = reader.read_all()
+            if touched:
+                # same bytes, new mtime: store it, so later reads skip the hash again
+                _write_table(path, {**meta, "mtime_ns": st.st_mtime_ns}, table)
+            return table.to_pandas()
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+
+def _source_meta(path: str, key: str) -> dict:
+    st = os.stat(path)
+    return {"key": key, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": file_digest(path)}
+
+
+def _write_cached(path: str, meta: dict, df: pd.DataFrame) -> None:
+    """Store df as path's cache file (atomically); an unwritable directory just means no cache."""
+    _write_table(path, meta, pa.Table.from_pandas(df, preserve_index=False))
+
+
+def _write_table(path: str, meta: dict, table: "pa.Table") -> None:
+    """Store table, tagged with meta, as path's cache file (atomically)."""
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           _CACHE_META_KEY: json.dumps(meta).encode()})
+    cache_path = input_cache_path(path)
+    tmp = cache_path + f".tmp{os.getpid()}"
+    try:
+        with pa.OSFile(tmp, "wb") as sink, pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, cache_path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# ── Readers ──────────────────────────────────────────────────────────────────
+
+def read_sa_csv(path: str | list[str], schema: dict[str, str], engine: str | None = None,
+                cache: bool | None = None) -> pd.DataFrame:
+    """
+    Read a South-African-format CSV (semicolon-delimited, comma decimals) with
+    the header row replaced by the schema's column names. "skip" columns are
+    never tokenised into the frame.
+
+    path   : the file, or a list of shards read as one (see module docstring)
+    engine : "pyarrow" | "c" | None (pyarrow if installed, else the C engine)
+    cache  : reuse / write the Arrow IPC input cache (see module docstring);
+             None leaves DATA_CLEAN_INPUT_CACHE in charge
+    """
+    if not isinstance(path, str):
+        return _concat_shards(read_sa_csvs([(shard, schema) for shard in path], engine, cache))
+    engine = engine or ("pyarrow" if pa_csv is not None else "c")
+    if not _cache_enabled(cache):
+        return _parse_sa_csv(path, schema, engine)
+
+    key = _cache_key(schema, engine)
+    df  = _read_cached(path, key)
+    if df is None:
+        meta = _source_meta(path, key)   # taken before parsing: an edit mid-read leaves the entry stale
+        df   = _parse_sa_csv(path, schema, engine)
+        _write_cached(path, meta, df)
+    return df
+
+
+def _parse_sa_csv(path: str, schema: dict[str, str], engine: str) -> pd.DataFrame:
+    names = list(schema)
+
+    if engine == "pyarrow":
+        table = pa_csv.read_csv(
+            path,
+            read_options=pa_csv.ReadOptions(column_names=names, skip_rows=1),
+            parse_options=pa_csv.ParseOptions(delimiter=";"),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={col: pa.string() for col in _str_cols(schema)},
+                include_columns=_used_cols(schema),
+                decimal_point=",",
+                null_values=_NA_VALUES,
+                strings_can_be_null=True,
+            ),
+        )
+        df = table.to_pandas()
+    else:
+        df = pd.read_csv(path, sep=";", decimal=",", names=names, header=0,
+                         usecols=_used_cols(schema), dtype={col: str for col in _str_cols(schema)})
+    return _apply_schema(df, schema)
+
+
+def _concat_shards(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    if not frames:
+        raise ValueError("read_sa_csv: empty list of shards")
+    # score columns a shard downcast differently widen to the common dtype
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def read_sa_csvs(jobs: list[tuple[str | list[str], dict[str, str]]], engine: str | None = None,
+                 cache: bool | None = None) -> list[pd.DataFrame]:
+    """read_sa_csv(path, schema, engine, cache) for every (path, schema) job, concurrently."""
+    if any(not isinstance(path, str) for path, _ in jobs):
+        # one thread per shard; regroup the frames by job afterwards
+        flat   = [(shard, schema) for path, schema in jobs for shard in shard_list(path)]
+        frames = iter(read_sa_csvs(flat, engine, cache))
+        return [_concat_shards([next(frames) for _ in shard_list(path)]) for path, _ in jobs]
+    if len(jobs) < 2:
+        return [read_sa_csv(path, schema, engine, cache) for path, schema in jobs]
+    workers = min(len(jobs), (os.cpu_count() or 1) + 4)   # ThreadPoolExecutor's own cap
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="read_sa_csv") as pool:
+        futures = [pool.submit(read_sa_csv, path, schema, engine, cache) for path, schema in jobs]
+        return [future.result() for future in futures]
+
+
+def shard_list(path: str | list[str]) -> list[str]:
+    """path as a list of files: [path] for a single file."""
+    return [path] if isinstance(path, str) else list(path)
+
+
+def prefetch(paths: list[str], cache: bool | None = None,
+             block_size: int = 1 << 20) -> threading.Thread:
+    """
+    Read the files a later read_sa_csv(path, ..., cache=cache) will open (the
+    Arrow copy when the input cache is on and has one) on a daemon thread,
+    so they are in the OS page cache by then. Missing files are skipped.
+    Returns the started thread.
+    """
+    def targets() -> list[str]:
+        use_cache = _cache_enabled(cache)
+        return [input_cache_path(p) if use_cache and os.path.exists(input_cache_path(p)) else p
+                for p in paths]
+
+    def warm() -> None:
+        buf = bytearray(block_size)
+        for path in targets():
+            try:
+                with open(path, "rb", buffering=0) as fh:
+                    while fh.readinto(buf):
+                        pass
+            except OSError:
+                continue
+
+    thread = threading.Thread(target=warm, name="prefetch", daemon=True)
+    thread.start()
+    return thread
+
+
+def iter_sa_csv(path: str | list[str], schema: dict[str, str],
+                chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield the file (each shard in turn) in typed chunks of `chunksize` rows (pandas C engine)."""
+    for shard in shard_list(path):
+        reader = pd.read_csv(shard, sep=";", decimal=",", names=list(schema), header=0,
+                             usecols=_used_cols(schema),
+                             dtype={col: str for col in _str_cols(schema)}, chunksize=chunksize)
+        for chunk in reader:
+            yield _apply_schema(chunk, schema)
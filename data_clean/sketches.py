@@ -0,0 +1,307 @@
+"""
+Mergeable statistics sketches
+=============================
+The mode / median / mean fills of rules.FillStats, kept as sketches that
+are filled piece by piece (chunks, partitions) and merged across processes:
+
+  CountMap        value counts: the exact mode (and median) of columns with
+                  few distinct values – categoricals, flags, coded scores
+  MedianSketch    exact median from value counts while the column has at most
+                  `exact_limit` distinct values, a KLL sketch (QuantileSketch)
+                  beyond that, with a rank error of at most `error`
+  RunningMean     exact sum (an integer, see exact_sum) and count, so a mean
+                  does not depend on how the values were split
+
+Small inputs therefore get the same fills as the in-memory pipelines (whose
+mean fills use RunningMean too); only a median over more than exact_limit
+distinct values is approximate. The error
+bound is FillStats(error=…), else DATA_CLEAN_SKETCH_ERROR, else
+DEFAULT_ERROR; an error of 0 keeps every median exact.
+
+QuantileSketch is the KLL sketch of Karnin, Lang and Liberty ("Optimal
+Quantile Approximation in Streams", 2016): levels of sorted samples, level h
+standing for 2**h values each, where a full level is compacted by promoting
+every other item (random offset) to the level above. Memory is O(k) items
+for k ≈ (2.446 / error) ** 1.06.
+"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# normalised rank error of an approximate median
+DEFAULT_ERROR = 0.001
+SKETCH_ERROR_ENV = "DATA_CLEAN_SKETCH_ERROR"
+
+# distinct values a MedianSketch counts exactly before it switches to KLL
+DEFAULT_EXACT_LIMIT = 1_000_000
+
+
+def resolve_error(error: float | None) -> float:
+    """error as given, else DATA_CLEAN_SKETCH_ERROR, else DEFAULT_ERROR (0: always exact)."""
+    if error is None:
+        error = float(os.environ.get(SKETCH_ERROR_ENV) or DEFAULT_ERROR)
+    if error < 0:
+        raise ValueError(f"sketch error must be 0 or more, got {error}")
+    return error
+
+
+# ── Exact ─────────────────────────────────────────────────────────────────────
+
+class CountMap:
+    """Counts of the non-null values seen; mode() / median() as mode_value / Series.median."""
+
+    def __init__(self):
+        self.counts = pd.Series(dtype=np.int64)
+        self.dtype  = None
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def update(self, values: pd.Series) -> "CountMap":
+        if self.dtype is None:
+            self.dtype = values.dtype
+        return self._add(_value_counts(values))
+
+    def merge(self, other: "CountMap") -> "CountMap":
+        if self.dtype is None:
+            self.dtype = other.dtype
+        return self._add(other.counts)
+
+    def _add(self, counts: pd.Series) -> "CountMap":
+        if counts.empty:
+            return self
+        self.counts = counts if self.counts.empty else \
+            self.counts.add(counts, fill_value=0).astype(np.int64)
+        return self
+
+    def mode(self) -> object:
+        """The most frequent value, ties to the smallest (NaN if none seen)."""
+        if self.counts.empty:
+            return np.nan
+        return self.counts.sort_index().idxmax()
+
+    def median(self) -> object:
+        """The middle value, or the mean of the middle two, in the values' dtype."""
+        if self.counts.empty:
+            return np.nan
+        counts = self.counts.sort_index()
+        ends   = np.cumsum(counts.to_numpy())
+        n      = int(ends[-1])
+        middle = counts.index[np.searchsorted(ends, [(n - 1) // 2, n // 2], side="right")]
+        return pd.Series(middle[:1] if n % 2 else middle, dtype=self.dtype).median()
+
+
+def _value_counts(values: pd.Series) -> pd.Series:
+    """Non-zero counts of the non-null values (categoricals counted on their codes)."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes  = values.cat.codes.to_numpy()
+        counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(values.cat.categories)),
+                           index=pd.Index(values.cat.categories))
+        return counts[counts > 0]
+    return values.value_counts()
+
+
+# exact_sum counts in units of the smallest subnormal, 2**-1074: every finite
+# float64 is a whole number of them, its 53-bit significand shifted left by
+# its biased exponent (less one). Per block of values, bincount sums the
+# significands of each sign and exponent in two halves, whose float64 sums
+# stay below 2**53 and so are exact; only those ≤ 4096 sums meet Python ints.
+_SPLIT = 27
+_BLOCK = 1 << 18
+
+
+def exact_sum(values: np.ndarray) -> int:
+    """The exact sum of the finite values (NaN and ±inf skipped), as a whole number of 2**-1074."""
+    values = np.asarray(values, dtype=np.float64)
+    total  = 0
+    for start in range(0, len(values), _BLOCK):
+        bits = values[start:start + _BLOCK].view(np.uint64)
+        key  = bits >> np.uint64(52)                     # sign · 2048 + biased exponent
+        frac = bits & np.uint64((1 << 52) - 1)
+        high  = np.bincount(key, weights=frac >> np.uint64(_SPLIT), minlength=4096)
+        low   = np.bincount(key, weights=frac & np.uint64((1 << _SPLIT) - 1), minlength=4096)
+        count = np.bincount(key, minlength=4096)
+        for k in np.flatnonzero(count).tolist():
+            biased = k & 0x7FF
+            if biased == 0x7FF:
+                continue
+            units = (int(high[k]) << _SPLIT) + int(low[k]) + (int(count[k]) << 52 if biased else 0)
+            units <<= max(biased, 1) - 1
+            total += -units if k >> 11 else units
+    return total
+
+
+class RunningMean:
+    """
+    Exact sum (exact_sum) and count of the non-null values; value() is the
+    correctly rounded sum over the count, in a float dtype of theirs, the same
+    for any split of the values into pieces.
+    """
+
+    def __init__(self):
+        self.total, self.special = 0, 0.0      # special: the sum of any ±inf
+        self.n, self.dtype = 0, None
+
+    def update(self, values: pd.Series) -> "RunningMean":
+        if self.dtype is None:
+            self.dtype = values.dtype
+        numbers = values.to_numpy(dtype=float, na_value=np.nan)
+        infinite = np.isinf(numbers)
+        if infinite.any():
+            self.special += float(numbers[infinite].sum())
+        self.total += exact_sum(numbers)
+        self.n     += len(numbers) - int(np.isnan(numbers).sum())
+        return self
+
+    def merge(self, other: "RunningMean") -> "RunningMean":
+        if self.dtype is None:
+            self.dtype = other.dtype
+        self.total   += other.total
+        self.special += other.special
+        self.n       += other.n
+        return self
+
+    def value(self) -> object:
+        if not self.n:
+            return np.nan
+        mean = (self.special or self.total / (1 << 1074)) / self.n
+        if isinstance(self.dtype, np.dtype) and self.dtype.kind == "f":
+            mean = self.dtype.type(mean)
+        return mean
+
+
+# ── Approximate ───────────────────────────────────────────────────────────────
+
+class QuantileSketch:
+    """
+    KLL quantile sketch over numbers: update() with arrays of values, or
+    add_counts() with distinct values and their counts, merge() sketches of
+    other pieces, then quantile(q) is a value whose rank is within error · n
+    of q · n (with high probability). Compaction offsets come from a seeded
+    generator, so a run is reproducible.
+    """
+
+    def __init__(self, error: float = DEFAULT_ERROR, seed: int = 0):
+        self.error  = error
+        self.k      = max(8, math.ceil((2.446 / error) ** (1 / 0.9433)))
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self.n      = 0
+        self._rng   = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        return max(2, math.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - h)))
+
+    def update(self, values) -> "QuantileSketch":
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        return self._compress()
+
+    def add_counts(self, values, counts) -> "QuantileSketch":
+        """Insert each value `counts` times: a copy at level h for every bit h of its count."""
+        values = np.asarray(values, dtype=float)
+        counts = np.asarray(counts, dtype=np.int64)
+        for h in range(int(counts.max()).bit_length() if len(counts) else 0):
+            self._level(h)
+            self.levels[h] = np.concatenate([self.levels[h], values[(counts >> h) & 1 == 1]])
+        self.n += int(counts.sum())
+        return self._compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        for h, items in enumerate(other.levels):
+            self._level(h)
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        return self._compress()
+
+    def _level(self, h: int) -> None:
+        while len(self.levels) <= h:
+            self.levels.append(np.empty(0))
+
+    def _compress(self) -> "QuantileSketch":
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) <= self._capacity(h):
+                h += 1
+                continue
+            level = np.sort(level)
+            keep  = level[:len(level) % 2]     # an odd item out stays behind
+            pairs = level[len(keep):]
+            self._level(h + 1)
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1],
+                                                 pairs[self._rng.integers(2)::2]])
+            self.levels[h] = keep
+            h = 0                              # a new level lowers the capacities below it
+        return self
+
+    def quantile(self, q: float) -> float:
+        """The item of rank ⌊q · (n - 1)⌋ among the weighted samples (NaN if empty)."""
+        if not self.n:
+            return np.nan
+        items   = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.int64)
+                                  for h, level in enumerate(self.levels)])
+        order   = np.argsort(items, kind="stable")
+        ends    = np.cumsum(weights[order])
+        rank    = int(q * (ends[-1] - 1))
+        return float(items[order[min(np.searchsorted(ends, rank, side="right"), len(order) - 1)]])
+
+
+class MedianSketch:
+    """
+    A column's median: exact from a CountMap while it holds at most
+    `exact_limit` distinct values (always, with error 0), a QuantileSketch
+    with rank error `error` once it holds more.
+    """
+
+    def __init__(self, error: float | None = None, exact_limit: int = DEFAULT_EXACT_LIMIT):
+        self.error, self.exact_limit = resolve_error(error), exact_limit
+        self.counts = CountMap()
+        self.sketch: QuantileSketch | None = None
+
+    @property
+    def exact(self) -> bool:
+        return self.sketch is None
+
+    def update(self, values: pd.Series) -> "MedianSketch":
+        if self.exact:
+            self.counts.update(values)
+            return self._check_limit()
+        self.sketch.update(values.to_numpy(dtype=float, na_value=np.nan))
+        return self
+
+    def merge(self, other: "MedianSketch") -> "MedianSketch":
+        if self.counts.dtype is None:
+            self.counts.dtype = other.counts.dtype
+        if self.exact and other.exact:
+            self.counts.merge(other.counts)
+            return self._check_limit()
+        self._to_sketch()
+        if other.exact:
+            counts = other.counts.counts
+            self.sketch.add_counts(counts.index.to_numpy(dtype=float), counts.to_numpy())
+        else:
+            self.sketch.merge(other.sketch)
+        return self
+
+    def _check_limit(self) -> "MedianSketch":
+        if self.error and len(self.counts) > self.exact_limit:
+            self._to_sketch()
+        return self
+
+    def _to_sketch(self) -> None:
+        if self.exact:
+            counts = self.counts.counts
+            self.sketch = QuantileSketch(self.error).add_counts(
+                counts.index.to_numpy(dtype=float), counts.to_numpy())
+            self.counts.counts = pd.Series(dtype=np.int64)
+
+    def median(self) -> object:
+        if self.exact:
+            return self.counts.median()
+        return pd.Series([self.sketch.quantile(0.5)], dtype=self.counts.dtype).median()
@@ -0,0 +1,349 @@
+"""
+Content-addressed stage cache
+=============================
+Stages of run_pipeline are called through StageCache.run(name, fn, *args),
+the same hook StepProfiler provides. Each stage's key is a sha256 over:
+
+  - the bytes of any input file passed in (paths, and lists of shard paths,
+    are hashed by content)
+  - the keys of the upstream stages whose outputs it receives
+  - fn's source, plus the source / value of every function and constant it
+    reads from its module (so editing CRITERIA or a line's RULES changes
+    the key of the stages that use them, and of everything downstream)
+  - all other parameters, and the pandas / numpy versions
+
+Outputs (a DataFrame or a tuple of them) go to <cache_dir>/<key>/ as Parquet
+(pickle for frames Parquet cannot round-trip exactly, or without pyarrow),
+together with the stage's printed output and recorded diagnostics (see
+diagnostics.py), which are replayed on a hit. A Diagnostics argument is
+keyed on its level, so changing the level reruns the stages that report.
+
+Hits return lazy handles that are only read from disk when a later stage
+misses and needs them. A rerun therefore resumes from the longest cached
+prefix. Stages returning None (checks, save) always run. Least-recently
+used entries are evicted once the directory exceeds max_bytes.
+
+Enable with run_pipeline(..., cache=True | "<dir>") or the environment:
+    DATA_CLEAN_CACHE_DIR=<dir>        cache directory
+    DATA_CLEAN_CACHE_MAX_MB=<n>       size limit (default 2048)
+"""
+
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+from data_clean.diagnostics import Diagnostics
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine)
+except ImportError:  # pickle only
+    pyarrow = None
+
+CACHE_ENV        = "DATA_CLEAN_CACHE_DIR"
+CACHE_MAX_ENV    = "DATA_CLEAN_CACHE_MAX_MB"
+DEFAULT_CACHE    = ".data_clean_cache"
+DEFAULT_MAX_MB   = 2048
+CACHE_VERSION    = 1
+
+_PACKAGE = __name__.split(".")[0]
+
+
+# ── Keys ─────────────────────────────────────────────────────────────────────
+
+def _stable_repr(obj) -> str:
+    """repr with sets / dict keys sorted, so keys do not depend on hash seeds."""
+    if isinstance(obj, dict):
+        items = sorted((_stable_repr(k), _stable_repr(v)) for k, v in obj.items())
+        return "{" + ", ".join(f"{k}: {v}" for k, v in items) + "}"
+    if isinstance(obj, (set, frozenset)):
+        return "{" + ", ".join(sorted(_stable_repr(v) for v in obj)) + "}"
+    if isinstance(obj, (list, tuple)):
+        return type(obj).__name__ + "(" + ", ".join(_stable_repr(v) for v in obj) + ")"
+    if isinstance(obj, re.Pattern):
+        return f"re({obj.pattern!r}, {obj.flags})"
+    return repr(obj)
+
+
+def _global_names(code: types.CodeType) -> set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):  # nested functions, lambdas, comprehensions
+            names |= _global_names(const)
+    return names
+
+
+def _fingerprint(fn, seen: set | None = None) -> str:
+    """fn's source plus everything (functions, classes, constants) it reads from this package, recursively."""
+    seen = set() if seen is None else seen
+    fn = inspect.unwrap(fn)
+    if id(fn) in seen or not hasattr(fn, "__code__"):
+        return ""
+    seen.add(id(fn))
+    try:
+        parts = [inspect.getsource(fn)]
+    except (OSError, TypeError):
+        parts = [fn.__code__.co_code.hex()]
+    for name in sorted(_global_names(fn.__code__)):
+        obj = fn.__globals__.get(name)
+        if isinstance(obj, types.FunctionType):
+            if obj.__module__.split(".")[0] == _PACKAGE:
+                parts.append(_fingerprint(obj, seen))
+        elif isinstance(obj, type) and obj.__module__.split(".")[0] == _PACKAGE:
+            if id(obj) not in seen:  # e.g. rules.RuleSet: hash the whole class body
+                seen.add(id(obj))
+                parts.append(inspect.getsource(obj))
+                parts.extend(_fingerprint(m, seen) for m in vars(obj).values()
+                             if isinstance(m, types.FunctionType))
+        elif isinstance(obj, (dict, list, tuple, set, frozenset, str, int, float, re.Pattern)):
+            parts.append(f"{name}={_stable_repr(obj)}")
+    return "\n".join(parts)
+
+
+_file_digests: dict[tuple, str] = {}
+
+
+def _file_token(path: str) -> str:
+    st  = os.stat(path)
+    memo = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo not in _file_digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        _file_digests[memo] = h.hexdigest()
+    return "file:" + _file_digests[memo]
+
+
+def _arg_token(arg) -> str:
+    if isinstance(arg, _Lazy):
+        return "stage:" + arg.ref
+    if isinstance(arg, (pd.DataFrame, pd.Series)):
+        hashed = pd.util.hash_pandas_object(arg, index=True).to_numpy()
+        return "frame:" + hashlib.sha256(hashed.tobytes()).hexdigest()
+    if isinstance(arg, str) and os.path.isfile(arg):
+        return _file_token(arg)
+    if isinstance(arg, tuple):
+        return "(" + ",".join(_arg_token(a) for a in arg) + ")"
+    if isinstance(arg, list) and arg and all(isinstance(a, str) and os.path.isfile(a) for a in arg):
+        return "[" + ",".join(_file_token(a) for a in arg) + "]"   # input shards
+    return _stable_repr(arg)
+
+
+# ── Storage ──────────────────────────────────────────────────────────────────
+
+def _parquet_ok(df: pd.DataFrame) -> bool:
+    """Parquet only when every column and the index round-trip with their dtype."""
+    if pyarrow is None or not isinstance(df, pd.DataFrame):
+        return False
+    if df.columns.duplicated().any() or not all(isinstance(c, str) for c in df.columns):
+        return False
+    dtypes = list(df.dtypes) + [df.index.dtype]
+    dtypes += [dt.categories.dtype for dt in dtypes if isinstance(dt, pd.CategoricalDtype)]
+    return not any(dt == object for dt in dtypes)
+
+
+def _write_frame(obj, base: str) -> str:
+    if _parquet_ok(obj):
+        try:
+            obj.to_parquet(base + ".parquet")
+            return base + ".parquet"
+        except (pyarrow.ArrowException, ValueError, TypeError):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(base + ".parquet")
+    obj.to_pickle(base + ".pkl")
+    return base + ".pkl"
+
+
+def _read_frame(path: str):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path).copy()  # Arrow buffers are read-only; stages write in place
+    return pd.read_pickle(path)
+
+
+class _Lazy:
+    """
+    A cached stage output, read from disk only when needed. Outputs of
+    stages that just ran are wrapped too (value already in memory), so
+    downstream keys chain on stage keys instead of hashing frame contents.
+    """
+
+    def __init__(self, ref: str, path: str, value=None):
+        self.ref, self.path, self._value = ref, path, value
+
+    def load(self):
+        if self._value is None:
+            self._value = _read_frame(self.path)
+        return self._value
+
+
+class _Tee(io.TextIOBase):
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, s):
+        for stream in self.streams:
+            stream.write(s)
+        return len(s)
+
+    def flush(self):
+        for stream in self.streams:
+            stream.flush()
+
+
+# ── Cache ────────────────────────────────────────────────────────────────────
+
+class StageCache:
+    """See module docstring. `runner` executes misses (a StepProfiler)."""
+
+    def __init__(self, cache_dir: str | None, runner, max_bytes: int = DEFAULT_MAX_MB * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.runner    = runner
+        self.max_bytes = max_bytes
+        self.records: list[dict] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache_dir is not None
+
+    @classmethod
+    def resolve(cls, cache: "bool | str | StageCache | None", runner) -> "StageCache":
+        """
+        cache  : a StageCache, a directory, True (DEFAULT_CACHE), False, or
+                 None to follow DATA_CLEAN_CACHE_DIR / DATA_CLEAN_CACHE_MAX_MB
+        runner : object with run(name, fn, *args, **kwargs), e.g. StepProfiler
+        """
+        if isinstance(cache, StageCache):
+            cache.runner = runner
+            return cache
+        if cache is None:
+            cache = os.environ.get(CACHE_ENV) or None
+        elif cache is True:
+            cache = os.environ.get(CACHE_ENV) or DEFAULT_CACHE
+        elif cache is False:
+            cache = None
+        max_mb = float(os.environ.get(CACHE_MAX_ENV) or DEFAULT_MAX_MB)
+        return cls(cache, runner, int(max_mb * 1024 ** 2))
+
+    def run(self, name: str, fn, *args, **kwargs):
+        """Return fn(*args, **kwargs), from the cache when an identical stage was stored."""
+        if not self.enabled:
+            return self.runner.run(name, fn, *args, **kwargs)
+
+        key = hashlib.sha256("\n".join([
+            f"v{CACHE_VERSION} pandas={pd.__version__} numpy={np.__version__}",
+            name, _fingerprint(fn),
+            *(_arg_token(a) for a in args),
+            *(f"{k}={_arg_token(v)}" for k, v in sorted(kwargs.items())),
+        ]).encode()).hexdigest()
+        entry = os.path.join(self.cache_dir, key)
+        meta  = self._read_meta(entry)
+
+        diag = next((a for a in (*args, *kwargs.values()) if isinstance(a, Diagnostics)), None)
+        if meta is not None and meta["kind"] != "uncached":
+            os.utime(os.path.join(entry, "meta.json"))  # LRU touch
+            sys.stdout.write(meta["stdout"])
+            if diag is not None:
+                diag.entries.extend(meta.get("diagnostics", []))
+            self.records.append({"stage": name, "status": "hit", "key": key[:12],
+                                 "saved_s": meta["seconds"]})
+            outs = [_Lazy(f"{key}:{i}", os.path.join(entry, f)) for i, f in enumerate(meta["files"])]
+            return outs[0] if meta["kind"] == "frame" else tuple(outs)
+
+        args   = tuple(self.value(a) for a in args)
+        kwargs = {k: self.value(v) for k, v in kwargs.items()}
+        buf  = io.StringIO()
+        mark = len(diag.entries) if diag is not None else 0
+        t0   = time.perf_counter()
+        with contextlib.redirect_stdout(_Tee(sys.stdout, buf)):
+            out = self.runner.run(name, fn, *args, **kwargs)
+        seconds = time.perf_counter() - t0
+
+        kind = ("frame" if isinstance(out, pd.DataFrame) else
+                "tuple" if isinstance(out, tuple) and out and
+                all(isinstance(o, pd.DataFrame) for o in out) else "uncached")
+        if kind == "uncached":
+            if meta is None:
+                self._write_entry(entry, {"kind": kind}, [])
+            self.records.append({"stage": name, "status": "uncached", "key": "", "saved_s": None})
+            return out
+
+        frames = [out] if kind == "frame" else list(out)
+        recorded = diag.entries[mark:] if diag is not None else []
+        files  = self._write_entry(entry, {"kind": kind, "stdout": buf.getvalue(),
+                                           "diagnostics": recorded, "seconds": seconds}, frames)
+        self.records.append({"stage": name, "status": "miss", "key": key[:12], "saved_s": None})
+        self._evict()
+        outs = [_Lazy(f"{key}:{i}", os.path.join(entry, f), df)
+                for i, (f, df) in enumerate(zip(files, frames))]
+        return outs[0] if kind == "frame" else tuple(outs)
+
+    @staticmethod
+    def value(obj):
+        """Materialise a lazy cached output (or a tuple of them); pass anything else through."""
+        if isinstance(obj, _Lazy):
+            return obj.load()
+        if isinstance(obj, tuple) and any(isinstance(o, _Lazy) for o in obj):
+            return tuple(StageCache.value(o) for o in obj)
+        return obj
+
+    # ── entries ──
+
+    @staticmethod
+    def _read_meta(entry: str) -> dict | None:
+        try:
+            with open(os.path.join(entry, "meta.json"), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_entry(entry: str, meta: dict, frames: list) -> list[str]:
+        tmp = entry + f".tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        meta["files"] = [os.path.basename(_write_frame(df, os.path.join(tmp, str(i))))
+                         for i, df in enumerate(frames)]
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        return meta["files"]
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            meta = os.path.join(path, "meta.json")
+            try:
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                entries.append((os.path.getmtime(meta), size, path))
+            except (FileNotFoundError, NotADirectoryError):
+                continue  # not an entry, or evicted by a concurrent run
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def finish(self) -> pd.DataFrame | None:
+        """Print the per-stage hit / miss report."""
+        if not self.enabled:
+            return None
+        table = pd.DataFrame(self.records, columns=["stage", "status", "key", "saved_s"])
+        print(f"\n=== Stage cache ({self.cache_dir}) ===")
+        print(table.to_string(index=False, na_rep="",
+                              float_format=lambda x: f"{x:,.3f}"))
+        return table
@@ -0,0 +1,77 @@
+"""
+Chunked sev streaming
+=====================
+Shared helpers for the streaming mode of each line's run_pipeline.
+
+The sev file is read in chunks; every chunk is cleaned with the line's own
+step functions and then collapsed to per-key partial aggregates (claim count,
+summed columns, first-seen values of the shared columns). Only those partials
+are kept between chunks, so peak memory is bounded by the chunk size plus
+the freq side rather than by the size of the sev file.
+"""
+
+from typing import Iterable
+
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 250_000
+
+
+def partial_aggregate(chunk: pd.DataFrame, keys: list[str], first_cols: list[str],
+                      sum_cols: list[str], dropna: bool = True) -> pd.DataFrame:
+    """
+    Collapse one cleaned sev chunk to one row per key:
+      - claim_count : number of claim rows
+      - sum_cols    : summed (NaN skipped)
+      - first_cols  : first non-null value seen
+    Rows with a NaN key are dropped, as in every line's aggregate_sev, unless
+    dropna=False (keys still to be imputed after the stream; see regroup).
+    """
+    first_cols = [c for c in first_cols if c in chunk.columns and c not in keys]
+    grouped = chunk.groupby(keys, sort=False, dropna=dropna)
+    size    = grouped.size()
+    part    = grouped[first_cols].first() if first_cols else pd.DataFrame(index=size.index)
+    part["claim_count"] = size
+    for col in sum_cols:
+        part[col] = grouped[col].sum()
+    return part
+
+
+def combine_partials(parts: list[pd.DataFrame], sum_cols: list[str],
+                     dropna: bool = True) -> pd.DataFrame:
+    """Merge partial aggregates (indexed by key) in arrival order."""
+    stacked = pd.concat(parts)
+    agg = {col: "first" for col in stacked.columns}
+    agg.update({col: "sum" for col in ["claim_count"] + sum_cols})
+    levels = list(range(stacked.index.nlevels))
+    return stacked.groupby(level=levels, sort=False, dropna=dropna).agg(agg)
+
+
+def stream_aggregate(chunks: Iterable[pd.DataFrame], keys: list[str], first_cols: list[str],
+                     sum_cols: list[str] | None = None, dropna: bool = True) -> pd.DataFrame:
+    """
+    Fold cleaned sev chunks into a single per-key aggregate frame with the keys
+    as ordinary columns (first-appearance order), ready to stand in for the
+    aggregated sev in the final merge with freq.
+    """
+    sum_cols = ["claim_amount"] if sum_cols is None else sum_cols
+    state = None
+    for chunk in chunks:
+        part  = partial_aggregate(chunk, keys, first_cols, sum_cols, dropna)
+        state = part if state is None else combine_partials([state, part], sum_cols, dropna)
+    if state is None:
+        return pd.DataFrame(columns=keys + first_cols + ["claim_count"] + sum_cols)
+    state["claim_count"] = state["claim_count"].astype(int)
+    return state.reset_index()
+
+
+def regroup(sev_agg: pd.DataFrame, keys: list[str],
+            sum_cols: list[str] | None = None) -> pd.DataFrame:
+    """
+    Re-collapse an aggregate built with dropna=False once its NaN keys have
+    been imputed: rows that now share a key are merged, NaN keys are dropped.
+    """
+    sum_cols = ["claim_amount"] if sum_cols is None else sum_cols
+    regrouped = combine_partials([sev_agg.set_index(keys)], sum_cols)
+    regrouped["claim_count"] = regrouped["claim_count"].astype(int)
+    return regrouped.reset_index()